@@ -24,13 +24,123 @@ class Settings:
     
     # Descargas
     DOWNLOAD_DIR: str = os.getenv("DOWNLOAD_DIR", "downloads")
+    # Descargar solo el audio más pequeño útil (el pipeline solo usa el audio)
+    DOWNLOAD_AUDIO_ONLY: bool = os.getenv("DOWNLOAD_AUDIO_ONLY", "true").lower() == "true"
+    # "file": descarga a disco y luego transcribe; "stream": yt-dlp → ffmpeg → Deepgram sin archivos
+    MEDIA_PIPELINE: str = os.getenv("MEDIA_PIPELINE", "file")
+    
+    # Cachés persistentes (SQLite)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "cache")
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_TTL_SECONDS: int = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "5000"))
+    # Peticiones idénticas en curso (mismo video o misma idea de hooks) comparten un solo trabajo
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # Caché de completions de OpenAI (LRU en memoria + SQLite en disco)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+    # TTL en segundos por etapa (0 = no se guardan las completions de esa etapa)
+    LLM_CACHE_TTL_IMPROVE: int = int(os.getenv("LLM_CACHE_TTL_IMPROVE", str(30 * 24 * 3600)))
+    LLM_CACHE_TTL_ANALYZE: int = int(os.getenv("LLM_CACHE_TTL_ANALYZE", str(7 * 24 * 3600)))
+    LLM_CACHE_TTL_HOOKS: int = int(os.getenv("LLM_CACHE_TTL_HOOKS", str(24 * 3600)))
+    
+    # Caché de transcripciones por huella acústica (re-subidas del mismo audio)
+    FINGERPRINT_CACHE_ENABLED: bool = os.getenv("FINGERPRINT_CACHE_ENABLED", "true").lower() == "true"
+    FINGERPRINT_SECONDS: int = int(os.getenv("FINGERPRINT_SECONDS", "30"))
+    FINGERPRINT_MAX_ENTRIES: int = int(os.getenv("FINGERPRINT_MAX_ENTRIES", "5000"))
+    FINGERPRINT_MAX_BIT_ERROR_RATE: float = float(os.getenv("FINGERPRINT_MAX_BIT_ERROR_RATE", "0.3"))
+    FINGERPRINT_MAX_DURATION_DELTA: float = float(os.getenv("FINGERPRINT_MAX_DURATION_DELTA", "2.0"))
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    # Modelo por etapa (vacío = OPENAI_MODEL): corrección, análisis (incluye single_pass y hook_only) y hooks
+    OPENAI_MODEL_IMPROVE: str = os.getenv("OPENAI_MODEL_IMPROVE", "")
+    OPENAI_MODEL_ANALYZE: str = os.getenv("OPENAI_MODEL_ANALYZE", "")
+    OPENAI_MODEL_HOOKS: str = os.getenv("OPENAI_MODEL_HOOKS", "")
+    # Tope de tokens de respuesta por etapa (corrección y single_pass se ajustan al largo del transcript;
+    # si el transcript corregido no cabe en LLM_MAX_TOKENS_SINGLE_PASS, single_pass corrige y analiza por separado)
+    LLM_MAX_TOKENS_IMPROVE: int = int(os.getenv("LLM_MAX_TOKENS_IMPROVE", "2000"))
+    LLM_MAX_TOKENS_ANALYZE: int = int(os.getenv("LLM_MAX_TOKENS_ANALYZE", "1000"))
+    LLM_MAX_TOKENS_SINGLE_PASS: int = int(os.getenv("LLM_MAX_TOKENS_SINGLE_PASS", "3000"))
+    LLM_MAX_TOKENS_HOOK_WINDOW: int = int(os.getenv("LLM_MAX_TOKENS_HOOK_WINDOW", "600"))
+    LLM_MAX_TOKENS_HOOKS: int = int(os.getenv("LLM_MAX_TOKENS_HOOKS", "1500"))
+    # Ventana de contexto en tokens (0 = según el modelo)
+    LLM_CONTEXT_WINDOW: int = int(os.getenv("LLM_CONTEXT_WINDOW", "0"))
+    # Modo de análisis: "two_pass" (corrección + análisis), "single_pass" (una sola llamada)
+    # o "hook_only" (solo el hook de los primeros segundos)
+    ANALYSIS_MODE: str = os.getenv("ANALYSIS_MODE", "two_pass")
+    # Modo "hook_only": segundos del inicio del video que se descargan, transcriben y analizan
+    HOOK_WINDOW_SECONDS: int = int(os.getenv("HOOK_WINDOW_SECONDS", "15"))
+    # Corrección de transcripts largos: fragmentos de hasta N caracteres corregidos en paralelo
+    IMPROVE_CHUNK_CHARS: int = int(os.getenv("IMPROVE_CHUNK_CHARS", "4000"))
+    IMPROVE_CONCURRENCY: int = int(os.getenv("IMPROVE_CONCURRENCY", "4"))
+    # Plazo de cada llamada a OpenAI (espera de cuota, reintentos y respuesta), en segundos
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    # Hedging: si una llamada tarda más que el percentil N de su etapa, se lanza una copia
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1.0"))
+    # Fracción máxima de llamadas con copia y llamadas recientes por etapa para el percentil
+    LLM_HEDGE_MAX_RATE: float = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.05"))
+    LLM_LATENCY_WINDOW: int = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+    # Hilos para las llamadas con copia de los servicios síncronos (cola de análisis)
+    LLM_HEDGE_WORKERS: int = int(os.getenv("LLM_HEDGE_WORKERS", "16"))
     
     # Deepgram
     DEEPGRAM_API_KEY: str = os.getenv("DEEPGRAM_API_KEY", "")
+    # Codificación del audio subido: wav (PCM), flac (sin pérdida) u opus (24 kbps)
+    TRANSCRIPTION_AUDIO_PROFILE: str = os.getenv("TRANSCRIPTION_AUDIO_PROFILE", "flac")
+    # Backend del modo stream: "prerecorded" (subida HTTP chunked) o "live" (WebSocket)
+    TRANSCRIPTION_STREAM_BACKEND: str = os.getenv("TRANSCRIPTION_STREAM_BACKEND", "prerecorded")
+    # Endpoints de Deepgram (se cambian para apuntar a un servidor falso, p. ej. en benchmarks)
+    DEEPGRAM_URL: str = os.getenv("DEEPGRAM_URL", "https://api.deepgram.com/v1/listen")
+    DEEPGRAM_LIVE_URL: str = os.getenv("DEEPGRAM_LIVE_URL", "wss://api.deepgram.com/v1/listen")
+    # Audio largo: segmentos de ~N segundos (cortados en silencios) transcritos en paralelo (0 = desactivado)
+    TRANSCRIPTION_CHUNK_SECONDS: int = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "300"))
+    TRANSCRIPTION_CHUNK_OVERLAP_SECONDS: float = float(os.getenv("TRANSCRIPTION_CHUNK_OVERLAP_SECONDS", "1.0"))
+    TRANSCRIPTION_CHUNK_CONCURRENCY: int = int(os.getenv("TRANSCRIPTION_CHUNK_CONCURRENCY", "4"))
+    # Motor de transcripción: "deepgram" (API) o "local" (faster-whisper en CPU)
+    TRANSCRIPTION_BACKEND: str = os.getenv("TRANSCRIPTION_BACKEND", "deepgram")
+    # Motor de respaldo si el principal falla (vacío = sin respaldo)
+    TRANSCRIPTION_FALLBACK_BACKEND: str = os.getenv("TRANSCRIPTION_FALLBACK_BACKEND", "")
+    # Motor local: modelo de faster-whisper (tiny, base, small...), cuantización e hilos (0 = todos)
+    LOCAL_STT_MODEL: str = os.getenv("LOCAL_STT_MODEL", "small")
+    LOCAL_STT_COMPUTE_TYPE: str = os.getenv("LOCAL_STT_COMPUTE_TYPE", "int8")
+    LOCAL_STT_THREADS: int = int(os.getenv("LOCAL_STT_THREADS", "0"))
+    LOCAL_STT_WORKERS: int = int(os.getenv("LOCAL_STT_WORKERS", "1"))
+    
+    # Cola de análisis (workers independientes de los workers HTTP)
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    ANALYSIS_QUEUE_SIZE: int = int(os.getenv("ANALYSIS_QUEUE_SIZE", "50"))
+    ANALYSIS_JOB_TTL_SECONDS: int = int(os.getenv("ANALYSIS_JOB_TTL_SECONDS", "3600"))
+    
+    # Análisis en lote (POST /video/analyze/batch): máximo de URLs y videos simultáneos por etapa
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "50"))
+    BATCH_DOWNLOAD_CONCURRENCY: int = int(os.getenv("BATCH_DOWNLOAD_CONCURRENCY", "4"))
+    BATCH_TRANSCRIBE_CONCURRENCY: int = int(os.getenv("BATCH_TRANSCRIBE_CONCURRENCY", "4"))
+    BATCH_ANALYZE_CONCURRENCY: int = int(os.getenv("BATCH_ANALYZE_CONCURRENCY", "8"))
+    
+    # Pool de conexiones HTTP keep-alive (Deepgram y Supabase)
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "50"))
+    HTTP_POOL_MAX_PER_HOST: int = int(os.getenv("HTTP_POOL_MAX_PER_HOST", "10"))
+    HTTP_POOL_MAX_HOSTS: int = int(os.getenv("HTTP_POOL_MAX_HOSTS", "10"))
+    HTTP_POOL_KEEPALIVE_SECONDS: float = float(os.getenv("HTTP_POOL_KEEPALIVE_SECONDS", "60"))
+    
+    # Límites de tasa por proveedor (0 = sin límite propio; se usa la cuota que informan las cabeceras)
+    OPENAI_RPM: int = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM: int = int(os.getenv("OPENAI_TPM", "200000"))
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    DEEPGRAM_RPM: int = int(os.getenv("DEEPGRAM_RPM", "0"))
+    DEEPGRAM_MAX_CONCURRENCY: int = int(os.getenv("DEEPGRAM_MAX_CONCURRENCY", "25"))
+    # Concurrencia adaptativa: piso tras los 429; reintentos con backoff exponencial (segundos)
+    RATE_LIMIT_MIN_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_MIN_CONCURRENCY", "1"))
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+    RATE_LIMIT_BASE_DELAY: float = float(os.getenv("RATE_LIMIT_BASE_DELAY", "0.5"))
+    RATE_LIMIT_MAX_DELAY: float = float(os.getenv("RATE_LIMIT_MAX_DELAY", "30"))
     
     @classmethod
     def validate(cls) -> bool:
@@ -46,8 +156,15 @@ class Settings:
             raise ValueError("SUPABASE_KEY no está configurado")
         if not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY no está configurado")
-        if not cls.DEEPGRAM_API_KEY:
+        uses_deepgram = "deepgram" in (cls.TRANSCRIPTION_BACKEND, cls.TRANSCRIPTION_FALLBACK_BACKEND)
+        if uses_deepgram and not cls.DEEPGRAM_API_KEY:
             raise ValueError("DEEPGRAM_API_KEY no está configurado")
+        chunk_seconds = cls.TRANSCRIPTION_CHUNK_SECONDS
+        if chunk_seconds < 0 or 0 < chunk_seconds <= 2 * cls.TRANSCRIPTION_CHUNK_OVERLAP_SECONDS:
+            raise ValueError(
+                "TRANSCRIPTION_CHUNK_SECONDS debe ser 0 (desactivado) o mayor que el doble de "
+                "TRANSCRIPTION_CHUNK_OVERLAP_SECONDS"
+            )
         return True
 
 
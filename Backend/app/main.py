@@ -1,11 +1,34 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+import anyio.to_thread
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import video, auth
+from app.services.http_pool import get_http_pool
+from app.services.rate_limiter import rate_limiter_stats
+from app.services.hedging import get_hedger
+from app.prompts.registry import get_prompt_registry
+from app.services.metrics import MetricsMiddleware, executor_usage, get_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la app: compila los prompts al iniciar; detiene el pool de
+    análisis y cierra las conexiones HTTP al apagar.
+    """
+    get_prompt_registry()
+    yield
+    video.analysis_job_queue.shutdown()
+    get_http_pool().close()
+    await get_http_pool().aclose()
+
 
 app = FastAPI(
     title="Hooks AI Backend",
     description="API para análisis de videos con transcripción",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -30,13 +53,16 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos los headers
 )
 
+# Latencia y cantidad de peticiones por ruta (para /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Registrar routers
 app.include_router(auth.router)
 app.include_router(video.router)
 
 
 @app.get("/")
-def root():
+async def root():
     """Endpoint raíz de la API."""
     return {
         "message": "Hooks AI Backend API",
@@ -45,6 +71,91 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Endpoint de verificación de salud."""
     return {"status": "healthy"}
+
+
+@app.get("/health/http-pool")
+async def http_pool_stats():
+    """Utilización de los pools de conexiones HTTP (para dimensionarlos bajo carga)."""
+    return get_http_pool().stats()
+
+
+@app.get("/health/single-flight")
+async def single_flight_stats():
+    """Análisis y generaciones de hooks compartidos entre peticiones idénticas simultáneas."""
+    return {
+        "analysis": video.async_analysis_flights.stats(),
+        "analysis_jobs": video.analysis_flights.stats(),
+        "hooks": video.hook_flights.stats(),
+    }
+
+
+@app.get("/health/caches")
+async def cache_stats():
+    """Aciertos, fallos y entradas de las cachés de resultados, completions y huellas acústicas."""
+    caches = {
+        "results": video.result_cache,
+        "completions": video.completion_cache,
+        "fingerprints": video.fingerprint_index,
+    }
+    # stats() cuenta las entradas en SQLite: se consulta fuera del event loop
+    return {
+        name: {"enabled": cache.enabled, **await asyncio.to_thread(cache.stats)}
+        for name, cache in caches.items()
+    }
+
+
+@app.get("/health/rate-limits")
+async def rate_limit_stats():
+    """Concurrencia adaptativa, cuota disponible y reintentos por proveedor (OpenAI, Deepgram)."""
+    return rate_limiter_stats()
+
+
+@app.get("/health/llm-latency")
+async def llm_latency_stats():
+    """Latencia reciente por etapa, plazos vencidos y copias de respaldo (hedges) de OpenAI."""
+    return get_hedger().stats()
+
+
+@app.get("/health/model-routes")
+async def model_routes():
+    """Modelo, tope de max_tokens y ventana de contexto de cada etapa del análisis."""
+    return video.async_video_analysis_service.router.stats()
+
+
+@app.get("/health/prompts")
+async def prompt_stats():
+    """Versión, huella y tokens del prefijo de cada prompt, y tokens de prompt enviados."""
+    return get_prompt_registry().stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas en formato Prometheus: latencia por ruta y por etapa, pipelines en curso, hilos, bytes y tokens."""
+    _update_threadpool_metrics()
+    content, content_type = get_metrics().render()
+    return Response(content=content, media_type=content_type)
+
+
+def _update_threadpool_metrics() -> None:
+    """Lee la ocupación de los pools de hilos al momento de la consulta."""
+    registry = get_metrics()
+
+    # Rutas y dependencias síncronas de FastAPI
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    registry.set_threadpool(
+        "fastapi",
+        int(limiter.total_tokens),
+        int(limiter.borrowed_tokens),
+        limiter.statistics().tasks_waiting
+    )
+
+    # asyncio.to_thread (yt-dlp, cachés y motores en los servicios async); se crea al primer uso
+    usage = executor_usage(getattr(asyncio.get_running_loop(), "_default_executor", None))
+    if usage:
+        registry.set_threadpool("asyncio", usage["size"], usage["busy"], usage["queued"])
+
+    jobs = video.analysis_job_queue.stats()
+    registry.set_threadpool("analysis_jobs", jobs["workers"], jobs["running"], jobs["queued"])
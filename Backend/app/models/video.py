@@ -8,6 +8,18 @@ from pydantic import BaseModel, Field
 class VideoRequest(BaseModel):
     """Request model for video analysis."""
     url: str = Field(..., description="URL del video a analizar")
+    mode: Optional[str] = Field(None, description="Modo de análisis: two_pass (corrección + análisis), single_pass (una sola llamada) o hook_only (solo el hook de los primeros segundos)")
+    transcription_backend: Optional[str] = Field(None, description="Motor de transcripción: deepgram o local (por defecto el configurado en TRANSCRIPTION_BACKEND)")
+
+
+class AnalysisMetrics(BaseModel):
+    """Per-request latency and token usage of a video analysis."""
+    mode: str = Field(..., description="Modo de análisis usado")
+    latency_ms: Dict[str, float] = Field(..., description="Latencia por etapa en milisegundos")
+    usage: Dict[str, int] = Field(..., description="Tokens consumidos en OpenAI (cached_tokens: tokens del prompt servidos desde la caché de OpenAI), número de llamadas y llamadas servidas desde caché")
+    cache_hit: bool = Field(False, description="True si el resultado vino de la caché de videos")
+    coalesced: bool = Field(False, description="True si el resultado se compartió con otra petición idéntica que estaba en curso")
+    download: Optional[Dict[str, Any]] = Field(None, description="Formato descargado, bytes descargados y bytes ahorrados por el modo solo audio")
 
 
 class VideoAnalysisResponse(BaseModel):
@@ -16,6 +28,51 @@ class VideoAnalysisResponse(BaseModel):
     transcript: str = Field(..., description="Transcripción mejorada del video")
     hook: Dict[str, Any] = Field(..., description="Hook identificado en el video")
     script_base: str = Field(..., description="Script base replicable")
+    metrics: Optional[AnalysisMetrics] = Field(None, description="Latencia y uso de tokens del análisis")
+
+
+class AnalysisJobSubmitResponse(BaseModel):
+    """Response model for a queued video analysis job."""
+    status: str = Field(..., description="Estado de la respuesta")
+    job_id: str = Field(..., description="ID del trabajo de análisis")
+    job_status: str = Field(..., description="Estado del trabajo: queued, running, completed, failed")
+
+
+class AnalysisJobStatusResponse(BaseModel):
+    """Response model for polling a video analysis job."""
+    status: str = Field(..., description="Estado de la respuesta")
+    job_id: str = Field(..., description="ID del trabajo de análisis")
+    job_status: str = Field(..., description="Estado del trabajo: queued, running, completed, failed")
+    stage: Optional[str] = Field(None, description="Etapa actual: downloading, transcribing, improving, analyzing, completed")
+    result: Optional[VideoAnalysisResponse] = Field(None, description="Resultado del análisis cuando el trabajo termina")
+    error: Optional[str] = Field(None, description="Detalle del error si el trabajo falló")
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for analyzing several videos at once."""
+    urls: List[str] = Field(..., min_length=1, description="URLs de los videos a analizar")
+    mode: Optional[str] = Field(None, description="Modo de análisis para todos los videos: two_pass, single_pass o hook_only")
+    transcription_backend: Optional[str] = Field(None, description="Motor de transcripción para todos los videos: deepgram o local")
+
+
+class BatchAnalysisItem(BaseModel):
+    """One NDJSON line of the batch analysis stream: the outcome of a single video."""
+    type: str = Field("item", description="Tipo de línea: item")
+    index: int = Field(..., description="Posición del video en la lista enviada")
+    url: str = Field(..., description="URL del video")
+    status: str = Field(..., description="Resultado del video: success o error")
+    result: Optional[VideoAnalysisResponse] = Field(None, description="Análisis del video si terminó bien")
+    status_code: Optional[int] = Field(None, description="Código HTTP equivalente si falló: 400 (video no válido), 503 (límite de tasa del proveedor), 504 (plazo vencido) o 500")
+    error: Optional[str] = Field(None, description="Detalle del error si falló")
+
+
+class BatchAnalysisSummary(BaseModel):
+    """Last NDJSON line of the batch analysis stream."""
+    type: str = Field("summary", description="Tipo de línea: summary")
+    total: int = Field(..., description="Número de videos del lote")
+    succeeded: int = Field(..., description="Videos analizados correctamente")
+    failed: int = Field(..., description="Videos con error")
+    latency_ms: float = Field(..., description="Tiempo total del lote en milisegundos")
 
 
 class VideoAnalysisSaveRequest(BaseModel):
@@ -63,6 +120,7 @@ class HookGenerationRequest(BaseModel):
     idea: str = Field(..., description="Idea o guion base para generar hooks")
     nicho: Optional[str] = Field(None, description="Nicho o categoría del contenido")
     platform: Optional[str] = Field(None, description="Plataforma: tiktok, instagram, twitter, linkedin, facebook")
+    fresh: bool = Field(False, description="Si es true, genera variantes nuevas sin usar la caché")
 
 
 class GeneratedHook(BaseModel):
@@ -1,4 +1,10 @@
-from .video_analysis_prompts import get_video_analysis_prompt
-
-__all__ = ["get_video_analysis_prompt"]
+from .video_analysis_prompts import get_video_analysis_prompt, get_single_pass_analysis_prompt
+from .registry import PromptTemplate, PromptRegistry, get_prompt_registry
 
+__all__ = [
+    "get_video_analysis_prompt",
+    "get_single_pass_analysis_prompt",
+    "PromptTemplate",
+    "PromptRegistry",
+    "get_prompt_registry",
+]
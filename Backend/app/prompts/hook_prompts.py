@@ -0,0 +1,99 @@
+"""
+Prompts para la generación de hooks virales con ChatGPT.
+
+Las instrucciones son fijas; el tema, el nicho y la plataforma van al final
+del prompt (ver app.prompts.registry).
+"""
+from typing import Dict, Optional
+from app.prompts.registry import PromptTemplate
+
+# Pautas por plataforma (se agregan al sufijo del prompt)
+_PLATFORM_GUIDELINES = {
+    "tiktok": "\nPLATAFORMA: TikTok\n- Hooks cortos y punchy que crean curiosidad en los primeros 3 segundos\n- Usa lenguaje casual y tendencias actuales\n- Enfócate en el valor inmediato o entretenimiento",
+    "instagram": "\nPLATAFORMA: Instagram Reels\n- Hooks visuales y punchy para los primeros 3 segundos\n- Balance entre entretenimiento y valor\n- Considera el formato vertical y scroll rápido",
+    "twitter": "\nPLATAFORMA: Twitter/X\n- Hooks concisos y punzantes (considera límite de caracteres)\n- Usa ingenio y relevancia a tendencias\n- Considera hashtags relevantes",
+    "linkedin": "\nPLATAFORMA: LinkedIn\n- Tono profesional con enfoque en insights de industria\n- Enfócate en desarrollo profesional o lecciones de negocio\n- Crea hooks que inviten a la reflexión",
+    "facebook": "\nPLATAFORMA: Facebook\n- Hooks emocionalmente engaging que fomenten compartir\n- Enfócate en historias y conexión humana\n- Considera audiencia más amplia en edad",
+}
+
+
+HOOKS_PROMPT = PromptTemplate(
+    name="hooks",
+    version=1,
+    system="Eres un Viral Hook Creator experto en generar titulares y hooks que capturan atención inmediatamente. Conoces las técnicas más efectivas para cada plataforma social. Siempre respondes en formato JSON válido.",
+    instructions="""Eres un Viral Hook Creator experto en generar titulares y hooks que capturan atención para redes sociales.
+El tema o idea (y, si se indican, el nicho y la plataforma) aparece al final.
+
+Analiza el tema considerando:
+- Intereses y puntos de dolor de la audiencia objetivo
+- Tendencias actuales relacionadas con el tema
+- Ángulos únicos o perspectivas que no han sido sobreusadas
+
+Genera 5 hooks virales de diferentes tipos:
+1. EMOCIONAL: Conecta con emociones profundas del espectador
+2. RACIONAL: Usa lógica, datos o estadísticas convincentes
+3. SORPRESA: Presenta algo inesperado o contraintuitivo
+4. CONTROVERSIAL: Desafía creencias comunes (sin ser ofensivo)
+5. CURIOSIDAD: Crea una pregunta o vacío de información irresistible
+
+Para cada hook, aplica estas técnicas:
+- Usa palabras poderosas que evoquen emoción o curiosidad
+- Crea sentido de urgencia o FOMO (miedo a perderse algo)
+- Haz preguntas provocadoras o declaraciones audaces
+- Usa números o estadísticas para credibilidad
+- Promete valor o solución a un problema
+- Mantenlo conciso y fácil de entender
+
+Para cada hook, evalúa su probabilidad de retención (0-100) basándote en:
+- Claridad y dirección del mensaje
+- Impacto emocional o intelectual
+- Relevancia para el nicho/audiencia
+- Uso efectivo de técnicas probadas
+
+Responde en formato JSON:
+{
+    "hooks": [
+        {
+            "text": "Texto del hook",
+            "type": "Emocional|Racional|Sorpresa|Controversial|Curiosidad",
+            "retention_score": 75.5,
+            "description": "Explicación de por qué funciona este hook"
+        }
+    ]
+}
+
+IMPORTANTE:
+- Hooks cortos (1-2 oraciones máximo)
+- Impactantes desde la primera palabra
+- Ordena de mayor a menor retention_score""",
+    suffix="TEMA/IDEA: {idea}{nicho_context}{platform_context}",
+)
+
+# Plantillas que se registran en app.prompts.registry
+TEMPLATES = [HOOKS_PROMPT]
+
+
+def get_platform_context(platform: Optional[str]) -> str:
+    """Retorna contexto específico de la plataforma para el prompt."""
+    if not platform:
+        return ""
+    return _PLATFORM_GUIDELINES.get(platform.lower(), "")
+
+
+def get_hook_prompt_fields(idea: str, nicho: Optional[str], platform: Optional[str]) -> Dict[str, str]:
+    """
+    Campos del sufijo del prompt de hooks.
+
+    Args:
+        idea: Tema o idea del video
+        nicho: Nicho o categoría (opcional)
+        platform: Plataforma destino (opcional)
+
+    Returns:
+        Diccionario con idea, nicho_context y platform_context
+    """
+    return {
+        "idea": idea,
+        "nicho_context": f"\nNicho o categoría: {nicho}" if nicho else "",
+        "platform_context": get_platform_context(platform),
+    }
@@ -0,0 +1,193 @@
+"""
+Registro versionado de prompts.
+Responsabilidad única: Armar los mensajes de cada etapa desde plantillas
+versionadas y acumular su uso de tokens.
+
+Cada plantilla tiene un prefijo estático (mensaje de sistema e instrucciones)
+y un sufijo dinámico con los datos de la llamada (transcript, idea...), que
+va siempre al final. La versión y la huella identifican el texto exacto que
+armó cada prompt.
+
+Esto no activa la caché de prompts de OpenAI: solo se aplica a prompts cuyos
+primeros 1024 tokens coinciden, y los prefijos actuales estiman entre ~150 y
+~670 tokens. Rellenarlos hasta ese mínimo costaría más tokens de los que
+ahorraría el descuento. cached_tokens se registra tal como lo informa OpenAI.
+
+Las plantillas se compilan una sola vez (validación de campos, huella y
+tokens del prefijo) al crear el registro del proceso.
+"""
+import hashlib
+import string
+import threading
+from typing import Any, Dict, List, Optional
+from app.services.token_estimator import estimate_message_tokens
+
+
+class PromptTemplate:
+    """Plantilla de prompt: prefijo estático (system + instrucciones) y sufijo dinámico."""
+
+    def __init__(self, name: str, version: int, system: str, instructions: str, suffix: str):
+        """
+        Compila la plantilla.
+
+        Args:
+            name: Nombre de la plantilla (la etapa que la usa)
+            version: Versión; subirla al cambiar el texto
+            system: Mensaje de sistema (estático)
+            instructions: Instrucciones del mensaje de usuario (estáticas)
+            suffix: Parte dinámica del mensaje de usuario, con campos {nombre}
+
+        Raises:
+            ValueError: Si el sufijo no es un formato válido
+        """
+        self.name = name
+        self.version = version
+        self.system = system
+        self.instructions = instructions
+        self.suffix = suffix
+        self.fields = _format_fields(suffix)
+
+        self._user_prefix = f"{instructions}\n\n"
+        prefix_messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": self._user_prefix},
+        ]
+        self.prefix_tokens = estimate_message_tokens(prefix_messages)
+        self.fingerprint = hashlib.sha256(
+            "\0".join((system, instructions, suffix)).encode("utf-8")
+        ).hexdigest()[:12]
+
+    @property
+    def key(self) -> str:
+        """Nombre y versión (p. ej. "analyze@v1")."""
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **fields: Any) -> List[Dict[str, str]]:
+        """
+        Arma los mensajes de la llamada.
+
+        Args:
+            **fields: Valores de los campos del sufijo
+
+        Returns:
+            Mensajes system y user; el user empieza con las instrucciones fijas
+
+        Raises:
+            ValueError: Si faltan campos del sufijo
+        """
+        missing = [field for field in self.fields if field not in fields]
+        if missing:
+            raise ValueError(f"Faltan campos para el prompt {self.key}: {', '.join(missing)}")
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self._user_prefix + self.suffix.format(**fields)},
+        ]
+
+
+class PromptRegistry:
+    """Plantillas por nombre y uso de tokens de cada una."""
+
+    def __init__(self, templates: Optional[List[PromptTemplate]] = None):
+        """
+        Args:
+            templates: Plantillas a registrar (opcional)
+        """
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        for template in templates or []:
+            self.register(template)
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        """
+        Registra una plantilla (reemplaza a una versión anterior con el mismo nombre).
+
+        Raises:
+            ValueError: Si ya hay una versión igual o más nueva con ese nombre
+        """
+        current = self._templates.get(template.name)
+        if current is not None and current.version >= template.version:
+            raise ValueError(f"El prompt {current.key} ya está registrado")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        """
+        Plantilla registrada con ese nombre.
+
+        Raises:
+            ValueError: Si no existe
+        """
+        template = self._templates.get(name)
+        if template is None:
+            raise ValueError(f"Prompt no registrado: {name}")
+        return template
+
+    def render(self, name: str, **fields: Any) -> List[Dict[str, str]]:
+        """Arma los mensajes de la plantilla `name` (ver PromptTemplate.render)."""
+        return self.get(name).render(**fields)
+
+    def record_usage(self, name: Optional[str], usage: Dict[str, int]) -> None:
+        """
+        Acumula el uso de tokens de una respuesta de OpenAI para la plantilla.
+
+        Args:
+            name: Plantilla (etapa) que armó el prompt; se ignora si no está registrada
+            usage: prompt_tokens y cached_tokens de la respuesta
+        """
+        if name not in self._templates:
+            return
+        with self._lock:
+            totals = self._usage.setdefault(name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            totals["cached_tokens"] += usage.get("cached_tokens", 0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna por plantilla su versión, huella y tokens del prefijo, y las
+        llamadas y tokens de prompt enviados (cached_tokens según OpenAI).
+        """
+        with self._lock:
+            stats = {}
+            for name, template in self._templates.items():
+                usage = self._usage.get(name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+                stats[name] = {
+                    "version": template.version,
+                    "fingerprint": template.fingerprint,
+                    "prefix_tokens": template.prefix_tokens,
+                    **usage,
+                }
+            return stats
+
+
+def _format_fields(suffix: str) -> List[str]:
+    """Campos {nombre} de un formato de str.format, en orden."""
+    fields: List[str] = []
+    try:
+        for _, field, _, _ in string.Formatter().parse(suffix):
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Campo no válido en el prompt: {{{field}}}")
+            if field not in fields:
+                fields.append(field)
+    except ValueError as e:
+        raise ValueError(f"Sufijo de prompt no válido: {e}")
+    return fields
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Retorna el registro de prompts del proceso (las plantillas se compilan una sola vez)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from app.prompts.video_analysis_prompts import TEMPLATES as analysis_templates
+                from app.prompts.hook_prompts import TEMPLATES as hook_templates
+                _registry = PromptRegistry(analysis_templates + hook_templates)
+    return _registry
@@ -1,53 +1,177 @@
 """
 Prompts para análisis de videos virales con ChatGPT.
-"""
-
-
-def get_video_analysis_prompt(transcript: str) -> str:
-    """
-    Genera el prompt completo para analizar un video viral.
-    
-    Args:
-        transcript: Transcripción completa del video
-        
-    Returns:
-        Prompt formateado para ChatGPT
-    """
-    return f"""Eres un experto en análisis de contenido viral. 
-Analiza el siguiente transcript y proporciona SOLO 3 elementos en formato JSON.
 
-TRANSCRIPT DEL VIDEO:
-{transcript}
-
-INSTRUCCIONES (SOLO ESTO):
+Cada plantilla deja fijo el inicio del prompt (sistema e instrucciones) y pone
+el transcript al final (ver app.prompts.registry).
+"""
+from app.prompts.registry import PromptTemplate
 
-1. HOOK:
+# Instrucciones del hook (también las usa el análisis de solo hook)
+_HOOK_INSTRUCTIONS = """1. HOOK:
    - Identifica el hook más potente del video
    - Proporciona DOS versiones:
      * "general": Versión general y reutilizable (ej: "Deja de desayunar lo mismo siempre, ya aprendí a preparar ____")
      * "used_in_video": Cómo se usa específicamente en este video (ej: "Deja de desayunar lo mismo siempre, ya aprendí a preparar estas tostadas francesas de tiramisú")
-   - Tipo de hook (emocional, sorpresa, curiosidad, reto, contradicción, etc.)
+   - Tipo de hook (emocional, sorpresa, curiosidad, reto, contradicción, etc.)"""
+
+_HOOK_JSON_FIELD = """    "hook": {
+        "general": "Hook general y reutilizable con ____ donde se puede personalizar",
+        "used_in_video": "Cómo se usa específicamente en este video",
+        "type": "tipo de hook (emocional, sorpresa, curiosidad, reto, contradicción, etc.)"
+    }"""
+
+# Instrucciones compartidas por el análisis normal y el de una sola pasada
+_HOOK_AND_SCRIPT_INSTRUCTIONS = _HOOK_INSTRUCTIONS + """
 
 2. SCRIPT BASE:
    - Crea un SCRIPT BASE con espacios en blanco (____) que el usuario pueda personalizar
    - NO uses la estructura literal, sino un template genérico reutilizable
    - Ejemplo: "Deja de desayunar lo mismo siempre, ya aprendí a preparar ____. Son muy fáciles de preparar y representan la opción perfecta para el desayuno. Comienza con ____: pon ____ en un bol..."
-   - El script debe ser completo pero con espacios personalizables
+   - El script debe ser completo pero con espacios personalizables"""
+
+_HOOK_AND_SCRIPT_JSON_FIELDS = _HOOK_JSON_FIELD + """,
+    "script_base": "Script completo con espacios en blanco (____) para personalizar. Debe ser la estructura general replicable, no literal del video.\""""
+
+
+IMPROVE_PROMPT = PromptTemplate(
+    name="improve",
+    version=1,
+    system="Eres un experto en corrección de transcripciones de audio. Tu tarea es corregir errores de transcripción, mejorar la gramática y hacer el texto más claro, manteniendo el sentido original.",
+    instructions="""Corrige y mejora la transcripción de un video que aparece al final.
+Corrige errores de transcripción, mejora la gramática y haz el texto más claro.
+Mantén el sentido original y no cambies el contenido.
+
+Responde SOLO con el texto corregido, sin explicaciones adicionales.""",
+    suffix="""TRANSCRIPCIÓN ORIGINAL:
+{transcript}""",
+)
+
+ANALYZE_PROMPT = PromptTemplate(
+    name="analyze",
+    version=1,
+    system="Eres un experto en análisis de contenido viral, storytelling y creación de videos exitosos. Siempre respondes en formato JSON válido.",
+    instructions=f"""Eres un experto en análisis de contenido viral.
+Analiza el transcript que aparece al final y proporciona SOLO 3 elementos en formato JSON.
+
+INSTRUCCIONES (SOLO ESTO):
+
+{_HOOK_AND_SCRIPT_INSTRUCTIONS}
 
 RESPONDE EN FORMATO JSON CON ESTA ESTRUCTURA SIMPLE:
 {{
-    "hook": {{
-        "general": "Hook general y reutilizable con ____ donde se puede personalizar",
-        "used_in_video": "Cómo se usa específicamente en este video",
-        "type": "tipo de hook (emocional, sorpresa, curiosidad, reto, contradicción, etc.)"
-    }},
-    "script_base": "Script completo con espacios en blanco (____) para personalizar. Debe ser la estructura general replicable, no literal del video."
+{_HOOK_AND_SCRIPT_JSON_FIELDS}
 }}
 
 IMPORTANTE:
 - Responde SOLO con el JSON, sin texto adicional
 - Sé CONCISO y DIRECTO
 - El script_base debe ser completo pero con espacios en blanco (____) para personalizar
-- NO incluyas información extra, solo lo solicitado
-"""
+- NO incluyas información extra, solo lo solicitado""",
+    suffix="""TRANSCRIPT DEL VIDEO:
+{transcript}""",
+)
+
+SINGLE_PASS_PROMPT = PromptTemplate(
+    name="single_pass",
+    version=1,
+    system="Eres un experto en corrección de transcripciones y en análisis de contenido viral, storytelling y creación de videos exitosos. Siempre respondes en formato JSON válido.",
+    instructions=f"""Eres un experto en corrección de transcripciones y en análisis de contenido viral.
+Corrige el transcript que aparece al final y analízalo, proporcionando SOLO 3 elementos en formato JSON.
+
+INSTRUCCIONES (SOLO ESTO):
+
+0. TRANSCRIPT CORREGIDO:
+   - Corrige errores de transcripción, mejora la gramática y haz el texto más claro
+   - Mantén el sentido original y no cambies el contenido
+   - Usa el transcript corregido para el resto del análisis
+
+{_HOOK_AND_SCRIPT_INSTRUCTIONS}
+
+RESPONDE EN FORMATO JSON CON ESTA ESTRUCTURA SIMPLE:
+{{
+    "transcript": "Transcript completo corregido",
+{_HOOK_AND_SCRIPT_JSON_FIELDS}
+}}
+
+IMPORTANTE:
+- Responde SOLO con el JSON, sin texto adicional
+- El transcript corregido debe estar completo, no lo resumas
+- El script_base debe ser completo pero con espacios en blanco (____) para personalizar
+- NO incluyas información extra, solo lo solicitado""",
+    suffix="""TRANSCRIPT ORIGINAL DEL VIDEO:
+{transcript}""",
+)
 
+HOOK_WINDOW_PROMPT = PromptTemplate(
+    name="hook_window",
+    version=1,
+    system="Eres un experto en corrección de transcripciones y en hooks de contenido viral. Siempre respondes en formato JSON válido.",
+    instructions=f"""Eres un experto en corrección de transcripciones y en hooks de contenido viral.
+El transcript que aparece al final corresponde SOLO a los primeros segundos de un video, donde está el hook.
+Corrige el transcript e identifica el hook, proporcionando SOLO 2 elementos en formato JSON.
+
+INSTRUCCIONES (SOLO ESTO):
+
+0. TRANSCRIPT CORREGIDO:
+   - Corrige errores de transcripción y mejora la gramática
+   - El texto puede terminar a mitad de una frase: no la completes
+
+{_HOOK_INSTRUCTIONS}
+
+RESPONDE EN FORMATO JSON CON ESTA ESTRUCTURA SIMPLE:
+{{
+    "transcript": "Transcript corregido",
+{_HOOK_JSON_FIELD}
+}}
+
+IMPORTANTE:
+- Responde SOLO con el JSON, sin texto adicional
+- Sé CONCISO y DIRECTO
+- NO incluyas información extra, solo lo solicitado""",
+    # La duración de la ventana cambia por configuración: va en el sufijo
+    suffix="""TRANSCRIPT ORIGINAL (PRIMEROS {window_seconds} SEGUNDOS DEL VIDEO):
+{transcript}""",
+)
+
+# Plantillas que se registran en app.prompts.registry
+TEMPLATES = [IMPROVE_PROMPT, ANALYZE_PROMPT, SINGLE_PASS_PROMPT, HOOK_WINDOW_PROMPT]
+
+
+def get_video_analysis_prompt(transcript: str) -> str:
+    """
+    Genera el prompt completo para analizar un video viral.
+
+    Args:
+        transcript: Transcripción completa del video
+
+    Returns:
+        Prompt formateado para ChatGPT
+    """
+    return ANALYZE_PROMPT.render(transcript=transcript)[-1]["content"]
+
+
+def get_single_pass_analysis_prompt(transcript: str) -> str:
+    """
+    Genera el prompt que corrige el transcript y lo analiza en una sola llamada.
+
+    Args:
+        transcript: Transcripción original del video (puede tener errores)
+
+    Returns:
+        Prompt formateado para ChatGPT
+    """
+    return SINGLE_PASS_PROMPT.render(transcript=transcript)[-1]["content"]
+
+
+def get_hook_window_prompt(transcript: str, window_seconds: int) -> str:
+    """
+    Genera el prompt que corrige e identifica el hook de los primeros segundos de un video.
+
+    Args:
+        transcript: Transcripción original de los primeros segundos del video
+        window_seconds: Segundos del inicio del video que cubre la transcripción
+
+    Returns:
+        Prompt formateado para ChatGPT
+    """
+    return HOOK_WINDOW_PROMPT.render(transcript=transcript, window_seconds=window_seconds)[-1]["content"]
@@ -12,16 +12,16 @@ from app.models.auth import (
     UserResponse,
     SessionResponse
 )
-from app.services.auth_service import AuthService
+from app.services.auth_service import AsyncAuthService
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 # Inicializar servicio de autenticación (SRP: responsabilidad única)
-auth_service = AuthService()
+auth_service = AsyncAuthService()
 
 
 @router.post("/signup", response_model=SignUpResponse)
-def sign_up(data: SignUpRequest):
+async def sign_up(data: SignUpRequest):
     """
     Registra un nuevo usuario en Supabase.
     
@@ -55,8 +55,8 @@ def sign_up(data: SignUpRequest):
                 detail="El nombre completo es requerido"
             )
         
-        # Registrar usuario (responsabilidad: AuthService)
-        auth_data = auth_service.sign_up(
+        # Registrar usuario (responsabilidad: AsyncAuthService)
+        auth_data = await auth_service.sign_up(
             email=data.email,
             password=data.password,
             full_name=data.full_name
@@ -87,7 +87,7 @@ def sign_up(data: SignUpRequest):
 
 
 @router.post("/signin", response_model=SignInResponse)
-def sign_in(data: SignInRequest):
+async def sign_in(data: SignInRequest):
     """
     Inicia sesión de un usuario en Supabase.
     
@@ -106,8 +106,8 @@ def sign_in(data: SignInRequest):
         HTTPException: Si las credenciales son inválidas
     """
     try:
-        # Iniciar sesión (responsabilidad: AuthService)
-        auth_data = auth_service.sign_in(
+        # Iniciar sesión (responsabilidad: AsyncAuthService)
+        auth_data = await auth_service.sign_in(
             email=data.email,
             password=data.password
         )
@@ -1,7 +1,18 @@
+import asyncio
+import json
+import math
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.config import settings
 from app.models.video import (
     VideoRequest,
     VideoAnalysisResponse,
+    BatchAnalysisRequest,
+    BatchAnalysisItem,
+    BatchAnalysisSummary,
+    AnalysisJobSubmitResponse,
+    AnalysisJobStatusResponse,
     VideoAnalysisSaveRequest,
     VideoAnalysisSaveResponse,
     VideoAnalysisListResponse,
@@ -15,21 +26,72 @@ from app.models.video import (
     ViralHookListResponse,
 )
 from app.services.video_downloader import VideoDownloader
-from app.services.transcription_service import TranscriptionService
-from app.services.video_analysis_service import VideoAnalysisService
-from app.services.supabase_service import SupabaseService
+from app.services.transcription_service import TranscriptionService, AsyncTranscriptionService
+from app.services.transcription_backends import TRANSCRIPTION_BACKENDS
+from app.services.video_analysis_service import VideoAnalysisService, AsyncVideoAnalysisService
+from app.services.supabase_service import AsyncSupabaseService
+from app.services.video_analysis_pipeline import VideoAnalysisPipeline, AsyncVideoAnalysisPipeline
+from app.services.video_url_canonicalizer import VideoUrlCanonicalizer
+from app.services.video_result_cache import VideoResultCache
+from app.services.audio_fingerprint import AudioFingerprintIndex
+from app.services.completion_cache import CompletionCache
+from app.services.analysis_job_queue import AnalysisJobQueue, QueueFullError
+from app.services.batch_analysis_service import BatchAnalysisService
+from app.services.single_flight import SingleFlight, AsyncSingleFlight
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.hedging import DeadlineExceeded
 
 router = APIRouter(prefix="/video", tags=["video"])
 
+# Cada cuántos segundos se envía un comentario SSE si no hay eventos (evita cortes de proxies)
+_SSE_HEARTBEAT_SECONDS = 15
+# Sin caché ni buffering de proxies (nginx) para que cada evento llegue al instante
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 # Inicializar servicios (SRP: cada servicio tiene una responsabilidad única)
+# Las cachés se comparten entre las variantes síncronas (cola de trabajos) y async (rutas)
+fingerprint_index = AudioFingerprintIndex()
+completion_cache = CompletionCache()
+url_canonicalizer = VideoUrlCanonicalizer()
+result_cache = VideoResultCache()
+# Análisis y hooks idénticos en curso se comparten (uno por variante: hilos de la cola y event loop)
+analysis_flights = SingleFlight()
+async_analysis_flights = AsyncSingleFlight()
+hook_flights = AsyncSingleFlight()
+
 video_downloader = VideoDownloader()
-transcription_service = TranscriptionService()
-video_analysis_service = VideoAnalysisService()
-supabase_service = SupabaseService()
+transcription_service = TranscriptionService(fingerprint_index=fingerprint_index)
+video_analysis_service = VideoAnalysisService(completion_cache=completion_cache)
+async_transcription_service = AsyncTranscriptionService(fingerprint_index=fingerprint_index)
+async_video_analysis_service = AsyncVideoAnalysisService(
+    completion_cache=completion_cache,
+    single_flight=hook_flights
+)
+supabase_service = AsyncSupabaseService()
+
+# Pipeline síncrono para los workers de la cola; pipeline async para las rutas
+video_analysis_pipeline = VideoAnalysisPipeline(
+    video_downloader,
+    transcription_service,
+    video_analysis_service,
+    url_canonicalizer=url_canonicalizer,
+    result_cache=result_cache,
+    single_flight=analysis_flights
+)
+async_video_analysis_pipeline = AsyncVideoAnalysisPipeline(
+    video_downloader,
+    async_transcription_service,
+    async_video_analysis_service,
+    url_canonicalizer=url_canonicalizer,
+    result_cache=result_cache,
+    single_flight=async_analysis_flights
+)
+analysis_job_queue = AnalysisJobQueue(video_analysis_pipeline)
+batch_analysis_service = BatchAnalysisService(async_video_analysis_pipeline)
 
 
 @router.post("/analyze", response_model=VideoAnalysisResponse)
-def analyze_video(data: VideoRequest):
+async def analyze_video(data: VideoRequest):
     """
     Analiza un video: lo descarga, transcribe y analiza con ChatGPT.
     
@@ -38,6 +100,9 @@ def analyze_video(data: VideoRequest):
     2. Extrae y transcribe el audio
     3. Analiza el transcript con ChatGPT (hook, estructura, emociones, plantilla)
     
+    Con mode=hook_only solo se procesan los primeros HOOK_WINDOW_SECONDS
+    segundos del video y se retorna el hook (script_base vacío).
+    
     Args:
         data: Request con la URL del video
         
@@ -48,36 +113,24 @@ def analyze_video(data: VideoRequest):
         HTTPException: Si hay error en cualquier paso del proceso
     """
     try:
-        # Paso 1: Descargar video (responsabilidad: VideoDownloader)
-        video_path = video_downloader.download_video(data.url)
-        
-        # Paso 2: Transcribir video (responsabilidad: TranscriptionService)
-        raw_transcript = transcription_service.transcribe_video(video_path)
-        
-        # Validar que el transcript no esté vacío
-        if not raw_transcript or not raw_transcript.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="No se pudo generar la transcripción del video"
-            )
-        
-        # Paso 3: Mejorar transcript (responsabilidad: VideoAnalysisService)
-        improved_transcript = video_analysis_service.improve_transcript(raw_transcript)
-        
-        # Paso 4: Analizar transcript mejorado con ChatGPT (responsabilidad: VideoAnalysisService)
-        analysis = video_analysis_service.analyze_transcript(improved_transcript)
+        # Descarga, transcripción y análisis (responsabilidad: AsyncVideoAnalysisPipeline)
+        result = await async_video_analysis_pipeline.run(
+            data.url,
+            mode=data.mode,
+            transcription_backend=data.transcription_backend
+        )
         
         # Retornar respuesta simplificada
-        return VideoAnalysisResponse(
-            status="success",
-            transcript=improved_transcript,  # Transcript mejorado
-            hook=analysis.get("hook", {}),  # Solo el hook
-            script_base=analysis.get("script_base", "")  # Solo el script base
-        )
+        return VideoAnalysisResponse(status="success", **result)
     
     except HTTPException:
         # Re-lanzar HTTPException sin modificar
         raise
+    except RateLimitExceeded as e:
+        # OpenAI o Deepgram siguen sin cuota: el cliente puede reintentar más tarde
+        raise HTTPException(status_code=503, detail=str(e), headers=_retry_after_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
         # Errores de validación
         raise HTTPException(status_code=400, detail=str(e))
@@ -89,8 +142,236 @@ def analyze_video(data: VideoRequest):
         )
 
 
+@router.get("/analyze/stream")
+async def analyze_video_stream(
+    url: str = Query(..., description="URL del video a analizar"),
+    mode: Optional[str] = Query(None, description="Modo de análisis: two_pass, single_pass o hook_only"),
+    transcription_backend: Optional[str] = Query(None, description="Motor de transcripción: deepgram o local")
+):
+    """
+    Analiza un video y envía el progreso como Server-Sent Events (compatible con EventSource).
+    
+    Eventos, en orden:
+    - downloaded: duración y formato descargado
+    - transcribed: transcript crudo del motor de transcripción
+    - improved: transcript corregido
+    - analyzed: hook y script_base
+    - result: VideoAnalysisResponse completo (con metrics)
+    - error: status_code y detail si algo falla (cierra el stream)
+    
+    Si el video está en caché, o si otra petición lo está analizando en este
+    momento (el resultado se comparte), solo se envía result.
+    
+    Args:
+        url: URL del video
+        mode: Modo de análisis (opcional)
+        transcription_backend: Motor de transcripción (opcional)
+        
+    Returns:
+        StreamingResponse (text/event-stream)
+    """
+    return _analysis_event_stream(url, mode, transcription_backend)
+
+
+@router.post("/analyze/stream")
+async def analyze_video_stream_post(data: VideoRequest):
+    """
+    Igual que GET /video/analyze/stream, con la URL y el modo en el body.
+    
+    Args:
+        data: Request con la URL del video
+        
+    Returns:
+        StreamingResponse (text/event-stream)
+    """
+    return _analysis_event_stream(data.url, data.mode, data.transcription_backend)
+
+
+def _analysis_event_stream(
+    url: str,
+    mode: Optional[str],
+    transcription_backend: Optional[str] = None
+) -> StreamingResponse:
+    """Ejecuta el pipeline async y convierte sus eventos de etapa en SSE."""
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def run_pipeline():
+        try:
+            result = await async_video_analysis_pipeline.run(
+                url,
+                mode=mode,
+                on_event=lambda event, data: events.put_nowait((event, data)),
+                transcription_backend=transcription_backend
+            )
+            response = VideoAnalysisResponse(status="success", **result)
+            events.put_nowait(("result", response.model_dump()))
+        except RateLimitExceeded as e:
+            events.put_nowait(("error", {"status_code": 503, "detail": str(e), "retry_after": e.retry_after}))
+        except DeadlineExceeded as e:
+            events.put_nowait(("error", {"status_code": 504, "detail": str(e)}))
+        except ValueError as e:
+            events.put_nowait(("error", {"status_code": 400, "detail": str(e)}))
+        except Exception as e:
+            events.put_nowait((
+                "error",
+                {"status_code": 500, "detail": f"Error al analizar el video: {str(e)}"}
+            ))
+    
+    async def stream_events():
+        task = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=_SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                
+                yield _sse_event(event, data)
+                if event in ("result", "error"):
+                    break
+        finally:
+            # Si el cliente se desconecta, no seguir gastando en un análisis que nadie va a leer
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Serializa un evento Server-Sent Events con datos JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _retry_after_headers(error: RateLimitExceeded) -> Optional[Dict[str, str]]:
+    """Cabecera Retry-After (segundos enteros) si el proveedor indicó cuánto esperar."""
+    if error.retry_after is None:
+        return None
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+
+@router.post("/analyze/batch")
+async def analyze_video_batch(data: BatchAnalysisRequest):
+    """
+    Analiza varios videos en paralelo y entrega cada resultado apenas termina.
+    
+    La respuesta es NDJSON (una línea JSON por video, en orden de finalización,
+    y una línea final de resumen). Cada línea indica si ese video terminó bien
+    o con error, así que un video fallido no corta el lote. La concurrencia de
+    descarga, transcripción y análisis está limitada por etapa.
+    
+    Args:
+        data: Request con las URLs y el modo de análisis
+        
+    Returns:
+        StreamingResponse (application/x-ndjson) con BatchAnalysisItem por video
+        y un BatchAnalysisSummary al final
+        
+    Raises:
+        HTTPException: Si el lote supera el máximo de URLs, el modo o el motor
+            de transcripción no son válidos
+    """
+    if len(data.urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote admite como máximo {settings.BATCH_MAX_URLS} URLs"
+        )
+    
+    if data.mode and data.mode not in async_video_analysis_pipeline.MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modo de análisis no válido: {data.mode}. Usa: {', '.join(async_video_analysis_pipeline.MODES)}"
+        )
+    
+    if data.transcription_backend and data.transcription_backend not in TRANSCRIPTION_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Motor de transcripción no válido: {data.transcription_backend}. Usa: {', '.join(TRANSCRIPTION_BACKENDS)}"
+        )
+    
+    async def stream_results():
+        async for item in batch_analysis_service.run(
+            data.urls,
+            mode=data.mode,
+            transcription_backend=data.transcription_backend
+        ):
+            model = BatchAnalysisItem(**item) if item["type"] == "item" else BatchAnalysisSummary(**item)
+            yield model.model_dump_json(exclude_none=True) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/jobs", response_model=AnalysisJobSubmitResponse, status_code=202)
+async def submit_analysis_job(data: VideoRequest):
+    """
+    Encola el análisis de un video y retorna inmediatamente el ID del trabajo.
+    
+    El análisis corre en un pool de workers independiente de los workers HTTP.
+    El estado se consulta con GET /video/jobs/{job_id}.
+    
+    Args:
+        data: Request con la URL del video
+        
+    Returns:
+        AnalysisJobSubmitResponse con el ID del trabajo
+        
+    Raises:
+        HTTPException: Si la cola está llena
+    """
+    try:
+        job = analysis_job_queue.submit(
+            data.url,
+            mode=data.mode,
+            transcription_backend=data.transcription_backend
+        )
+        
+        return AnalysisJobSubmitResponse(
+            status="success",
+            job_id=job["id"],
+            job_status=job["status"]
+        )
+    
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobStatusResponse)
+async def get_analysis_job(job_id: str):
+    """
+    Obtiene el estado, la etapa actual y el resultado de un trabajo de análisis.
+    
+    Args:
+        job_id: ID del trabajo retornado por POST /video/jobs
+        
+    Returns:
+        AnalysisJobStatusResponse con el estado del trabajo
+        
+    Raises:
+        HTTPException: Si el trabajo no existe o ya expiró
+    """
+    job = analysis_job_queue.get(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo de análisis no encontrado")
+    
+    result = job.get("result")
+    
+    return AnalysisJobStatusResponse(
+        status="success",
+        job_id=job["id"],
+        job_status=job["status"],
+        stage=job.get("stage"),
+        result=VideoAnalysisResponse(status="success", **result) if result else None,
+        error=job.get("error")
+    )
+
+
 @router.post("/save", response_model=VideoAnalysisSaveResponse)
-def save_video_analysis(data: VideoAnalysisSaveRequest):
+async def save_video_analysis(data: VideoAnalysisSaveRequest):
     """
     Guarda un análisis de video en Supabase.
     
@@ -125,8 +406,8 @@ def save_video_analysis(data: VideoAnalysisSaveRequest):
                 detail="video_url es requerido"
             )
         
-        # Guardar en Supabase (responsabilidad: SupabaseService)
-        saved_analysis = supabase_service.save_video_analysis(
+        # Guardar en Supabase (responsabilidad: AsyncSupabaseService)
+        saved_analysis = await supabase_service.save_video_analysis(
             user_id=data.user_id,
             video_url=data.video_url,
             transcript=data.transcript,
@@ -154,7 +435,7 @@ def save_video_analysis(data: VideoAnalysisSaveRequest):
 
 
 @router.get("/analyses", response_model=VideoAnalysisListResponse)
-def get_video_analyses(
+async def get_video_analyses(
     user_id: str = Query(..., description="ID del usuario"),
     limit: int = Query(50, ge=1, le=100, description="Número máximo de resultados"),
     offset: int = Query(0, ge=0, description="Número de resultados a saltar")
@@ -171,7 +452,7 @@ def get_video_analyses(
         
         user_id = user_id.strip()
         
-        analyses = supabase_service.get_video_analyses(
+        analyses = await supabase_service.get_video_analyses(
             user_id=user_id,
             limit=limit,
             offset=offset
@@ -218,7 +499,7 @@ def get_video_analyses(
 
 
 @router.post("/generate-hooks", response_model=HookGenerationResponse)
-def generate_hooks(data: HookGenerationRequest):
+async def generate_hooks(data: HookGenerationRequest):
     """
     Genera múltiples versiones de hooks basadas en una idea.
     
@@ -244,23 +525,16 @@ def generate_hooks(data: HookGenerationRequest):
                 detail="La idea no puede estar vacía"
             )
         
-        # Generar hooks con ChatGPT (responsabilidad: VideoAnalysisService)
-        hooks_data = video_analysis_service.generate_hooks(
+        # Generar hooks con ChatGPT (responsabilidad: AsyncVideoAnalysisService)
+        hooks_data = await async_video_analysis_service.generate_hooks(
             idea=data.idea,
             nicho=data.nicho,
-            platform=data.platform
+            platform=data.platform,
+            fresh=data.fresh
         )
         
         # Convertir a modelos Pydantic
-        hooks = [
-            GeneratedHook(
-                text=hook.get("text", ""),
-                type=hook.get("type", ""),
-                retention_score=float(hook.get("retention_score", 0)),
-                description=hook.get("description")
-            )
-            for hook in hooks_data
-        ]
+        hooks = [_generated_hook(hook) for hook in hooks_data]
         
         return HookGenerationResponse(
             status="success",
@@ -269,6 +543,10 @@ def generate_hooks(data: HookGenerationRequest):
     
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=_retry_after_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -278,8 +556,75 @@ def generate_hooks(data: HookGenerationRequest):
         )
 
 
+@router.post("/generate-hooks/stream")
+async def generate_hooks_stream(data: HookGenerationRequest):
+    """
+    Genera hooks y los envía como Server-Sent Events a medida que OpenAI los escribe.
+    
+    Eventos:
+    - hook: cada hook apenas está completo (index, text, type, retention_score, description)
+    - done: HookGenerationResponse con todos los hooks ordenados por score
+    - error: status_code y detail si algo falla (cierra el stream)
+    
+    Args:
+        data: Request con la idea y opcionalmente el nicho y plataforma
+        
+    Returns:
+        StreamingResponse (text/event-stream)
+        
+    Raises:
+        HTTPException: Si la idea está vacía
+    """
+    if not data.idea or not data.idea.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="La idea no puede estar vacía"
+        )
+    
+    async def stream_events():
+        hooks = []
+        try:
+            async for hook_data in async_video_analysis_service.stream_hooks(
+                idea=data.idea,
+                nicho=data.nicho,
+                platform=data.platform,
+                fresh=data.fresh
+            ):
+                hook = _generated_hook(hook_data)
+                yield _sse_event("hook", {"index": len(hooks), **hook.model_dump()})
+                hooks.append(hook)
+            
+            hooks.sort(key=lambda hook: hook.retention_score, reverse=True)
+            response = HookGenerationResponse(status="success", hooks=hooks)
+            yield _sse_event("done", response.model_dump())
+        except RateLimitExceeded as e:
+            yield _sse_event("error", {"status_code": 503, "detail": str(e), "retry_after": e.retry_after})
+        except DeadlineExceeded as e:
+            yield _sse_event("error", {"status_code": 504, "detail": str(e)})
+        except ValueError as e:
+            yield _sse_event("error", {"status_code": 400, "detail": str(e)})
+        except Exception as e:
+            yield _sse_event("error", {"status_code": 500, "detail": f"Error al generar hooks: {str(e)}"})
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+
+def _generated_hook(hook: Dict[str, Any]) -> GeneratedHook:
+    """Convierte un hook de OpenAI al modelo de respuesta."""
+    return GeneratedHook(
+        text=hook.get("text", ""),
+        type=hook.get("type", ""),
+        retention_score=float(hook.get("retention_score", 0)),
+        description=hook.get("description")
+    )
+
+
 @router.post("/save-hook", response_model=ViralHookSaveResponse)
-def save_viral_hook(data: ViralHookSaveRequest):
+async def save_viral_hook(data: ViralHookSaveRequest):
     """
     Guarda un hook viral en Supabase.
     
@@ -300,7 +645,7 @@ def save_viral_hook(data: ViralHookSaveRequest):
         if not data.hook_text:
             raise HTTPException(status_code=400, detail="hook_text es requerido")
         
-        saved_hook = supabase_service.save_viral_hook(
+        saved_hook = await supabase_service.save_viral_hook(
             user_id=data.user_id,
             idea_input=data.idea_input,
             hook_text=data.hook_text,
@@ -327,7 +672,7 @@ def save_viral_hook(data: ViralHookSaveRequest):
 
 
 @router.get("/hooks", response_model=ViralHookListResponse)
-def get_viral_hooks(
+async def get_viral_hooks(
     user_id: str = Query(..., description="ID del usuario"),
     limit: int = Query(50, ge=1, le=100, description="Número máximo de resultados"),
     offset: int = Query(0, ge=0, description="Número de resultados a saltar")
@@ -339,7 +684,7 @@ def get_viral_hooks(
         if not user_id:
             raise HTTPException(status_code=400, detail="user_id es requerido")
         
-        hooks = supabase_service.get_viral_hooks(
+        hooks = await supabase_service.get_viral_hooks(
             user_id=user_id.strip(),
             limit=limit,
             offset=offset
@@ -1,14 +1,64 @@
 from .video_downloader import VideoDownloader
-from .transcription_service import TranscriptionService
-from .video_analysis_service import VideoAnalysisService
-from .supabase_service import SupabaseService
-from .auth_service import AuthService
+from .transcription_service import TranscriptionService, AsyncTranscriptionService
+from .video_analysis_service import VideoAnalysisService, AsyncVideoAnalysisService
+from .supabase_service import SupabaseService, AsyncSupabaseService
+from .auth_service import AuthService, AsyncAuthService
+from .video_analysis_pipeline import VideoAnalysisPipeline, AsyncVideoAnalysisPipeline
+from .analysis_job_queue import AnalysisJobQueue, QueueFullError
+from .video_url_canonicalizer import VideoUrlCanonicalizer
+from .video_result_cache import VideoResultCache
+from .audio_fingerprint import AudioFingerprintIndex
+from .completion_cache import CompletionCache
+from .http_pool import HttpClientPool, get_http_pool
+from .stage_limiter import StageLimiter
+from .batch_analysis_service import BatchAnalysisService
+from .live_transcription import DeepgramLiveTranscriber
+from .single_flight import SingleFlight, AsyncSingleFlight
+from .model_router import ModelRouter, ContextWindowExceeded
+from .hedging import Hedger, DeadlineExceeded, get_hedger
+from .rate_limiter import ProviderRateLimiter, RateLimitExceeded, get_rate_limiter
+from .metrics import Metrics, MetricsMiddleware, get_metrics
+from .transcription_backends import TranscriptionBackend, DeepgramBackend, LocalWhisperBackend, create_backend
 
 __all__ = [
     "VideoDownloader",
     "TranscriptionService",
+    "AsyncTranscriptionService",
     "VideoAnalysisService",
+    "AsyncVideoAnalysisService",
     "SupabaseService",
+    "AsyncSupabaseService",
     "AuthService",
+    "AsyncAuthService",
+    "VideoAnalysisPipeline",
+    "AsyncVideoAnalysisPipeline",
+    "AnalysisJobQueue",
+    "QueueFullError",
+    "VideoUrlCanonicalizer",
+    "VideoResultCache",
+    "AudioFingerprintIndex",
+    "CompletionCache",
+    "HttpClientPool",
+    "get_http_pool",
+    "StageLimiter",
+    "BatchAnalysisService",
+    "DeepgramLiveTranscriber",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "ModelRouter",
+    "ContextWindowExceeded",
+    "Hedger",
+    "DeadlineExceeded",
+    "get_hedger",
+    "ProviderRateLimiter",
+    "RateLimitExceeded",
+    "get_rate_limiter",
+    "Metrics",
+    "MetricsMiddleware",
+    "get_metrics",
+    "TranscriptionBackend",
+    "DeepgramBackend",
+    "LocalWhisperBackend",
+    "create_backend",
 ]
 
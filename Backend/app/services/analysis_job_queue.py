@@ -0,0 +1,179 @@
+"""
+Cola de trabajos de análisis de videos.
+Responsabilidad única: Ejecutar análisis en un pool acotado de workers,
+independiente de los workers HTTP, y exponer su estado para consulta.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.services.video_analysis_pipeline import VideoAnalysisPipeline
+
+
+class QueueFullError(Exception):
+    """Se lanza cuando la cola no admite más trabajos pendientes."""
+
+
+class AnalysisJobQueue:
+    """Cola acotada de trabajos de análisis ejecutados por un pool de workers."""
+
+    def __init__(
+        self,
+        pipeline: VideoAnalysisPipeline,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        job_ttl_seconds: Optional[int] = None
+    ):
+        """
+        Inicializa la cola y el pool de workers.
+
+        Args:
+            pipeline: Pipeline que ejecuta las etapas de análisis
+            max_workers: Número de análisis simultáneos (opcional, usa settings)
+            max_pending: Trabajos en espera admitidos además de los que corren (opcional, usa settings)
+            job_ttl_seconds: Tiempo que se conserva un trabajo terminado (opcional, usa settings)
+        """
+        self.pipeline = pipeline
+        self.max_workers = max_workers or settings.ANALYSIS_WORKERS
+        self.max_pending = max_pending if max_pending is not None else settings.ANALYSIS_QUEUE_SIZE
+        self.job_ttl_seconds = job_ttl_seconds or settings.ANALYSIS_JOB_TTL_SECONDS
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="analysis-worker"
+        )
+        # Limita trabajos en ejecución + en espera para no crecer sin control
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        url: str,
+        mode: Optional[str] = None,
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Encola el análisis de un video.
+
+        Args:
+            url: URL del video a analizar
+            mode: Modo de análisis (opcional, usa settings.ANALYSIS_MODE)
+            transcription_backend: Motor de transcripción (opcional, usa
+                settings.TRANSCRIPTION_BACKEND)
+
+        Returns:
+            Copia del estado inicial del trabajo
+
+        Raises:
+            QueueFullError: Si la cola está llena
+        """
+        self._purge_expired()
+
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("La cola de análisis está llena, intenta más tarde")
+
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "url": url,
+            "mode": mode,
+            "transcription_backend": transcription_backend,
+            "status": "queued",
+            "stage": None,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+
+        try:
+            self._executor.submit(self._run_job, job_id)
+        except RuntimeError:
+            # El executor ya se cerró (apagado del servidor)
+            self._slots.release()
+            self._update(job_id, status="failed", error="El servidor se está apagando")
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el estado de un trabajo.
+
+        Args:
+            job_id: ID del trabajo
+
+        Returns:
+            Copia del estado del trabajo o None si no existe
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna los workers del pool y los trabajos en ejecución y en espera."""
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+        return {
+            "workers": self.max_workers,
+            "running": statuses.count("running"),
+            "queued": statuses.count("queued"),
+        }
+
+    def shutdown(self) -> None:
+        """Detiene el pool esperando a que terminen los trabajos en curso."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run_job(self, job_id: str) -> None:
+        """Ejecuta un trabajo en un worker y registra su resultado."""
+        try:
+            job = self.get(job_id)
+            if not job:
+                return
+
+            self._update(job_id, status="running")
+
+            try:
+                result = self.pipeline.run(
+                    job["url"],
+                    mode=job["mode"],
+                    on_stage=lambda stage: self._update(job_id, stage=stage),
+                    transcription_backend=job["transcription_backend"]
+                )
+                self._update(job_id, status="completed", stage="completed", result=result)
+            except ValueError as e:
+                self._update(job_id, status="failed", error=str(e))
+            except Exception as e:
+                self._update(
+                    job_id,
+                    status="failed",
+                    error=f"Error al analizar el video: {str(e)}"
+                )
+        finally:
+            self._slots.release()
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        """Actualiza campos de un trabajo de forma segura entre hilos."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+                job["updated_at"] = time.time()
+
+    def _purge_expired(self) -> None:
+        """Elimina los trabajos terminados que superaron su TTL."""
+        cutoff = time.time() - self.job_ttl_seconds
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job["status"] in ("completed", "failed") and job["updated_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
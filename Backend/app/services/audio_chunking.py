@@ -0,0 +1,167 @@
+"""
+Segmentación de audio largo para transcribir en paralelo.
+Responsabilidad única: Cortar un WAV en segmentos de tamaño fijo por puntos de
+silencio y volver a unir las transcripciones de cada segmento en una sola.
+
+Cada corte se busca cerca del múltiplo de `chunk_seconds` correspondiente, en
+el frame de menor energía, para no partir palabras. Los segmentos se solapan
+`overlap_seconds` a cada lado del corte; al unirlos, cada palabra se asigna al
+segmento de su lado del corte (según su punto medio), así que las palabras del
+solape no se duplican.
+"""
+import wave
+from typing import Dict, Any, List
+import numpy as np
+
+
+# Tamaño del frame usado para medir la energía al buscar silencios
+_ENERGY_FRAME_SECONDS = 0.02
+
+
+def wav_duration(audio_path: str) -> float:
+    """Duración de un WAV en segundos."""
+    with wave.open(audio_path, "rb") as wav_file:
+        return wav_file.getnframes() / float(wav_file.getframerate())
+
+
+def plan_segments(
+    audio_path: str,
+    chunk_seconds: float,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 10.0
+) -> List[Dict[str, float]]:
+    """
+    Calcula los segmentos de un WAV cortando en silencios.
+
+    Solo se leen las ventanas de búsqueda alrededor de cada corte, no el audio
+    completo. La ventana se limita a medio chunk a cada lado, así que cada
+    corte queda al menos medio chunk después del anterior. El último segmento
+    absorbe un resto menor a medio chunk.
+
+    Args:
+        audio_path: Ruta del WAV (PCM 16 bits mono)
+        chunk_seconds: Duración objetivo de cada segmento
+        overlap_seconds: Audio extra a cada lado de un corte
+        search_seconds: Distancia máxima del corte al múltiplo de chunk_seconds
+            (como mucho chunk_seconds / 2)
+
+    Returns:
+        Lista de segmentos con start/end (audio que se transcribe, con solape)
+        y keep_from/keep_until (tramo del transcript final que le corresponde)
+    """
+    if chunk_seconds <= 0:
+        raise ValueError("chunk_seconds debe ser mayor que 0")
+    search_seconds = min(search_seconds, chunk_seconds / 2)
+
+    with wave.open(audio_path, "rb") as wav_file:
+        sample_rate = wav_file.getframerate()
+        total_frames = wav_file.getnframes()
+        duration = total_frames / float(sample_rate)
+
+        cuts: List[float] = []
+        target = chunk_seconds
+        while duration - target > chunk_seconds / 2:
+            cuts.append(_quietest_point(wav_file, sample_rate, total_frames, target, search_seconds))
+            target = cuts[-1] + chunk_seconds
+
+    bounds = [0.0, *cuts, duration]
+    return [
+        {
+            "start": max(0.0, keep_from - overlap_seconds) if index > 0 else 0.0,
+            "end": min(duration, keep_until + overlap_seconds),
+            "keep_from": keep_from,
+            "keep_until": keep_until,
+        }
+        for index, (keep_from, keep_until) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def write_segment(audio_path: str, segment: Dict[str, float], output_path: str) -> str:
+    """
+    Copia el tramo start-end de un WAV a otro archivo WAV.
+
+    Args:
+        audio_path: WAV de origen
+        segment: Segmento de plan_segments
+        output_path: Ruta del WAV a crear
+
+    Returns:
+        output_path
+    """
+    with wave.open(audio_path, "rb") as source:
+        sample_rate = source.getframerate()
+        start_frame = int(segment["start"] * sample_rate)
+        end_frame = min(source.getnframes(), int(segment["end"] * sample_rate))
+        source.setpos(start_frame)
+        frames = source.readframes(end_frame - start_frame)
+
+        with wave.open(output_path, "wb") as target:
+            target.setnchannels(source.getnchannels())
+            target.setsampwidth(source.getsampwidth())
+            target.setframerate(sample_rate)
+            target.writeframes(frames)
+
+    return output_path
+
+
+def stitch_transcripts(segments: List[Dict[str, float]], results: List[Dict[str, Any]]) -> str:
+    """
+    Une las transcripciones de los segmentos en una sola.
+
+    Las marcas de tiempo de cada palabra se desplazan por el inicio de su
+    segmento; de cada segmento se conservan solo las palabras cuyo punto medio
+    cae en su tramo keep_from-keep_until, lo que elimina los duplicados del
+    solape. Si un segmento no trae palabras, se usa su texto completo.
+
+    Args:
+        segments: Segmentos de plan_segments
+        results: Por segmento, diccionario con transcript y words (de Deepgram)
+
+    Returns:
+        Transcripción completa
+    """
+    parts: List[str] = []
+    for index, (segment, result) in enumerate(zip(segments, results)):
+        words = result.get("words") or []
+        if not words:
+            if result.get("transcript"):
+                parts.append(result["transcript"].strip())
+            continue
+
+        # El último segmento conserva todo hasta el final (los tiempos pueden redondearse hacia arriba)
+        keep_until = float("inf") if index == len(segments) - 1 else segment["keep_until"]
+        kept = []
+        for word in words:
+            midpoint = segment["start"] + (word.get("start", 0.0) + word.get("end", 0.0)) / 2
+            if segment["keep_from"] <= midpoint < keep_until:
+                kept.append(word.get("punctuated_word") or word.get("word", ""))
+        if kept:
+            parts.append(" ".join(kept))
+
+    return " ".join(part for part in parts if part)
+
+
+def _quietest_point(
+    wav_file: wave.Wave_read,
+    sample_rate: int,
+    total_frames: int,
+    target: float,
+    search_seconds: float
+) -> float:
+    """Segundo de menor energía en target ± search_seconds."""
+    window_start = max(0, int((target - search_seconds) * sample_rate))
+    window_end = min(total_frames, int((target + search_seconds) * sample_rate))
+    wav_file.setpos(window_start)
+    samples = np.frombuffer(wav_file.readframes(window_end - window_start), dtype=np.int16)
+
+    frame_size = max(1, int(_ENERGY_FRAME_SECONDS * sample_rate))
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return target
+
+    frames = samples[:frame_count * frame_size].astype(np.float32).reshape(frame_count, frame_size)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    # A igual energía, el frame más cercano al objetivo
+    distance = np.abs(np.arange(frame_count) - (target * sample_rate - window_start) / frame_size)
+    quietest = int(np.lexsort((distance, np.round(energy, 1)))[0])
+    return (window_start + (quietest + 0.5) * frame_size) / float(sample_rate)
@@ -0,0 +1,287 @@
+"""
+Huella acústica de audio e índice de transcripciones.
+Responsabilidad única: Reconocer audio casi idéntico (re-subidas del mismo clip)
+para reutilizar su transcripción sin volver a pagar a Deepgram.
+
+La huella sigue el esquema de Haitsma-Kalker (el mismo que usa chromaprint):
+por cada frame se calcula la energía en 33 bandas logarítmicas entre 300 y
+2000 Hz, y cada uno de los 32 bits indica el signo de la diferencia de energía
+entre bandas vecinas respecto del frame anterior. El resultado es un entero de
+32 bits por frame (~31 frames por segundo), robusto a cambios de volumen y
+recompresión.
+"""
+import os
+import sqlite3
+import threading
+import time
+import wave
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 4096  # 256 ms
+HOP_SIZE = 512  # 32 ms
+_BAND_EDGES = np.geomspace(300, 2000, 34)
+_BIT_WEIGHTS = (1 << np.arange(32, dtype=np.uint64))
+# Sub-huellas de frames en silencio: coinciden con cualquier audio, no sirven para buscar
+_IGNORED_HASHES = {0, 0xFFFFFFFF}
+
+
+def read_wav_samples(audio_path: str, max_seconds: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    """
+    Lee las muestras de un WAV PCM de 16 bits mono.
+
+    Args:
+        audio_path: Ruta del archivo WAV
+        max_seconds: Segundos iniciales a leer (opcional, lee todo)
+
+    Returns:
+        Tupla (muestras float32 normalizadas, duración total en segundos)
+    """
+    with wave.open(audio_path, "rb") as wav_file:
+        sample_rate = wav_file.getframerate()
+        total_frames = wav_file.getnframes()
+        frames_to_read = total_frames
+        if max_seconds is not None:
+            frames_to_read = min(total_frames, int(max_seconds * sample_rate))
+        raw = wav_file.readframes(frames_to_read)
+
+    samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    return samples, total_frames / float(sample_rate)
+
+
+def compute_fingerprint(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Calcula la huella acústica de un audio mono.
+
+    Args:
+        samples: Muestras mono (float)
+        sample_rate: Frecuencia de muestreo de las muestras
+
+    Returns:
+        Array uint32 con una sub-huella por frame (vacío si el audio es muy corto)
+    """
+    if len(samples) < FRAME_SIZE + HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1)) ** 2
+
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1.0 / sample_rate)
+    band_of_bin = np.digitize(freqs, _BAND_EDGES) - 1
+    energies = np.stack(
+        [spectrum[:, band_of_bin == band].sum(axis=1) for band in range(len(_BAND_EDGES) - 1)],
+        axis=1
+    )
+
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    return (bits.astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1).astype(np.uint32)
+
+
+def bit_error_rate(query: np.ndarray, reference: np.ndarray, offset: int) -> Tuple[float, int]:
+    """
+    Calcula la tasa de bits distintos entre dos huellas alineadas.
+
+    Args:
+        query: Huella consultada
+        reference: Huella guardada
+        offset: Desplazamiento en frames (query[i] se compara con reference[i + offset])
+
+    Returns:
+        Tupla (tasa de error entre 0 y 1, número de frames comparados)
+    """
+    query_start = max(0, -offset)
+    reference_start = max(0, offset)
+    overlap = min(len(query) - query_start, len(reference) - reference_start)
+    if overlap <= 0:
+        return 1.0, 0
+
+    diff = np.bitwise_xor(
+        query[query_start:query_start + overlap],
+        reference[reference_start:reference_start + overlap]
+    )
+    errors = int(np.unpackbits(diff.view(np.uint8)).sum())
+    return errors / (32.0 * overlap), overlap
+
+
+class AudioFingerprintIndex:
+    """Índice local (SQLite) de huellas acústicas con su transcripción."""
+
+    # Candidatos (entrada, desplazamiento) que se verifican con la huella completa
+    MAX_CANDIDATES = 5
+    # Tamaño de lote para consultas IN (...) en SQLite
+    _QUERY_BATCH = 500
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bit_error_rate: Optional[float] = None,
+        max_duration_delta: Optional[float] = None
+    ):
+        """
+        Inicializa el índice y crea las tablas si no existen.
+
+        Args:
+            path: Ruta del archivo SQLite (opcional, usa settings.CACHE_DIR)
+            max_entries: Máximo de huellas guardadas; se expulsan las menos usadas (opcional, usa settings)
+            max_bit_error_rate: Tasa de error máxima para considerar dos audios iguales (opcional, usa settings)
+            max_duration_delta: Diferencia máxima de duración en segundos (opcional, usa settings)
+        """
+        self.enabled = settings.FINGERPRINT_CACHE_ENABLED
+        self.path = path or os.path.join(settings.CACHE_DIR, "audio_fingerprints.sqlite3")
+        self.max_entries = max_entries or settings.FINGERPRINT_MAX_ENTRIES
+        self.max_bit_error_rate = max_bit_error_rate or settings.FINGERPRINT_MAX_BIT_ERROR_RATE
+        self.max_duration_delta = max_duration_delta or settings.FINGERPRINT_MAX_DURATION_DELTA
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS fingerprints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint BLOB NOT NULL,
+                duration REAL NOT NULL,
+                transcript TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS fingerprint_hashes (
+                hash INTEGER NOT NULL,
+                entry_id INTEGER NOT NULL,
+                frame INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fingerprint_hashes_hash ON fingerprint_hashes (hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fingerprint_hashes_entry ON fingerprint_hashes (entry_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fingerprints_last_access ON fingerprints (last_access)")
+
+    def lookup(self, fingerprint: np.ndarray, duration: float) -> Optional[str]:
+        """
+        Busca una transcripción guardada para un audio casi idéntico.
+
+        Args:
+            fingerprint: Huella del audio consultado
+            duration: Duración total del audio en segundos
+
+        Returns:
+            Transcripción guardada o None si no hay coincidencia
+        """
+        if not self.enabled or len(fingerprint) == 0:
+            return None
+
+        # Posiciones de cada sub-huella en la consulta
+        positions: Dict[int, list] = {}
+        for frame, value in enumerate(fingerprint.tolist()):
+            if value not in _IGNORED_HASHES:
+                positions.setdefault(value, []).append(frame)
+
+        with self._lock:
+            # Votar (entrada, desplazamiento) por cada sub-huella que coincide exactamente
+            votes: Counter = Counter()
+            values = list(positions)
+            for start in range(0, len(values), self._QUERY_BATCH):
+                batch = values[start:start + self._QUERY_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT hash, entry_id, frame FROM fingerprint_hashes "
+                    f"WHERE hash IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for value, entry_id, frame in rows:
+                    for query_frame in positions[value]:
+                        votes[(entry_id, frame - query_frame)] += 1
+
+            # Verificar los mejores candidatos con la huella completa
+            for (entry_id, offset), _ in votes.most_common(self.MAX_CANDIDATES):
+                row = self._conn.execute(
+                    "SELECT fingerprint, duration, transcript FROM fingerprints WHERE id = ?",
+                    (entry_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+
+                stored, stored_duration, transcript = row
+                if abs(stored_duration - duration) > self.max_duration_delta:
+                    continue
+
+                reference = np.frombuffer(stored, dtype=np.uint32)
+                error_rate, overlap = bit_error_rate(fingerprint, reference, offset)
+                if overlap >= min(len(fingerprint), len(reference)) // 2 and error_rate <= self.max_bit_error_rate:
+                    self._conn.execute(
+                        "UPDATE fingerprints SET last_access = ? WHERE id = ?",
+                        (time.time(), entry_id)
+                    )
+                    self.hits += 1
+                    return transcript
+
+            self.misses += 1
+            return None
+
+    def add(self, fingerprint: np.ndarray, duration: float, transcript: str) -> None:
+        """
+        Guarda la huella de un audio con su transcripción.
+
+        Args:
+            fingerprint: Huella del audio
+            duration: Duración total del audio en segundos
+            transcript: Transcripción de Deepgram
+        """
+        if not self.enabled or len(fingerprint) == 0 or not transcript:
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO fingerprints (fingerprint, duration, transcript, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (fingerprint.astype(np.uint32).tobytes(), duration, transcript, time.time())
+                )
+                entry_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO fingerprint_hashes (hash, entry_id, frame) VALUES (?, ?, ?)",
+                    [
+                        (value, entry_id, frame)
+                        for frame, value in enumerate(fingerprint.tolist())
+                        if value not in _IGNORED_HASHES
+                    ]
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna aciertos, fallos y número de huellas guardadas."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def _evict(self) -> None:
+        """Expulsa las huellas de acceso más antiguo cuando se supera el máximo (LRU)."""
+        count = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        evicted = [
+            (row[0],)
+            for row in self._conn.execute(
+                "SELECT id FROM fingerprints ORDER BY last_access ASC LIMIT ?",
+                (overflow,)
+            ).fetchall()
+        ]
+        self._conn.executemany("DELETE FROM fingerprint_hashes WHERE entry_id = ?", evicted)
+        self._conn.executemany("DELETE FROM fingerprints WHERE id = ?", evicted)
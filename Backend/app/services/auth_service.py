@@ -2,27 +2,36 @@
 Servicio de autenticación con Supabase.
 Responsabilidad única: Manejar todas las operaciones de autenticación.
 """
+import asyncio
 from typing import Dict, Any, Optional
-from supabase import create_client, Client
+import jwt
+from supabase import create_client, acreate_client, Client, AsyncClient
+from supabase.lib.client_options import SyncClientOptions, AsyncClientOptions
 from app.config import settings
+from app.services.http_pool import HttpClientPool, get_http_pool
+from app.services.metrics import get_metrics
 
 
 class AuthService:
     """Servicio para operaciones de autenticación con Supabase."""
     
-    def __init__(self):
-        """Inicializa el cliente de Supabase para autenticación."""
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        """
+        Inicializa el cliente de Supabase para autenticación.
+        
+        Args:
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+        """
         if not settings.SUPABASE_URL:
             raise ValueError("SUPABASE_URL no está configurado")
         if not settings.SUPABASE_KEY:
             raise ValueError("SUPABASE_KEY no está configurado")
         
+        self.http_pool = http_pool or get_http_pool()
+        
         # Para autenticación usamos la anon key (no service key)
         # porque necesitamos que RLS funcione correctamente
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+        self.client: Client = self._create_client()
     
     def sign_up(
         self,
@@ -61,26 +70,10 @@ class AuthService:
             if full_name:
                 self._update_user_profile(user_id, full_name=full_name)
             
-            return {
-                "user": {
-                    "id": user_id,
-                    "email": response.user.email,
-                },
-                "session": {
-                    "access_token": response.session.access_token if response.session else None,
-                    "refresh_token": response.session.refresh_token if response.session else None,
-                }
-            }
+            return self._sign_up_result(response)
             
         except Exception as e:
-            error_message = str(e)
-            # Mejorar mensajes de error comunes
-            if "User already registered" in error_message or "already registered" in error_message.lower():
-                raise Exception("El usuario ya está registrado con este email")
-            elif "Password" in error_message or "password" in error_message:
-                raise Exception("La contraseña no cumple con los requisitos mínimos")
-            else:
-                raise Exception(f"Error al registrar usuario: {error_message}")
+            raise self._sign_up_error(e)
     
     def sign_in(self, email: str, password: str) -> Dict[str, Any]:
         """
@@ -105,23 +98,10 @@ class AuthService:
             if not response.user:
                 raise Exception("Credenciales inválidas")
             
-            return {
-                "user": {
-                    "id": response.user.id,
-                    "email": response.user.email,
-                },
-                "session": {
-                    "access_token": response.session.access_token,
-                    "refresh_token": response.session.refresh_token,
-                }
-            }
+            return self._sign_in_result(response)
             
         except Exception as e:
-            error_message = str(e)
-            if "Invalid login credentials" in error_message or "invalid" in error_message.lower():
-                raise Exception("Email o contraseña incorrectos")
-            else:
-                raise Exception(f"Error al iniciar sesión: {error_message}")
+            raise self._sign_in_error(e)
     
     def get_user(self, access_token: str, refresh_token: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -143,10 +123,7 @@ class AuthService:
         try:
             # Si tenemos refresh_token, usar API oficial de Supabase
             if refresh_token:
-                temp_client = create_client(
-                    settings.SUPABASE_URL,
-                    settings.SUPABASE_KEY
-                )
+                temp_client = self._create_client()
                 temp_client.auth.set_session(
                     access_token=access_token,
                     refresh_token=refresh_token
@@ -163,23 +140,7 @@ class AuthService:
                 }
             
             # Si no hay refresh_token, decodificar JWT directamente (práctica estándar)
-            import jwt
-            
-            decoded_token = jwt.decode(
-                access_token,
-                options={"verify_signature": False}
-            )
-            
-            user_id = decoded_token.get("sub")
-            email = decoded_token.get("email", "")
-            
-            if not user_id:
-                raise Exception("Token inválido: no se encontró user_id en el token")
-            
-            return {
-                "id": user_id,
-                "email": email,
-            }
+            return self._decode_user(access_token)
             
         except jwt.DecodeError:
             raise Exception("Token inválido: no se pudo decodificar el token")
@@ -198,10 +159,7 @@ class AuthService:
         """
         try:
             # Crear cliente temporal con el token
-            temp_client = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
-            )
+            temp_client = self._create_client()
             temp_client.auth.set_session(
                 access_token=access_token,
                 refresh_token=""
@@ -211,6 +169,87 @@ class AuthService:
         except Exception:
             return False
     
+    def _create_client(self) -> Client:
+        """
+        Crea un cliente de Supabase con la anon key (método privado).
+        
+        Todos los clientes comparten el pool HTTP del proceso, así que los
+        clientes temporales no abren conexiones nuevas.
+        """
+        return create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=SyncClientOptions(httpx_client=self.http_pool.httpx_client())
+        )
+    
+    @staticmethod
+    def _sign_up_result(response: Any) -> Dict[str, Any]:
+        """Datos del usuario y sesión tras el registro (la sesión puede no existir)."""
+        return {
+            "user": {
+                "id": response.user.id,
+                "email": response.user.email,
+            },
+            "session": {
+                "access_token": response.session.access_token if response.session else None,
+                "refresh_token": response.session.refresh_token if response.session else None,
+            }
+        }
+    
+    @staticmethod
+    def _sign_in_result(response: Any) -> Dict[str, Any]:
+        """Datos del usuario y sesión tras iniciar sesión."""
+        return {
+            "user": {
+                "id": response.user.id,
+                "email": response.user.email,
+            },
+            "session": {
+                "access_token": response.session.access_token,
+                "refresh_token": response.session.refresh_token,
+            }
+        }
+    
+    @staticmethod
+    def _sign_up_error(error: Exception) -> Exception:
+        """Traduce un error de registro a un mensaje claro."""
+        error_message = str(error)
+        # Mejorar mensajes de error comunes
+        if "User already registered" in error_message or "already registered" in error_message.lower():
+            return Exception("El usuario ya está registrado con este email")
+        elif "Password" in error_message or "password" in error_message:
+            return Exception("La contraseña no cumple con los requisitos mínimos")
+        else:
+            return Exception(f"Error al registrar usuario: {error_message}")
+    
+    @staticmethod
+    def _sign_in_error(error: Exception) -> Exception:
+        """Traduce un error de inicio de sesión a un mensaje claro."""
+        error_message = str(error)
+        if "Invalid login credentials" in error_message or "invalid" in error_message.lower():
+            return Exception("Email o contraseña incorrectos")
+        else:
+            return Exception(f"Error al iniciar sesión: {error_message}")
+    
+    @staticmethod
+    def _decode_user(access_token: str) -> Dict[str, Any]:
+        """Obtiene id y email del usuario decodificando el JWT."""
+        decoded_token = jwt.decode(
+            access_token,
+            options={"verify_signature": False}
+        )
+        
+        user_id = decoded_token.get("sub")
+        email = decoded_token.get("email", "")
+        
+        if not user_id:
+            raise Exception("Token inválido: no se encontró user_id en el token")
+        
+        return {
+            "id": user_id,
+            "email": email,
+        }
+    
     def _update_user_profile(
         self,
         user_id: str,
@@ -227,11 +266,165 @@ class AuthService:
             if full_name:
                 # Usar service key para actualizar perfil desde el backend
                 from app.services.supabase_service import SupabaseService
-                supabase_service = SupabaseService()
-                supabase_service.client.table("user_profiles").update({
-                    "full_name": full_name
-                }).eq("id", user_id).execute()
+                supabase_service = SupabaseService(http_pool=self.http_pool)
+                with get_metrics().time_stage("supabase", "update_user_profiles"):
+                    supabase_service.client.table("user_profiles").update({
+                        "full_name": full_name
+                    }).eq("id", user_id).execute()
         except Exception:
             # Si falla, no es crítico, el perfil ya existe por el trigger
             pass
 
+
+class AsyncAuthService(AuthService):
+    """
+    Variante async de AuthService (AsyncClient de supabase-py).
+    
+    El cliente se crea en el primer uso (acreate_client es async) sobre el
+    httpx.AsyncClient compartido del pool HTTP.
+    """
+    
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        """
+        Prepara el servicio; el cliente de Supabase se crea en el primer uso.
+        
+        Args:
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+        """
+        if not settings.SUPABASE_URL:
+            raise ValueError("SUPABASE_URL no está configurado")
+        if not settings.SUPABASE_KEY:
+            raise ValueError("SUPABASE_KEY no está configurado")
+        
+        self.http_pool = http_pool or get_http_pool()
+        self._client: Optional[AsyncClient] = None
+        self._client_http = None
+        self._client_lock = asyncio.Lock()
+        self._profile_service = None
+    
+    async def get_client(self) -> AsyncClient:
+        """
+        Retorna el cliente async de Supabase (anon key), creándolo si hace falta.
+        
+        Se vuelve a crear si el pool HTTP cerró su cliente (p. ej. al reiniciar la app).
+        """
+        http_client = self.http_pool.async_httpx_client()
+        if self._client is None or self._client_http is not http_client:
+            async with self._client_lock:
+                if self._client is None or self._client_http is not http_client:
+                    self._client = await self._create_async_client()
+                    self._client_http = http_client
+        return self._client
+    
+    async def sign_up(
+        self,
+        email: str,
+        password: str,
+        full_name: str
+    ) -> Dict[str, Any]:
+        """Versión async de AuthService.sign_up."""
+        try:
+            client = await self.get_client()
+            response = await client.auth.sign_up({
+                "email": email,
+                "password": password,
+            })
+            
+            if not response.user:
+                raise Exception("No se pudo crear el usuario")
+            
+            # El trigger automáticamente crea el perfil en user_profiles
+            # Actualizamos el perfil con el nombre completo
+            if full_name:
+                await self._update_user_profile(response.user.id, full_name=full_name)
+            
+            return self._sign_up_result(response)
+            
+        except Exception as e:
+            raise self._sign_up_error(e)
+    
+    async def sign_in(self, email: str, password: str) -> Dict[str, Any]:
+        """Versión async de AuthService.sign_in."""
+        try:
+            client = await self.get_client()
+            response = await client.auth.sign_in_with_password({
+                "email": email,
+                "password": password,
+            })
+            
+            if not response.user:
+                raise Exception("Credenciales inválidas")
+            
+            return self._sign_in_result(response)
+            
+        except Exception as e:
+            raise self._sign_in_error(e)
+    
+    async def get_user(self, access_token: str, refresh_token: Optional[str] = None) -> Dict[str, Any]:
+        """Versión async de AuthService.get_user."""
+        try:
+            if refresh_token:
+                temp_client = await self._create_async_client()
+                await temp_client.auth.set_session(
+                    access_token=access_token,
+                    refresh_token=refresh_token
+                )
+                
+                user_response = await temp_client.auth.get_user(access_token)
+                
+                if not user_response or not user_response.user:
+                    raise Exception("Token inválido")
+                
+                return {
+                    "id": user_response.user.id,
+                    "email": user_response.user.email,
+                }
+            
+            return self._decode_user(access_token)
+            
+        except jwt.DecodeError:
+            raise Exception("Token inválido: no se pudo decodificar el token")
+        except Exception as e:
+            raise Exception(f"Error al obtener usuario: {str(e)}")
+    
+    async def sign_out(self, access_token: str) -> bool:
+        """Versión async de AuthService.sign_out."""
+        try:
+            temp_client = await self._create_async_client()
+            await temp_client.auth.set_session(
+                access_token=access_token,
+                refresh_token=""
+            )
+            await temp_client.auth.sign_out()
+            return True
+        except Exception:
+            return False
+    
+    async def _create_async_client(self) -> AsyncClient:
+        """Crea un cliente async de Supabase con la anon key (método privado)."""
+        return await acreate_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=AsyncClientOptions(httpx_client=self.http_pool.async_httpx_client())
+        )
+    
+    async def _update_user_profile(
+        self,
+        user_id: str,
+        full_name: str
+    ) -> None:
+        """Versión async de AuthService._update_user_profile."""
+        try:
+            if full_name:
+                # Usar service key para actualizar perfil desde el backend
+                if self._profile_service is None:
+                    from app.services.supabase_service import AsyncSupabaseService
+                    self._profile_service = AsyncSupabaseService(http_pool=self.http_pool)
+                client = await self._profile_service.get_client()
+                with get_metrics().time_stage("supabase", "update_user_profiles"):
+                    await client.table("user_profiles").update({
+                        "full_name": full_name
+                    }).eq("id", user_id).execute()
+        except Exception:
+            # Si falla, no es crítico, el perfil ya existe por el trigger
+            pass
@@ -0,0 +1,108 @@
+"""
+Análisis de videos en lote.
+Responsabilidad única: Repartir N videos entre las etapas del pipeline con
+concurrencia acotada y entregar cada resultado apenas termina.
+"""
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, AsyncIterator
+from app.services.video_analysis_pipeline import AsyncVideoAnalysisPipeline
+from app.services.stage_limiter import StageLimiter
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.hedging import DeadlineExceeded
+
+
+class BatchAnalysisService:
+    """Ejecuta el pipeline async sobre varios videos en paralelo."""
+
+    def __init__(self, pipeline: AsyncVideoAnalysisPipeline, limiter: Optional[StageLimiter] = None):
+        """
+        Inicializa el servicio de lotes.
+
+        Args:
+            pipeline: Pipeline async de análisis
+            limiter: Límites por etapa compartidos por todos los lotes
+                (opcional, usa los de settings)
+        """
+        self.pipeline = pipeline
+        self.limiter = limiter or StageLimiter()
+
+    async def run(
+        self,
+        urls: List[str],
+        mode: Optional[str] = None,
+        transcription_backend: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analiza todos los videos en paralelo y entrega cada resultado al terminar.
+
+        Todos los videos arrancan a la vez; los límites por etapa deciden cuántos
+        descargan, transcriben o llaman a OpenAI simultáneamente, así que el
+        tiempo total se acerca al del video más lento y no a la suma.
+
+        Args:
+            urls: URLs de los videos
+            mode: Modo de análisis (opcional, usa settings.ANALYSIS_MODE)
+            transcription_backend: Motor de transcripción para todos los videos (opcional)
+
+        Yields:
+            Un diccionario por video en orden de finalización (index, url, status y
+            result o error) y al final un resumen del lote
+        """
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._run_item(index, url, mode, transcription_backend))
+            for index, url in enumerate(urls)
+        ]
+        succeeded = 0
+
+        try:
+            for next_item in asyncio.as_completed(tasks):
+                item = await next_item
+                if item["status"] == "success":
+                    succeeded += 1
+                yield item
+        finally:
+            # Si el cliente se desconecta, no seguir procesando videos que nadie va a leer
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        yield {
+            "type": "summary",
+            "total": len(urls),
+            "succeeded": succeeded,
+            "failed": len(urls) - succeeded,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def _run_item(
+        self,
+        index: int,
+        url: str,
+        mode: Optional[str],
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Analiza un video del lote; los errores se reportan en el item, no se propagan."""
+        item: Dict[str, Any] = {"type": "item", "index": index, "url": url}
+        try:
+            result = await self.pipeline.run(
+                url,
+                mode=mode,
+                limiter=self.limiter,
+                transcription_backend=transcription_backend
+            )
+            return {**item, "status": "success", "result": {"status": "success", **result}}
+        except RateLimitExceeded as e:
+            return {**item, "status": "error", "status_code": 503, "error": str(e)}
+        except DeadlineExceeded as e:
+            return {**item, "status": "error", "status_code": 504, "error": str(e)}
+        except ValueError as e:
+            return {**item, "status": "error", "status_code": 400, "error": str(e)}
+        except Exception as e:
+            return {
+                **item,
+                "status": "error",
+                "status_code": 500,
+                "error": f"Error al analizar el video: {str(e)}",
+            }
@@ -0,0 +1,138 @@
+"""
+Almacenamiento de caché persistente.
+Responsabilidad única: Guardar valores JSON en SQLite con TTL y expulsión LRU.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SQLiteCache:
+    """Caché clave-valor persistente en SQLite con TTL y tamaño máximo (LRU)."""
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        max_entries: int,
+        ttl_seconds: Optional[int] = None
+    ):
+        """
+        Inicializa la caché y crea la tabla si no existe.
+
+        Args:
+            path: Ruta del archivo SQLite
+            table: Nombre de la tabla (permite compartir archivo entre cachés)
+            max_entries: Número máximo de entradas antes de expulsar las menos usadas
+            ttl_seconds: TTL por defecto de cada entrada (None = sin expiración)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obtiene un valor si existe y no ha expirado.
+
+        Args:
+            key: Clave de la entrada
+
+        Returns:
+            Valor deserializado o None si no existe o expiró
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                (now, key)
+            )
+            self.hits += 1
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """
+        Guarda un valor y expulsa las entradas menos usadas si se supera el máximo.
+
+        Args:
+            key: Clave de la entrada
+            value: Valor serializable a JSON
+            ttl_seconds: TTL de esta entrada (opcional, usa el TTL por defecto)
+        """
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl if ttl else None
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) "
+                f"VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        """Elimina una entrada."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna aciertos, fallos y número de entradas."""
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def _evict(self, now: float) -> None:
+        """Elimina entradas expiradas y, si sobran, las de acceso más antiguo."""
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,)
+        )
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
@@ -0,0 +1,152 @@
+"""
+Caché de completions de OpenAI.
+Responsabilidad única: Evitar pagar dos veces por el mismo prompt determinista.
+
+Dos niveles: un LRU en memoria (por proceso) delante de SQLite en disco
+(compartido entre reinicios). La clave es un hash del modelo, los mensajes
+y los parámetros de muestreo.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+from app.config import settings
+from app.services.cache_store import SQLiteCache
+
+
+class CompletionCache:
+    """Caché direccionada por contenido para respuestas de chat completions."""
+
+    def __init__(
+        self,
+        store: Optional[SQLiteCache] = None,
+        memory_entries: Optional[int] = None,
+        ttl_by_stage: Optional[Dict[str, int]] = None
+    ):
+        """
+        Inicializa los dos niveles de la caché.
+
+        Args:
+            store: Nivel en disco (opcional, crea uno en settings.CACHE_DIR)
+            memory_entries: Entradas del LRU en memoria (opcional, usa settings)
+            ttl_by_stage: TTL en segundos por etapa (opcional, usa settings)
+        """
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.store = store or SQLiteCache(
+            path=os.path.join(settings.CACHE_DIR, "llm_completions.sqlite3"),
+            table="llm_completions",
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES
+        )
+        self.memory_entries = memory_entries or settings.LLM_CACHE_MEMORY_ENTRIES
+        self.ttl_by_stage = ttl_by_stage or {
+            "improve": settings.LLM_CACHE_TTL_IMPROVE,
+            "analyze": settings.LLM_CACHE_TTL_ANALYZE,
+            "single_pass": settings.LLM_CACHE_TTL_ANALYZE,
+            "hook_window": settings.LLM_CACHE_TTL_ANALYZE,
+            "hooks": settings.LLM_CACHE_TTL_HOOKS,
+        }
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """
+        Calcula la clave de una completion.
+
+        Args:
+            model: Modelo de OpenAI
+            messages: Mensajes de la conversación
+            params: Parámetros de muestreo (temperature, max_tokens, response_format...)
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca una completion primero en memoria y luego en disco.
+
+        Args:
+            key: Clave calculada con make_key
+
+        Returns:
+            Completion guardada o None
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+        entry = self.store.get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, entry["completion"], entry["expires_at"])
+        return entry["completion"]
+
+    def set(self, key: str, stage: str, value: Dict[str, Any]) -> None:
+        """
+        Guarda una completion en ambos niveles con el TTL de su etapa (una
+        etapa con TTL 0 no se guarda).
+
+        Args:
+            key: Clave calculada con make_key
+            stage: Etapa que generó la completion (improve, analyze, single_pass, hook_window, hooks)
+            value: Completion normalizada (content, finish_reason, usage)
+        """
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_by_stage.get(stage)
+        if ttl is not None and ttl <= 0:
+            # TTL 0 = no se guardan las completions de esa etapa
+            return
+        expires_at = time.time() + ttl if ttl else None
+        self.store.set(key, {"completion": value, "expires_at": expires_at}, ttl_seconds=ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna aciertos por nivel, fallos y tamaño de cada nivel."""
+        with self._lock:
+            memory_size = len(self._memory)
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": memory_size,
+            "disk_entries": self.store.stats()["entries"],
+        }
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: Optional[float]) -> None:
+        """Guarda en el LRU en memoria (requiere tener el lock)."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
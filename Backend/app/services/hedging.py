@@ -0,0 +1,339 @@
+"""
+Plazos y llamadas de respaldo (hedging) para las llamadas a OpenAI.
+Responsabilidad única: Acotar la latencia de cola de cada llamada al LLM.
+
+Cada llamada tiene un plazo (LLM_TIMEOUT_SECONDS) que cubre la espera de
+cuota, los reintentos y la respuesta. Con hedging activado, si una llamada
+no respondió cuando ya pasó el percentil LLM_HEDGE_PERCENTILE de la latencia
+reciente de su etapa, se lanza una copia y gana la primera que responda bien.
+
+Las copias cuestan tokens, así que se limitan con un presupuesto: cada
+llamada suma LLM_HEDGE_MAX_RATE copias disponibles (hasta un máximo) y cada
+copia gasta una. Si OpenAI se pone lento para todas las llamadas a la vez,
+el presupuesto se agota y no se duplica la carga.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+from app.config import settings
+
+T = TypeVar("T")
+
+# Copias acumulables como máximo (ráfaga de hedges permitida tras un período tranquilo)
+_HEDGE_BUDGET_CAP = 10.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """La llamada no terminó dentro de su plazo."""
+
+
+class LatencyTracker:
+    """Latencias recientes de una etapa (ventana deslizante)."""
+
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=max(1, window))
+
+    def add(self, seconds: float) -> None:
+        """Registra la latencia de una llamada correcta."""
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        """Cantidad de muestras en la ventana."""
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Percentil (nearest-rank) de la ventana; None si no hay muestras."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(percent / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class Hedger:
+    """Ejecuta llamadas con plazo y, si corresponde, con una copia de respaldo."""
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        min_delay: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        window: Optional[int] = None
+    ):
+        """
+        Args:
+            timeout: Plazo de cada llamada en segundos (opcional, usa settings.LLM_TIMEOUT_SECONDS)
+            enabled: Lanzar copias de respaldo (opcional, usa settings.LLM_HEDGE_ENABLED)
+            percentile: Percentil de la latencia reciente tras el que se lanza la copia (opcional)
+            min_samples: Muestras de la etapa necesarias antes de lanzar copias (opcional)
+            min_delay: Espera mínima antes de lanzar una copia, en segundos (opcional)
+            max_rate: Fracción máxima de llamadas con copia (opcional)
+            window: Llamadas recientes por etapa que se usan para el percentil (opcional)
+        """
+        self.timeout = settings.LLM_TIMEOUT_SECONDS if timeout is None else timeout
+        self.enabled = settings.LLM_HEDGE_ENABLED if enabled is None else enabled
+        self.percentile = settings.LLM_HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_samples = settings.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.min_delay = settings.LLM_HEDGE_MIN_DELAY_SECONDS if min_delay is None else min_delay
+        self.max_rate = settings.LLM_HEDGE_MAX_RATE if max_rate is None else max_rate
+        self.window = settings.LLM_LATENCY_WINDOW if window is None else window
+
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._budget = 0.0
+        self._counts = {"calls": 0, "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def deadline(self) -> float:
+        """Instante (time.monotonic) en que vence una llamada que empieza ahora."""
+        return time.monotonic() + self.timeout
+
+    def run(self, stage: str, fn: Callable[[float], T]) -> T:
+        """
+        Ejecuta fn(deadline) con plazo y, si tarda más de lo habitual, con una copia.
+
+        La copia corre en otro hilo; la que pierde no se puede interrumpir y
+        termina sola al vencer su plazo.
+
+        Args:
+            stage: Etapa de la llamada (las latencias se miden por etapa)
+            fn: Llamada; recibe el instante en que vence y debe respetarlo
+
+        Returns:
+            Resultado de la primera llamada que termine bien
+
+        Raises:
+            DeadlineExceeded: Si ninguna terminó dentro del plazo
+        """
+        deadline = self.deadline()
+        delay = self._start(stage)
+        if delay is None:
+            return self._direct(stage, fn, deadline)
+
+        executor = self._hedge_executor()
+        primary = executor.submit(self._timed, stage, fn, deadline)
+        done, _ = wait([primary], timeout=max(0.0, min(delay, deadline - time.monotonic())))
+        attempts = [primary]
+        if not done and self._take_hedge():
+            attempts.append(executor.submit(self._timed, stage, fn, deadline))
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    self._won(future is not primary)
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+
+        raise self._failure(stage, error, deadline)
+
+    async def arun(self, stage: str, fn: Callable[[float], Awaitable[T]]) -> T:
+        """Versión async de run; la copia que pierde se cancela."""
+        deadline = self.deadline()
+        delay = self._start(stage)
+        if delay is None:
+            try:
+                return await asyncio.wait_for(self._atimed(stage, fn, deadline), timeout=self.timeout)
+            except Exception as e:
+                raise self._failure(stage, e, deadline)
+
+        primary = asyncio.ensure_future(self._atimed(stage, fn, deadline))
+        attempts: List[asyncio.Future] = [primary]
+        try:
+            done, _ = await asyncio.wait([primary], timeout=max(0.0, min(delay, deadline - time.monotonic())))
+            if not done and self._take_hedge():
+                attempts.append(asyncio.ensure_future(self._atimed(stage, fn, deadline)))
+
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        self._won(task is not primary)
+                        return task.result()
+                    error = task.exception()
+
+            raise self._failure(stage, error, deadline)
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def aiterate(self, stage: str, items: AsyncIterator[T], deadline: float) -> AsyncIterator[T]:
+        """
+        Recorre una respuesta en streaming sin pasar el plazo.
+
+        El timeout del SDK acota cada lectura, no el stream completo: uno que
+        entrega chunks de a poco podría seguir mucho después del plazo. Aquí
+        cada lectura espera como máximo lo que le queda al plazo.
+
+        Args:
+            stage: Etapa (para los plazos vencidos de /health/llm-latency)
+            items: Stream a recorrer
+            deadline: Plazo en time.monotonic() (de deadline())
+
+        Raises:
+            DeadlineExceeded: Si el stream no terminó antes del plazo
+        """
+        iterator = items.__aiter__()
+        while True:
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), timeout=deadline - time.monotonic())
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError as e:
+                raise self._failure(stage, e, deadline)
+            yield item
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna las llamadas, copias, copias ganadoras y la latencia reciente por etapa."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "samples": len(tracker),
+                    "p50_s": _rounded(tracker.percentile(50)),
+                    "p95_s": _rounded(tracker.percentile(95)),
+                    "hedge_after_s": _rounded(self._hedge_delay(stage)),
+                }
+                for stage, tracker in self._latencies.items()
+            }
+            hedged = self._counts["hedged"]
+            return {
+                "enabled": self.enabled,
+                "timeout_s": self.timeout,
+                **self._counts,
+                "hedge_win_rate": round(self._counts["hedge_wins"] / hedged, 3) if hedged else None,
+                "hedge_budget": round(self._budget, 2),
+                "stages": stages,
+            }
+
+    def _start(self, stage: str) -> Optional[float]:
+        """Cuenta la llamada y retorna tras cuántos segundos lanzar la copia (None = sin copia)."""
+        with self._lock:
+            self._counts["calls"] += 1
+            self._budget = min(_HEDGE_BUDGET_CAP, self._budget + self.max_rate)
+            if not self.enabled:
+                return None
+            return self._hedge_delay(stage)
+
+    def _hedge_delay(self, stage: str) -> Optional[float]:
+        """Percentil de la latencia reciente de la etapa (None si aún hay pocas muestras)."""
+        tracker = self._latencies.get(stage)
+        if tracker is None or len(tracker) < max(1, self.min_samples):
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def _take_hedge(self) -> bool:
+        """Gasta una copia del presupuesto si queda alguna."""
+        with self._lock:
+            if self._budget < 1.0:
+                return False
+            self._budget -= 1.0
+            self._counts["hedged"] += 1
+            return True
+
+    def _won(self, hedge: bool) -> None:
+        """Registra si la llamada la ganó la copia."""
+        if hedge:
+            with self._lock:
+                self._counts["hedge_wins"] += 1
+
+    def _direct(self, stage: str, fn: Callable[[float], T], deadline: float) -> T:
+        """Llamada sin copia, en el hilo actual."""
+        try:
+            return self._timed(stage, fn, deadline)
+        except Exception as e:
+            raise self._failure(stage, e, deadline)
+
+    def _timed(self, stage: str, fn: Callable[[float], T], deadline: float) -> T:
+        """Ejecuta un intento y registra su latencia si terminó bien."""
+        started = time.monotonic()
+        result = fn(deadline)
+        self._record(stage, time.monotonic() - started)
+        return result
+
+    async def _atimed(self, stage: str, fn: Callable[[float], Awaitable[T]], deadline: float) -> T:
+        """Versión async de _timed."""
+        started = time.monotonic()
+        result = await fn(deadline)
+        self._record(stage, time.monotonic() - started)
+        return result
+
+    def _record(self, stage: str, seconds: float) -> None:
+        """Agrega una latencia a la ventana de la etapa."""
+        with self._lock:
+            tracker = self._latencies.get(stage)
+            if tracker is None:
+                tracker = self._latencies[stage] = LatencyTracker(self.window)
+            tracker.add(seconds)
+
+    def _failure(self, stage: str, error: Optional[BaseException], deadline: float) -> BaseException:
+        """
+        Error a lanzar cuando ningún intento terminó bien: el del último
+        intento, o DeadlineExceeded si se venció el plazo.
+        """
+        timed_out = isinstance(error, (TimeoutError, asyncio.TimeoutError)) or time.monotonic() >= deadline
+        if error is not None and not timed_out:
+            return error
+        with self._lock:
+            self._counts["deadline_exceeded"] += 1
+        if isinstance(error, DeadlineExceeded):
+            return error
+        exceeded = DeadlineExceeded(f"OpenAI no respondió en {self.timeout:g}s (etapa {stage})")
+        exceeded.__cause__ = error
+        return exceeded
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        """Hilos para las llamadas con copia de los servicios síncronos (se crean al primer uso)."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(2, settings.LLM_HEDGE_WORKERS),
+                        thread_name_prefix="llm-hedge"
+                    )
+        return self._executor
+
+
+def remaining_seconds(deadline: float) -> float:
+    """Segundos que le quedan a un plazo (mínimo 1 ms, para pasar como timeout)."""
+    return max(0.001, deadline - time.monotonic())
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    """Redondea a milisegundos (None se mantiene)."""
+    return None if value is None else round(value, 3)
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Retorna el Hedger del proceso (se crea una sola vez; las latencias se comparten)."""
+    global _hedger
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger()
+    return _hedger
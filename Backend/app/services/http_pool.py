@@ -0,0 +1,209 @@
+"""
+Pool compartido de conexiones HTTP.
+Responsabilidad única: Reutilizar conexiones keep-alive hacia Deepgram y Supabase
+en lugar de abrir una conexión TCP+TLS nueva por cada petición.
+
+Deepgram se llama con `requests` (una Session con HTTPAdapter por host) y
+Supabase con `httpx` (el cliente que usa supabase-py por dentro). Ambos
+clientes son thread-safe y se comparten en todo el proceso. Los servicios
+async usan un `httpx.AsyncClient` con los mismos límites.
+"""
+import threading
+from typing import Dict, Any, Optional
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+
+
+class HttpClientPool:
+    """Clientes HTTP con pool de conexiones compartidos por los servicios."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_connections_per_host: Optional[int] = None,
+        max_hosts: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None
+    ):
+        """
+        Inicializa el pool; los clientes se crean al primer uso.
+
+        Args:
+            max_connections: Conexiones totales del cliente httpx (opcional, usa settings)
+            max_connections_per_host: Conexiones por host de la Session (opcional, usa settings)
+            max_hosts: Hosts distintos con pool propio en la Session (opcional, usa settings)
+            keepalive_expiry: Segundos que una conexión ociosa sigue abierta (opcional, usa settings)
+        """
+        self.max_connections = max_connections or settings.HTTP_POOL_MAX_CONNECTIONS
+        self.max_connections_per_host = max_connections_per_host or settings.HTTP_POOL_MAX_PER_HOST
+        self.max_hosts = max_hosts or settings.HTTP_POOL_MAX_HOSTS
+        self.keepalive_expiry = keepalive_expiry or settings.HTTP_POOL_KEEPALIVE_SECONDS
+
+        self._session: Optional[requests.Session] = None
+        self._httpx_client: Optional[httpx.Client] = None
+        self._async_httpx_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """
+        Retorna la Session de requests compartida (para Deepgram).
+
+        Returns:
+            Session con un pool de hasta max_connections_per_host conexiones por host
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    adapter = HTTPAdapter(
+                        pool_connections=self.max_hosts,
+                        pool_maxsize=self.max_connections_per_host,
+                        # Si el pool está lleno se espera una conexión libre en vez de abrir otra
+                        pool_block=True
+                    )
+                    session = requests.Session()
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def httpx_client(self) -> httpx.Client:
+        """
+        Retorna el cliente httpx compartido (para Supabase).
+
+        Supabase usa un único host (SUPABASE_URL), así que el límite total del
+        cliente es también el límite por host.
+
+        Returns:
+            Cliente httpx con keep-alive
+        """
+        if self._httpx_client is None:
+            with self._lock:
+                if self._httpx_client is None:
+                    self._httpx_client = httpx.Client(
+                        limits=self._httpx_limits(),
+                        timeout=httpx.Timeout(120.0, connect=10.0),
+                        follow_redirects=True,
+                        http2=True
+                    )
+        return self._httpx_client
+
+    def async_httpx_client(self) -> httpx.AsyncClient:
+        """
+        Retorna el cliente httpx async compartido (Deepgram y Supabase en los servicios async).
+
+        Returns:
+            Cliente httpx async con keep-alive y los mismos límites que el síncrono
+        """
+        if self._async_httpx_client is None:
+            with self._lock:
+                if self._async_httpx_client is None:
+                    self._async_httpx_client = httpx.AsyncClient(
+                        limits=self._httpx_limits(),
+                        timeout=httpx.Timeout(120.0, connect=10.0),
+                        follow_redirects=True,
+                        http2=True
+                    )
+        return self._async_httpx_client
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna la utilización de los pools.
+
+        Returns:
+            Diccionario con, por host, conexiones abiertas, ociosas, en uso y
+            peticiones atendidas
+        """
+        return {
+            "requests": self._requests_stats(),
+            "httpx": self._httpx_stats(self._httpx_client),
+            "httpx_async": self._httpx_stats(self._async_httpx_client),
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_connections_per_host": self.max_connections_per_host,
+                "max_hosts": self.max_hosts,
+                "keepalive_expiry": self.keepalive_expiry,
+            },
+        }
+
+    def close(self) -> None:
+        """Cierra las conexiones abiertas de los clientes síncronos."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            if self._httpx_client is not None:
+                self._httpx_client.close()
+                self._httpx_client = None
+
+    async def aclose(self) -> None:
+        """Cierra las conexiones abiertas del cliente async."""
+        with self._lock:
+            client, self._async_httpx_client = self._async_httpx_client, None
+        if client is not None:
+            await client.aclose()
+
+    def _httpx_limits(self) -> httpx.Limits:
+        """Límites de conexiones de los clientes httpx."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _requests_stats(self) -> Dict[str, Dict[str, int]]:
+        """Utilización de los pools de urllib3 de la Session, por host."""
+        if self._session is None:
+            return {}
+
+        hosts: Dict[str, Dict[str, int]] = {}
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None or pool.pool is None:
+                    continue
+                # La cola contiene conexiones ociosas y huecos (None) aún sin usar
+                idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                max_size = pool.pool.maxsize
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "opened": pool.num_connections,
+                    "idle": idle,
+                    "in_use": max_size - pool.pool.qsize(),
+                    "max_size": max_size,
+                    "requests": pool.num_requests,
+                }
+        return hosts
+
+    @staticmethod
+    def _httpx_stats(client) -> Dict[str, Dict[str, int]]:
+        """Utilización del pool de httpcore de un cliente httpx, por host."""
+        if client is None:
+            return {}
+
+        hosts: Dict[str, Dict[str, int]] = {}
+        pool = getattr(client._transport, "_pool", None)
+        for connection in list(getattr(pool, "connections", [])):
+            origin = connection._origin
+            host = f"{origin.scheme.decode()}://{origin.host.decode()}:{origin.port}"
+            entry = hosts.setdefault(host, {"opened": 0, "idle": 0, "in_use": 0})
+            entry["opened"] += 1
+            if connection.is_idle():
+                entry["idle"] += 1
+            else:
+                entry["in_use"] += 1
+        return hosts
+
+
+_http_pool: Optional[HttpClientPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    """Retorna el pool HTTP del proceso (se crea una sola vez)."""
+    global _http_pool
+    if _http_pool is None:
+        with _http_pool_lock:
+            if _http_pool is None:
+                _http_pool = HttpClientPool()
+    return _http_pool
@@ -0,0 +1,123 @@
+"""
+Parser JSON incremental.
+Responsabilidad única: Extraer los objetos de un arreglo JSON a medida que
+llegan los fragmentos de una respuesta en streaming, sin esperar al documento
+completo.
+"""
+import json
+from typing import Dict, Any, List, Optional
+
+
+class JsonArrayItemParser:
+    """
+    Emite cada objeto de `{"<key>": [{...}, {...}]}` apenas se cierra su llave.
+
+    Recorre los caracteres una sola vez llevando la pila de contenedores y el
+    estado de strings/escapes, así que cada fragmento cuesta O(len(fragmento)).
+    Los objetos que no se pueden decodificar se ignoran; el documento completo
+    se sigue pudiendo parsear al final con json.loads(parser.text).
+    """
+
+    def __init__(self, array_key: str):
+        """
+        Inicializa el parser.
+
+        Args:
+            array_key: Clave del objeto raíz cuyo arreglo se quiere recorrer
+        """
+        self.array_key = array_key
+        self._chunks: List[str] = []
+        self._buffer = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._in_target = False
+
+    @property
+    def text(self) -> str:
+        """Texto completo recibido hasta ahora."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Agrega un fragmento y retorna los objetos que quedaron completos.
+
+        Args:
+            chunk: Fragmento de texto de la respuesta
+
+        Returns:
+            Objetos del arreglo cerrados en este fragmento (en orden)
+        """
+        if not chunk:
+            return []
+
+        self._chunks.append(chunk)
+        offset = len(self._buffer)
+        self._buffer += chunk
+        items: List[Dict[str, Any]] = []
+
+        for index in range(offset, len(self._buffer)):
+            char = self._buffer[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    # Los strings directos del objeto raíz pueden ser claves
+                    if self._stack == ["{"] and self._string_start is not None:
+                        self._last_key = self._buffer[self._string_start + 1:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                if char == "[" and self._stack == ["{"]:
+                    self._in_target = self._last_key == self.array_key
+                elif char == "{" and self._in_target and len(self._stack) == 2:
+                    self._item_start = index
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._in_target and len(self._stack) == 2 and self._item_start is not None:
+                    item = self._decode(self._buffer[self._item_start:index + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+                elif char == "]" and len(self._stack) == 1:
+                    self._in_target = False
+
+        self._trim()
+        return items
+
+    def _trim(self) -> None:
+        """Descarta el texto ya procesado que no pertenece a un objeto abierto."""
+        keep_from = len(self._buffer)
+        if self._item_start is not None:
+            keep_from = self._item_start
+        if self._in_string and self._string_start is not None:
+            keep_from = min(keep_from, self._string_start)
+        if keep_from == 0:
+            return
+
+        self._buffer = self._buffer[keep_from:]
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        if self._string_start is not None:
+            self._string_start = self._string_start - keep_from if self._string_start >= keep_from else None
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[Dict[str, Any]]:
+        """Decodifica un objeto completo; None si el modelo generó JSON inválido."""
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,155 @@
+"""
+Transcripción en vivo con Deepgram (WebSocket).
+Responsabilidad única: Enviar PCM a Deepgram a medida que ffmpeg lo decodifica
+y juntar los resultados parciales y finales, de modo que la transcripción
+avanza mientras el video todavía se está descargando.
+"""
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlencode
+from websockets.exceptions import ConnectionClosed, InvalidStatus, WebSocketException
+from websockets.sync.client import connect
+
+
+# Segundos sin enviar audio antes de mandar un KeepAlive (Deepgram cierra a los ~10 s)
+_KEEPALIVE_SECONDS = 5.0
+
+
+class DeepgramLiveTranscriber:
+    """Cliente del endpoint de streaming de Deepgram para audio PCM 16 bits mono."""
+
+    def __init__(self, url: str, api_key: str, params: Dict[str, str], timeout: float = 300.0):
+        """
+        Inicializa el cliente.
+
+        Args:
+            url: URL del WebSocket (wss://api.deepgram.com/v1/listen)
+            api_key: API key de Deepgram
+            params: Parámetros de la sesión (modelo, idioma, encoding, sample_rate...)
+            timeout: Segundos máximos esperando un mensaje de Deepgram
+        """
+        self.url = url
+        self.api_key = api_key
+        self.params = params
+        self.timeout = timeout
+
+    def transcribe(
+        self,
+        pcm_chunks: Iterable[bytes],
+        on_result: Optional[Callable[[str, bool], None]] = None
+    ) -> str:
+        """
+        Envía el audio por el WebSocket y retorna la transcripción final.
+
+        Un hilo envía los chunks a medida que llegan (y KeepAlive si el audio se
+        demora) mientras este hilo recibe los resultados. Al agotarse el audio se
+        envía CloseStream y Deepgram entrega los últimos resultados y cierra.
+
+        Args:
+            pcm_chunks: Chunks de PCM lineal 16 bits (sin cabecera WAV)
+            on_result: Callback opcional (texto, es_final) por cada resultado
+
+        Returns:
+            Texto transcrito (los segmentos finales unidos)
+
+        Raises:
+            Exception: Si falla la conexión, Deepgram cierra con error o el audio falla
+        """
+        uri = f"{self.url}?{urlencode(self.params)}"
+        finals: List[str] = []
+        errors: List[BaseException] = []
+
+        try:
+            with connect(
+                uri,
+                additional_headers={"Authorization": f"Token {self.api_key}"},
+                open_timeout=10,
+                close_timeout=5,
+                max_size=None
+            ) as websocket:
+                sender = threading.Thread(
+                    target=self._send_audio,
+                    args=(websocket, pcm_chunks, errors),
+                    daemon=True
+                )
+                sender.start()
+
+                while True:
+                    try:
+                        message = websocket.recv(timeout=self.timeout)
+                    except ConnectionClosed as e:
+                        # Cierre normal después de CloseStream
+                        if e.rcvd is not None and e.rcvd.code not in (1000, 1001):
+                            raise Exception(f"Deepgram cerró la conexión ({e.rcvd.code}): {e.rcvd.reason}")
+                        break
+                    except TimeoutError:
+                        raise Exception(f"Deepgram no respondió en {self.timeout:.0f} s")
+
+                    if isinstance(message, bytes):
+                        continue
+                    result = json.loads(message)
+                    if result.get("type") != "Results":
+                        continue
+
+                    alternatives = result.get("channel", {}).get("alternatives") or [{}]
+                    text = (alternatives[0].get("transcript") or "").strip()
+                    is_final = bool(result.get("is_final"))
+                    if text and on_result:
+                        on_result(text, is_final)
+                    if text and is_final:
+                        finals.append(text)
+
+                sender.join(timeout=5)
+
+        except InvalidStatus as e:
+            raise Exception(f"Error en Deepgram Live ({e.response.status_code})")
+        except (WebSocketException, OSError) as e:
+            raise Exception(f"Error en Deepgram Live: {str(e)}")
+
+        if errors:
+            raise Exception(f"Error enviando audio a Deepgram: {str(errors[0])}")
+
+        transcript = " ".join(finals).strip()
+        if not transcript:
+            raise Exception("No se pudo generar transcripción")
+
+        return transcript
+
+    @staticmethod
+    def _send_audio(websocket, pcm_chunks: Iterable[bytes], errors: List[BaseException]) -> None:
+        """Envía el audio, mantiene viva la sesión si se demora y la cierra al final."""
+        last_sent = [time.monotonic()]
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def keepalive():
+            try:
+                while not done.wait(1.0):
+                    with lock:
+                        if time.monotonic() - last_sent[0] >= _KEEPALIVE_SECONDS:
+                            websocket.send(json.dumps({"type": "KeepAlive"}))
+                            last_sent[0] = time.monotonic()
+            except ConnectionClosed:
+                pass
+
+        keepalive_thread = threading.Thread(target=keepalive, daemon=True)
+        keepalive_thread.start()
+        try:
+            for chunk in pcm_chunks:
+                if not chunk:
+                    continue
+                with lock:
+                    websocket.send(chunk)
+                    last_sent[0] = time.monotonic()
+            with lock:
+                websocket.send(json.dumps({"type": "CloseStream"}))
+        except ConnectionClosed:
+            # Deepgram cerró primero; el receptor reporta el motivo
+            pass
+        except Exception as e:
+            errors.append(e)
+            websocket.close()
+        finally:
+            done.set()
@@ -0,0 +1,229 @@
+"""
+Métricas de Prometheus del backend.
+Responsabilidad única: Medir la latencia de cada ruta y de cada etapa del
+pipeline (descarga, ffmpeg, Deepgram, OpenAI, Supabase) y exponerlas en
+/metrics con el formato de texto de Prometheus.
+
+Métricas exportadas:
+- http_requests_total / http_request_duration_seconds: por método, ruta
+  (la plantilla, p. ej. /video/analyses) y código de estado
+- stage_duration_seconds: por etapa, operación y resultado (ok / error);
+  stage="pipeline" lleva las etapas de cada análisis completo por modo
+- pipelines_in_flight: análisis de video en curso
+- threadpool_size / threadpool_busy / threadpool_queued: hilos de cada pool
+  (se leen al consultar /metrics)
+- downloaded_bytes_total: bytes descargados de los sitios de video
+- llm_tokens_total: tokens de OpenAI por etapa, modelo y tipo
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+import prometheus_client
+
+
+# Límites de los histogramas en segundos: desde consultas de ms hasta descargas de minutos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+# Etiqueta de las peticiones que no coinciden con ninguna ruta (evita una serie por URL)
+UNMATCHED_ROUTE = "unmatched"
+# Tipos de token que se cuentan por llamada a OpenAI
+TOKEN_KINDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+class Metrics:
+    """Registro de métricas del proceso."""
+
+    def __init__(self):
+        self.registry = prometheus_client.CollectorRegistry()
+        self.http_requests = prometheus_client.Counter(
+            "http_requests_total",
+            "Peticiones HTTP atendidas",
+            ["method", "route", "status"],
+            registry=self.registry
+        )
+        self.http_latency = prometheus_client.Histogram(
+            "http_request_duration_seconds",
+            "Duración de las peticiones HTTP hasta el último byte de la respuesta",
+            ["method", "route"],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.stage_latency = prometheus_client.Histogram(
+            "stage_duration_seconds",
+            "Duración de cada etapa del pipeline y de cada llamada a un servicio externo",
+            ["stage", "operation", "outcome"],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.pipelines_in_flight = prometheus_client.Gauge(
+            "pipelines_in_flight",
+            "Análisis de video en curso",
+            registry=self.registry
+        )
+        self.threadpool_size = prometheus_client.Gauge(
+            "threadpool_size",
+            "Hilos máximos de cada pool",
+            ["pool"],
+            registry=self.registry
+        )
+        self.threadpool_busy = prometheus_client.Gauge(
+            "threadpool_busy",
+            "Hilos ocupados de cada pool",
+            ["pool"],
+            registry=self.registry
+        )
+        self.threadpool_queued = prometheus_client.Gauge(
+            "threadpool_queued",
+            "Tareas esperando un hilo libre en cada pool",
+            ["pool"],
+            registry=self.registry
+        )
+        self.downloaded_bytes = prometheus_client.Counter(
+            "downloaded_bytes_total",
+            "Bytes descargados de los sitios de video",
+            registry=self.registry
+        )
+        self.llm_tokens = prometheus_client.Counter(
+            "llm_tokens_total",
+            "Tokens consumidos en OpenAI",
+            ["stage", "model", "kind"],
+            registry=self.registry
+        )
+
+    @contextmanager
+    def time_stage(self, stage: str, operation: str) -> Iterator[None]:
+        """
+        Mide la duración del bloque en stage_duration_seconds.
+
+        Sirve igual en código síncrono y async (el `with` no bloquea); si el
+        bloque lanza una excepción se registra con outcome="error".
+
+        Args:
+            stage: Etapa o servicio (download, ffmpeg, deepgram, openai, supabase)
+            operation: Operación dentro de la etapa (p. ej. extract_audio, select_viral_hooks)
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.stage_latency.labels(stage, operation, outcome).observe(time.perf_counter() - started)
+
+    @contextmanager
+    def track_pipeline(self) -> Iterator[None]:
+        """Cuenta el bloque como un análisis en curso."""
+        self.pipelines_in_flight.inc()
+        try:
+            yield
+        finally:
+            self.pipelines_in_flight.dec()
+
+    def observe_pipeline(self, mode: str, latency_ms: Dict[str, float]) -> None:
+        """
+        Registra las etapas de un análisis terminado (las de metrics.latency_ms)
+        con stage="pipeline" y operation="<modo>.<etapa>".
+        """
+        for name, milliseconds in latency_ms.items():
+            self.stage_latency.labels("pipeline", f"{mode}.{name}", "ok").observe(milliseconds / 1000)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        """Registra una petición HTTP terminada."""
+        self.http_requests.labels(method, route, str(status)).inc()
+        self.http_latency.labels(method, route).observe(seconds)
+
+    def add_downloaded_bytes(self, size: Optional[int]) -> None:
+        """Suma bytes descargados."""
+        if size:
+            self.downloaded_bytes.inc(size)
+
+    def add_tokens(self, stage: Optional[str], model: str, usage: Dict[str, int]) -> None:
+        """
+        Suma los tokens de una llamada a OpenAI.
+
+        Args:
+            stage: Etapa que hizo la llamada (None = "default")
+            model: Modelo usado
+            usage: Uso de la llamada (prompt_tokens, completion_tokens, cached_tokens)
+        """
+        for kind in TOKEN_KINDS:
+            if usage.get(kind):
+                self.llm_tokens.labels(stage or "default", model, kind.replace("_tokens", "")).inc(usage[kind])
+
+    def set_threadpool(self, pool: str, size: int, busy: int, queued: int) -> None:
+        """Actualiza la ocupación de un pool de hilos (se llama al consultar /metrics)."""
+        self.threadpool_size.labels(pool).set(size)
+        self.threadpool_busy.labels(pool).set(busy)
+        self.threadpool_queued.labels(pool).set(queued)
+
+    def render(self) -> Tuple[bytes, str]:
+        """Retorna las métricas en el formato de texto de Prometheus y su Content-Type."""
+        return prometheus_client.generate_latest(self.registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP por ruta.
+
+    Es ASGI puro (no BaseHTTPMiddleware) para medir hasta el último byte de
+    las respuestas en streaming (hooks por SSE).
+    """
+
+    def __init__(self, app: Any, metrics: Optional[Metrics] = None):
+        self.app = app
+        self.metrics = metrics or get_metrics()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # El router deja la ruta que atendió la petición en el scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe_request(scope["method"], route, status, time.perf_counter() - started)
+
+
+def executor_usage(executor: Optional[ThreadPoolExecutor]) -> Optional[Dict[str, int]]:
+    """
+    Tamaño, hilos ocupados y tareas en espera de un ThreadPoolExecutor.
+
+    ThreadPoolExecutor no publica su ocupación: se lee de sus atributos
+    internos (CPython) y se retorna None si no están.
+    """
+    try:
+        threads = len(executor._threads)
+        idle = executor._idle_semaphore._value
+        return {
+            "size": executor._max_workers,
+            "busy": max(0, threads - idle),
+            "queued": executor._work_queue.qsize(),
+        }
+    except AttributeError:
+        return None
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Retorna las métricas del proceso (se crean una sola vez)."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
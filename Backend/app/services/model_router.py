@@ -0,0 +1,167 @@
+"""
+Ruteo de modelos por etapa.
+Responsabilidad única: Elegir el modelo de OpenAI y el max_tokens de cada
+etapa del análisis, y verificar que el prompt quepa en su ventana de contexto.
+
+Cada ruta define:
+- model: modelo de la etapa (p. ej. uno barato y rápido para corregir)
+- max_tokens: tope de tokens de respuesta
+- output_ratio: tokens de respuesta por token de entrada, en las etapas que
+  reescriben el transcript (0 = la respuesta no depende del largo)
+- min_output: tokens de respuesta fijos de esas etapas (análisis, hook, margen)
+
+En las etapas con output_ratio, max_tokens se ajusta al largo del transcript
+(hasta el tope): un fragmento corto no reserva 2000 tokens de la cuota por
+minuto.
+"""
+import math
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.token_estimator import chars_for_tokens, context_window, estimate_message_tokens, estimate_tokens
+
+
+class ContextWindowExceeded(ValueError):
+    """El prompt más la respuesta esperada no caben en la ventana de contexto del modelo."""
+
+
+def default_routes() -> Dict[str, Dict[str, Any]]:
+    """Tabla de ruteo a partir de settings (los modelos vacíos usan OPENAI_MODEL)."""
+    improve_model = settings.OPENAI_MODEL_IMPROVE or settings.OPENAI_MODEL
+    analyze_model = settings.OPENAI_MODEL_ANALYZE or settings.OPENAI_MODEL
+    hooks_model = settings.OPENAI_MODEL_HOOKS or settings.OPENAI_MODEL
+    return {
+        "improve": {
+            "model": improve_model,
+            "max_tokens": settings.LLM_MAX_TOKENS_IMPROVE,
+            "output_ratio": 1.25,
+            "min_output": 64,
+        },
+        "analyze": {
+            "model": analyze_model,
+            "max_tokens": settings.LLM_MAX_TOKENS_ANALYZE,
+            "output_ratio": 0,
+            "min_output": 0,
+        },
+        # Corrección + análisis en una llamada: el transcript corregido más el análisis
+        "single_pass": {
+            "model": analyze_model,
+            "max_tokens": settings.LLM_MAX_TOKENS_SINGLE_PASS,
+            "output_ratio": 1.25,
+            "min_output": settings.LLM_MAX_TOKENS_ANALYZE,
+        },
+        "hook_window": {
+            "model": analyze_model,
+            "max_tokens": settings.LLM_MAX_TOKENS_HOOK_WINDOW,
+            "output_ratio": 1.25,
+            "min_output": 300,
+        },
+        "hooks": {
+            "model": hooks_model,
+            "max_tokens": settings.LLM_MAX_TOKENS_HOOKS,
+            "output_ratio": 0,
+            "min_output": 0,
+        },
+    }
+
+
+class ModelRouter:
+    """Modelo y presupuesto de tokens de cada etapa."""
+
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            routes: Ruta por etapa (opcional, usa default_routes)
+        """
+        self.routes = routes or default_routes()
+
+    def route(self, stage: Optional[str]) -> Dict[str, Any]:
+        """Ruta de la etapa; una etapa desconocida usa OPENAI_MODEL sin ajuste de max_tokens."""
+        return self.routes.get(stage or "", {
+            "model": settings.OPENAI_MODEL,
+            "max_tokens": 0,
+            "output_ratio": 0,
+            "min_output": 0,
+        })
+
+    def model_for(self, stage: Optional[str]) -> str:
+        """Modelo que atiende la etapa."""
+        return self.route(stage)["model"]
+
+    def max_tokens(self, stage: str, messages: List[Dict[str, str]], input_text: str = "") -> int:
+        """
+        Calcula el max_tokens de una llamada y verifica que quepa en el contexto.
+
+        Args:
+            stage: Etapa de la llamada
+            messages: Mensajes completos de la llamada
+            input_text: Texto de entrada que la respuesta reescribe (el transcript)
+
+        Returns:
+            max_tokens para la llamada
+
+        Raises:
+            ContextWindowExceeded: Si el prompt y la respuesta no caben en el modelo
+        """
+        route = self.route(stage)
+        model = route["model"]
+        max_tokens = route["max_tokens"]
+        if route["output_ratio"]:
+            max_tokens = min(max_tokens, self._output_needed(route, input_text))
+
+        prompt_tokens = estimate_message_tokens(messages, model)
+        window = context_window(model)
+        if prompt_tokens + max_tokens > window:
+            raise ContextWindowExceeded(
+                f"El texto es demasiado largo para {model}: ~{prompt_tokens} tokens de prompt "
+                f"más {max_tokens} de respuesta superan su contexto de {window} tokens"
+            )
+        return max_tokens
+
+    def output_fits(self, stage: str, input_text: str) -> bool:
+        """
+        True si la respuesta esperada de la etapa cabe en su tope de max_tokens.
+
+        En las etapas con output_ratio, una respuesta que no cabe llegaría
+        truncada (finish_reason="length"); las demás siempre caben.
+
+        Args:
+            stage: Etapa de la llamada
+            input_text: Texto de entrada que la respuesta reescribe (el transcript)
+        """
+        route = self.route(stage)
+        if not route["output_ratio"]:
+            return True
+        return self._output_needed(route, input_text) <= route["max_tokens"]
+
+    def max_input_chars(self, stage: str, prompt_messages: List[Dict[str, str]]) -> int:
+        """
+        Caracteres de entrada que caben en una llamada de la etapa: la
+        respuesta no pasa su tope y prompt más respuesta caben en el contexto.
+
+        Args:
+            stage: Etapa (con output_ratio, p. ej. improve)
+            prompt_messages: Mensajes de la llamada con la entrada vacía
+
+        Returns:
+            Tamaño máximo de la entrada en caracteres
+        """
+        route = self.route(stage)
+        model = route["model"]
+        ratio = route["output_ratio"] or 0
+        available = context_window(model) - estimate_message_tokens(prompt_messages, model) - route["min_output"]
+        input_tokens = available / (1 + ratio)
+        if ratio:
+            input_tokens = min(input_tokens, (route["max_tokens"] - route["min_output"]) / ratio)
+        return chars_for_tokens(max(0, int(input_tokens)))
+
+    @staticmethod
+    def _output_needed(route: Dict[str, Any], input_text: str) -> int:
+        """Tokens de respuesta que necesita una etapa con output_ratio para la entrada."""
+        return route["min_output"] + math.ceil(route["output_ratio"] * estimate_tokens(input_text, route["model"]))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Tabla de ruteo con la ventana de contexto de cada modelo."""
+        return {
+            stage: {**route, "context_window": context_window(route["model"])}
+            for stage, route in self.routes.items()
+        }
@@ -0,0 +1,495 @@
+"""
+Límites de tasa por proveedor (OpenAI y Deepgram).
+Responsabilidad única: Mantener las llamadas a cada proveedor justo por debajo
+de su cuota en lugar de gastarlas en rechazos 429.
+
+Cada proveedor tiene:
+- Dos token buckets, de peticiones y de tokens por minuto (0 = sin límite),
+  que se ajustan con las cabeceras x-ratelimit-* de cada respuesta: el
+  proveedor informa cuánto queda de la cuota compartida por todos los procesos.
+- Un límite de llamadas simultáneas que se adapta (AIMD): sube de a poco con
+  cada respuesta correcta y se reduce a la mitad con cada 429.
+- Reintentos con backoff exponencial y jitter para 429, 5xx y errores de red,
+  respetando Retry-After. Si los 429 siguen después de todos los reintentos
+  se lanza RateLimitExceeded (las rutas responden 503 con Retry-After).
+
+El limitador es uno por proveedor y por proceso, y es thread-safe: lo
+comparten los servicios sync (hilos de la cola de análisis) y async.
+"""
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Mapping, Optional, Tuple, TypeVar
+import httpx
+import openai
+import requests
+from app.config import settings
+from app.services.hedging import DeadlineExceeded
+
+T = TypeVar("T")
+
+# Cada cuánto se vuelve a mirar si se liberó un lugar de concurrencia
+_SLOT_POLL_SECONDS = 0.05
+# Tras reducir la concurrencia, los 429 de las llamadas que ya estaban en vuelo no la vuelven a reducir
+_DECREASE_COOLDOWN_SECONDS = 1.0
+# Duraciones de x-ratelimit-reset-*: "1s", "6m0s", "20ms", "1h2m3.5s"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class RateLimitExceeded(Exception):
+    """El proveedor siguió rechazando por límite de tasa después de todos los reintentos."""
+
+    def __init__(self, provider: str, retry_after: Optional[float] = None, detail: str = ""):
+        self.provider = provider
+        self.retry_after = retry_after
+        message = f"Límite de tasa de {provider} excedido, intenta más tarde"
+        super().__init__(f"{message}: {detail}" if detail else message)
+
+
+class ProviderHTTPError(Exception):
+    """Respuesta de error de un proveedor; conserva el código y las cabeceras para decidir si reintentar."""
+
+    def __init__(self, message: str, status_code: int, headers: Optional[Mapping[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TokenBucket:
+    """Bucket que se rellena de forma continua a `per_minute` unidades por minuto."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = float(per_minute)
+        self.level = self.per_minute
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Segundos hasta que haya `amount` unidades disponibles.
+
+        Una petición más grande que la capacidad del bucket espera a que esté
+        lleno (y lo deja en negativo) en lugar de esperar para siempre.
+        """
+        self._refill(now)
+        needed = min(amount, self.per_minute)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60.0 / self.per_minute
+
+    def available(self, now: float) -> float:
+        """Unidades disponibles ahora."""
+        self._refill(now)
+        return self.level
+
+    def take(self, amount: float) -> None:
+        """Descuenta unidades (ya comprobadas con wait_time)."""
+        self.level -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float) -> None:
+        """Ajusta el bucket con la cuota y el saldo que informa el proveedor."""
+        self._refill(now)
+        if limit and limit > 0:
+            self.per_minute = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+    def _refill(self, now: float) -> None:
+        """Suma lo acumulado desde la última consulta, sin pasar la capacidad."""
+        elapsed = max(0.0, now - self._updated)
+        self.level = min(self.per_minute, self.level + elapsed * self.per_minute / 60.0)
+        self._updated = now
+
+
+class ProviderRateLimiter:
+    """Token buckets, concurrencia adaptativa y reintentos de un proveedor."""
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        """
+        Args:
+            provider: Nombre del proveedor (aparece en errores y estadísticas)
+            requests_per_minute: Peticiones por minuto (0 = hasta que el proveedor informe su cuota)
+            tokens_per_minute: Tokens por minuto (0 = hasta que el proveedor informe su cuota)
+            max_concurrency: Techo de llamadas simultáneas
+            min_concurrency: Piso de llamadas simultáneas tras los 429
+            max_retries: Reintentos por llamada (opcional, usa settings.RATE_LIMIT_MAX_RETRIES)
+            base_delay: Espera base del backoff en segundos (opcional, usa settings)
+            max_delay: Espera máxima entre reintentos en segundos (opcional, usa settings)
+        """
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = settings.RATE_LIMIT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.RATE_LIMIT_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.RATE_LIMIT_MAX_DELAY if max_delay is None else max_delay
+
+        self._configured = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._buckets: Dict[str, TokenBucket] = {
+            kind: TokenBucket(per_minute)
+            for kind, per_minute in self._configured.items()
+            if per_minute and per_minute > 0
+        }
+        self.concurrency = float(self.max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._counts = {"calls": 0, "retries": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        tokens: int = 0,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> T:
+        """
+        Ejecuta fn dentro de los límites del proveedor, reintentando los fallos transitorios.
+
+        Si el resultado tiene `headers` (respuesta cruda de OpenAI), se usan
+        para ajustar los buckets.
+
+        Args:
+            fn: Llamada al proveedor
+            tokens: Tokens que consume la llamada (para el bucket de tokens)
+            retries: Reintentos máximos (opcional; 0 si el cuerpo no se puede reenviar)
+            deadline: Instante (time.monotonic) en que vence la llamada (opcional);
+                no se espera cuota ni se reintenta más allá de él
+
+        Returns:
+            Resultado de fn
+
+        Raises:
+            RateLimitExceeded: Si los 429 siguen después de todos los reintentos
+            DeadlineExceeded: Si el plazo vence esperando cuota
+        """
+        attempt = 0
+        while True:
+            with self.slot(tokens, deadline):
+                try:
+                    result = fn()
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, retries, deadline)
+                else:
+                    self._succeeded(getattr(result, "headers", None))
+                    return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> T:
+        """Versión async de call; fn retorna una corrutina nueva en cada intento."""
+        attempt = 0
+        while True:
+            async with self.aslot(tokens, deadline):
+                try:
+                    result = await fn()
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, retries, deadline)
+                else:
+                    self._succeeded(getattr(result, "headers", None))
+                    return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @contextmanager
+    def slot(self, tokens: int = 0, deadline: Optional[float] = None) -> Iterator[None]:
+        """Ocupa un lugar de concurrencia (y la cuota de una petición) mientras dura el bloque."""
+        self._begin_wait()
+        try:
+            while True:
+                wait = self._try_acquire(tokens, deadline)
+                if not wait:
+                    break
+                time.sleep(wait)
+        finally:
+            self._end_wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int = 0, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Versión async de slot (espera sin bloquear el event loop)."""
+        self._begin_wait()
+        try:
+            while True:
+                wait = self._try_acquire(tokens, deadline)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            self._end_wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def observe(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Ajusta los buckets con las cabeceras x-ratelimit-* de una respuesta."""
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for kind in ("requests", "tokens"):
+                limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                if limit is None and remaining is None:
+                    continue
+
+                bucket = self._buckets.get(kind)
+                configured = self._configured[kind]
+                # El límite configurado puede ser menor a la cuota (p. ej. para dejar margen a otro servicio)
+                if limit and configured and configured > 0:
+                    limit = min(limit, configured)
+                if bucket is None:
+                    if not limit:
+                        continue
+                    bucket = self._buckets[kind] = TokenBucket(limit)
+                bucket.sync(limit, remaining, now)
+
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and remaining <= 0 and reset:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna la concurrencia actual, los buckets y los contadores de llamadas y reintentos."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = {
+                kind: {"per_minute": bucket.per_minute, "available": round(bucket.available(now), 1)}
+                for kind, bucket in self._buckets.items()
+            }
+            return {
+                "concurrency": round(self.concurrency, 2),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "blocked_seconds": round(max(0.0, self._blocked_until - now), 2),
+                "buckets": buckets,
+                **self._counts,
+            }
+
+    def _try_acquire(self, tokens: int, deadline: Optional[float] = None) -> float:
+        """
+        Toma lugar y cuota si hay; si no, retorna cuántos segundos esperar.
+
+        Raises:
+            DeadlineExceeded: Si la cuota no alcanza antes del plazo
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = self._blocked_until - now
+            if self._in_flight >= int(self.concurrency):
+                wait = max(wait, _SLOT_POLL_SECONDS)
+            amounts = {"requests": 1, "tokens": tokens}
+            for kind, bucket in self._buckets.items():
+                wait = max(wait, bucket.wait_time(amounts[kind], now))
+            if wait > 0:
+                if deadline is not None and now + wait >= deadline:
+                    raise DeadlineExceeded(f"Sin cuota de {self.provider} antes del plazo")
+                return wait
+
+            for kind, bucket in self._buckets.items():
+                bucket.take(amounts[kind])
+            self._in_flight += 1
+            self._counts["calls"] += 1
+            return 0.0
+
+    def _release(self) -> None:
+        """Libera el lugar de concurrencia."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def _begin_wait(self) -> None:
+        """Cuenta una llamada esperando lugar o cuota."""
+        with self._lock:
+            self._waiting += 1
+
+    def _end_wait(self) -> None:
+        """Descuenta una llamada que dejó de esperar."""
+        with self._lock:
+            self._waiting -= 1
+
+    def _succeeded(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Aumento aditivo: +1 lugar por cada ventana completa de respuestas correctas."""
+        with self._lock:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+        self.observe(headers)
+
+    def _retry_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        retries: Optional[int],
+        deadline: Optional[float] = None
+    ) -> float:
+        """
+        Decide si un fallo se reintenta y cuánto esperar (backoff exponencial
+        con jitter completo, nunca menos que el Retry-After del proveedor).
+
+        Raises:
+            El error original si no es transitorio, se agotaron los reintentos
+            o el reintento empezaría después del plazo
+            RateLimitExceeded: Si era un 429 y no se puede reintentar
+        """
+        status, headers = _error_details(error)
+        if status is None:
+            raise error
+
+        retry_after = _retry_after(headers)
+        if status == 429:
+            self._rate_limited(headers, retry_after)
+
+        max_retries = self.max_retries if retries is None else retries
+        delay = max(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)), retry_after or 0.0)
+        past_deadline = deadline is not None and time.monotonic() + delay >= deadline
+        if attempt >= max_retries or past_deadline:
+            if status == 429:
+                raise RateLimitExceeded(self.provider, retry_after, str(error)) from error
+            raise error
+
+        with self._lock:
+            self._counts["retries"] += 1
+        return delay
+
+    def _rate_limited(self, headers: Mapping[str, str], retry_after: Optional[float]) -> None:
+        """Reducción multiplicativa de la concurrencia y pausa hasta Retry-After."""
+        now = time.monotonic()
+        with self._lock:
+            self._counts["rate_limited"] += 1
+            if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                self._last_decrease = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+        self.observe(headers)
+
+
+def _error_details(error: Exception) -> Tuple[Optional[int], Mapping[str, str]]:
+    """
+    Código de estado y cabeceras de un fallo transitorio (429, 408, 5xx o de
+    red, con código 0); (None, {}) si el fallo no se debe reintentar.
+    """
+    if isinstance(error, openai.APIStatusError):
+        status, headers = error.status_code, error.response.headers
+    elif isinstance(error, ProviderHTTPError):
+        status, headers = error.status_code, error.headers
+    elif isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return 0, {}
+    elif isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return 0, {}
+    else:
+        return None, {}
+
+    if status in (408, 429) or status >= 500:
+        return status, headers
+    return None, {}
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos de Retry-After (o retry-after-ms de OpenAI); None si no vino."""
+    milliseconds = _header_float(headers, "retry-after-ms")
+    if milliseconds is not None:
+        return milliseconds / 1000.0
+
+    value = headers.get("retry-after") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Cabecera numérica; None si falta o no es un número."""
+    value = headers.get(name) if headers else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Convierte "6m0s" o "20ms" a segundos; None si no tiene ese formato."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """
+    Retorna el limitador del proceso para un proveedor (se crea una sola vez).
+
+    Args:
+        provider: "openai" o "deepgram"
+    """
+    if provider not in _limiters:
+        with _limiters_lock:
+            if provider not in _limiters:
+                _limiters[provider] = _create_limiter(provider)
+    return _limiters[provider]
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Estadísticas de los limitadores creados hasta ahora."""
+    return {provider: limiter.stats() for provider, limiter in list(_limiters.items())}
+
+
+def _create_limiter(provider: str) -> ProviderRateLimiter:
+    """Crea el limitador de un proveedor con su configuración."""
+    if provider == "openai":
+        return ProviderRateLimiter(
+            "openai",
+            requests_per_minute=settings.OPENAI_RPM,
+            tokens_per_minute=settings.OPENAI_TPM,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            min_concurrency=settings.RATE_LIMIT_MIN_CONCURRENCY
+        )
+    if provider == "deepgram":
+        return ProviderRateLimiter(
+            "deepgram",
+            requests_per_minute=settings.DEEPGRAM_RPM,
+            max_concurrency=settings.DEEPGRAM_MAX_CONCURRENCY,
+            min_concurrency=settings.RATE_LIMIT_MIN_CONCURRENCY
+        )
+    return ProviderRateLimiter(provider, min_concurrency=settings.RATE_LIMIT_MIN_CONCURRENCY)
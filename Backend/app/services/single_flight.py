@@ -0,0 +1,150 @@
+"""
+Deduplicación de trabajos idénticos en curso (single-flight).
+Responsabilidad única: Si llega una petición igual a otra que todavía se está
+procesando, esperar el resultado de la primera en lugar de repetir el trabajo.
+
+Complementa a las cachés: la caché evita repetir un trabajo ya terminado y
+single-flight evita repetir uno que está en curso (p. ej. muchos usuarios
+pegando la URL de un video viral a la vez, antes de que exista el resultado).
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.config import settings
+
+
+class _Call:
+    """Trabajo en curso de SingleFlight."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    """Trabajo en curso de AsyncSingleFlight."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa las llamadas concurrentes con la misma clave (entre hilos)."""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Args:
+            enabled: Activar la deduplicación (opcional, usa settings.SINGLE_FLIGHT_ENABLED)
+        """
+        self.enabled = settings.SINGLE_FLIGHT_ENABLED if enabled is None else enabled
+        self._calls: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Ejecuta fn, o espera el resultado de la llamada en curso con la misma clave.
+
+        Si la llamada original falla, todas las que la esperaban reciben el
+        mismo error.
+
+        Args:
+            key: Clave que identifica el trabajo
+            fn: Función que hace el trabajo
+
+        Returns:
+            Tupla (resultado, compartido); compartido es True si el resultado
+            vino de otra llamada. El resultado es el mismo objeto para todas:
+            quien lo modifique debe copiarlo antes.
+        """
+        if not self.enabled:
+            return fn(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self, key: str) -> bool:
+        """True si hay una llamada en curso con esa clave."""
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna los trabajos en curso, los ejecutados y los que se ahorraron
+        (llamadas que esperaron el resultado de otra).
+        """
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+            }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    Variante async de SingleFlight para un event loop.
+
+    El trabajo corre en su propia tarea: si la petición que lo inició se
+    cancela (p. ej. el cliente se desconecta), las demás siguen esperando el
+    resultado. La tarea solo se cancela cuando ya nadie lo espera.
+    """
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Versión async de SingleFlight.do; fn retorna una corrutina."""
+        if not self.enabled:
+            return await fn(), False
+
+        call = self._calls.get(key)
+        shared = call is not None
+        if shared:
+            self._coalesced += 1
+        else:
+            call = _AsyncCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            self._executed += 1
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _AsyncCall) -> None:
+        """Quita el trabajo terminado de los que están en curso."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Evita el aviso de excepción no recuperada si nadie esperaba el resultado
+        if not call.task.cancelled():
+            call.task.exception()
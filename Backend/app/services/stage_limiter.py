@@ -0,0 +1,75 @@
+"""
+Límites de concurrencia por etapa del pipeline.
+Responsabilidad única: Acotar cuántos videos pueden estar a la vez en cada
+etapa (descarga, transcripción, análisis) cuando se procesan muchos en paralelo.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, AsyncIterator
+from app.config import settings
+
+
+class StageLimiter:
+    """Un semáforo async por etapa; las etapas sin límite no esperan."""
+
+    # Etapas del pipeline que se pueden limitar
+    STAGES = ("download", "transcribe", "analyze")
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Inicializa los semáforos.
+
+        Args:
+            limits: Máximo de videos simultáneos por etapa (opcional, usa settings;
+                un valor <= 0 desactiva el límite de esa etapa)
+        """
+        if limits is None:
+            limits = {
+                "download": settings.BATCH_DOWNLOAD_CONCURRENCY,
+                "transcribe": settings.BATCH_TRANSCRIBE_CONCURRENCY,
+                "analyze": settings.BATCH_ANALYZE_CONCURRENCY,
+            }
+
+        self.limits = {stage: limit for stage, limit in limits.items() if limit and limit > 0}
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.limits.items()}
+        self._active: Dict[str, int] = {stage: 0 for stage in self.STAGES}
+        self._waiting: Dict[str, int] = {stage: 0 for stage in self.STAGES}
+
+    @asynccontextmanager
+    async def slot(self, stage: str) -> AsyncIterator[None]:
+        """
+        Ocupa un lugar en la etapa mientras dura el bloque.
+
+        Args:
+            stage: Etapa (download, transcribe o analyze)
+        """
+        semaphore = self._semaphores.get(stage)
+        self._waiting[stage] = self._waiting.get(stage, 0) + 1
+        try:
+            if semaphore:
+                await semaphore.acquire()
+        finally:
+            self._waiting[stage] -= 1
+
+        self._active[stage] = self._active.get(stage, 0) + 1
+        try:
+            yield
+        finally:
+            self._active[stage] -= 1
+            if semaphore:
+                semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Retorna, por etapa, el límite, los videos en curso y los que esperan lugar."""
+        return {
+            stage: {
+                "limit": self.limits.get(stage),
+                "active": self._active.get(stage, 0),
+                "waiting": self._waiting.get(stage, 0),
+            }
+            for stage in self.STAGES
+        }
+
+
+# Limitador sin límites (el comportamiento de una petición individual)
+UNLIMITED = StageLimiter(limits={})
@@ -1,23 +1,30 @@
+import asyncio
 from typing import Optional, Dict, Any, List
 from uuid import UUID
-from supabase import create_client, Client
+from supabase import create_client, acreate_client, Client, AsyncClient
+from supabase.lib.client_options import SyncClientOptions, AsyncClientOptions
 from app.config import settings
+from app.services.http_pool import HttpClientPool, get_http_pool
+from app.services.metrics import get_metrics
 
 
 class SupabaseService:
     """Servicio para operaciones con Supabase."""
     
-    def __init__(self):
-        """Inicializa el cliente de Supabase."""
-        settings.validate()
-        supabase_key = settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_KEY
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        """
+        Inicializa el cliente de Supabase.
         
-        if not supabase_key:
-            raise ValueError("SUPABASE_KEY o SUPABASE_SERVICE_KEY debe estar configurado")
+        Args:
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+        """
+        supabase_key = self._supabase_key()
         
+        self.http_pool = http_pool or get_http_pool()
         self.client: Client = create_client(
             settings.SUPABASE_URL,
-            supabase_key
+            supabase_key,
+            options=SyncClientOptions(httpx_client=self.http_pool.httpx_client())
         )
     
     def save_video_analysis(
@@ -49,28 +56,13 @@ class SupabaseService:
         Returns:
             Diccionario con el análisis guardado
         """
-        data = {
-            "user_id": user_id,
-            "video_url": video_url,
-        }
-        
-        # Agregar campos opcionales solo si tienen valor
-        if transcript:
-            data["transcript"] = transcript
-        if hook:
-            data["hook"] = hook
-        if script_base:
-            data["script_base"] = script_base
-        if video_title:
-            data["video_title"] = video_title
-        if video_duration:
-            data["video_duration"] = video_duration
-        if platform:
-            data["platform"] = platform
-        if metadata:
-            data["metadata"] = metadata
+        data = self._video_analysis_data(
+            user_id, video_url, transcript, hook, script_base,
+            video_title, video_duration, platform, metadata
+        )
         
-        result = self.client.table("video_analyses").insert(data).execute()
+        with get_metrics().time_stage("supabase", "insert_video_analyses"):
+            result = self.client.table("video_analyses").insert(data).execute()
         
         if not result.data:
             raise Exception("No se pudo guardar el análisis")
@@ -97,15 +89,16 @@ class SupabaseService:
         try:
             user_id = user_id.strip()
             
-            result = (
-                self.client.table("video_analyses")
-                .select("*")
-                .eq("user_id", user_id)
-                .order("created_at", desc=True)
-                .limit(limit or 50)
-                .offset(offset or 0)
-                .execute()
-            )
+            with get_metrics().time_stage("supabase", "select_video_analyses"):
+                result = (
+                    self.client.table("video_analyses")
+                    .select("*")
+                    .eq("user_id", user_id)
+                    .order("created_at", desc=True)
+                    .limit(limit or 50)
+                    .offset(offset or 0)
+                    .execute()
+                )
             
             return result.data if result.data else []
         except Exception as e:
@@ -142,6 +135,113 @@ class SupabaseService:
         Returns:
             Diccionario con el hook guardado
         """
+        data = self._viral_hook_data(
+            user_id, idea_input, hook_text, hook_type,
+            retention_score, niche, metadata, notes
+        )
+        
+        with get_metrics().time_stage("supabase", "insert_viral_hooks"):
+            result = self.client.table("viral_hooks").insert(data).execute()
+        
+        if not result.data:
+            raise Exception("No se pudo guardar el hook")
+        
+        return result.data[0]
+    
+    def get_viral_hooks(
+        self,
+        user_id: str,
+        limit: Optional[int] = 50,
+        offset: Optional[int] = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene los hooks virales de un usuario.
+        
+        Args:
+            user_id: ID del usuario
+            limit: Número máximo de resultados (default: 50)
+            offset: Número de resultados a saltar (default: 0)
+            
+        Returns:
+            Lista de hooks virales del usuario
+        """
+        try:
+            user_id = user_id.strip()
+            
+            with get_metrics().time_stage("supabase", "select_viral_hooks"):
+                result = (
+                    self.client.table("viral_hooks")
+                    .select("*")
+                    .eq("user_id", user_id)
+                    .order("created_at", desc=True)
+                    .limit(limit or 50)
+                    .offset(offset or 0)
+                    .execute()
+                )
+            
+            return result.data if result.data else []
+        except Exception as e:
+            raise Exception(f"Error al obtener hooks virales: {str(e)}")
+    
+    @staticmethod
+    def _supabase_key() -> str:
+        """Retorna la service key (o la anon key si no hay service key)."""
+        settings.validate()
+        supabase_key = settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_KEY
+        
+        if not supabase_key:
+            raise ValueError("SUPABASE_KEY o SUPABASE_SERVICE_KEY debe estar configurado")
+        
+        return supabase_key
+    
+    @staticmethod
+    def _video_analysis_data(
+        user_id: str,
+        video_url: str,
+        transcript: Optional[str],
+        hook: Optional[str],
+        script_base: Optional[str],
+        video_title: Optional[str],
+        video_duration: Optional[int],
+        platform: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Arma la fila de video_analyses."""
+        data = {
+            "user_id": user_id,
+            "video_url": video_url,
+        }
+        
+        # Agregar campos opcionales solo si tienen valor
+        if transcript:
+            data["transcript"] = transcript
+        if hook:
+            data["hook"] = hook
+        if script_base:
+            data["script_base"] = script_base
+        if video_title:
+            data["video_title"] = video_title
+        if video_duration:
+            data["video_duration"] = video_duration
+        if platform:
+            data["platform"] = platform
+        if metadata:
+            data["metadata"] = metadata
+        
+        return data
+    
+    @staticmethod
+    def _viral_hook_data(
+        user_id: str,
+        idea_input: str,
+        hook_text: str,
+        hook_type: Optional[str],
+        retention_score: Optional[float],
+        niche: Optional[str],
+        metadata: Optional[Dict[str, Any]],
+        notes: Optional[str]
+    ) -> Dict[str, Any]:
+        """Arma la fila de viral_hooks."""
         data = {
             "user_id": user_id,
             "idea_input": idea_input,
@@ -159,44 +259,149 @@ class SupabaseService:
         if notes:
             data["notes"] = notes
         
-        result = self.client.table("viral_hooks").insert(data).execute()
+        return data
+
+
+class AsyncSupabaseService(SupabaseService):
+    """
+    Variante async de SupabaseService (AsyncClient de supabase-py).
+    
+    El cliente se crea en el primer uso (acreate_client es async) sobre el
+    httpx.AsyncClient compartido del pool HTTP.
+    """
+    
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        """
+        Prepara el servicio; el cliente de Supabase se crea en el primer uso.
+        
+        Args:
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+        """
+        self.supabase_key = self._supabase_key()
+        self.http_pool = http_pool or get_http_pool()
+        self._client: Optional[AsyncClient] = None
+        self._client_http = None
+        self._client_lock = asyncio.Lock()
+    
+    async def get_client(self) -> AsyncClient:
+        """
+        Retorna el cliente async de Supabase, creándolo si hace falta.
+        
+        Se vuelve a crear si el pool HTTP cerró su cliente (p. ej. al reiniciar la app).
+        """
+        http_client = self.http_pool.async_httpx_client()
+        if self._client is None or self._client_http is not http_client:
+            async with self._client_lock:
+                if self._client is None or self._client_http is not http_client:
+                    self._client = await acreate_client(
+                        settings.SUPABASE_URL,
+                        self.supabase_key,
+                        options=AsyncClientOptions(httpx_client=http_client)
+                    )
+                    self._client_http = http_client
+        return self._client
+    
+    async def save_video_analysis(
+        self,
+        user_id: str,
+        video_url: str,
+        transcript: Optional[str] = None,
+        hook: Optional[str] = None,
+        script_base: Optional[str] = None,
+        video_title: Optional[str] = None,
+        video_duration: Optional[int] = None,
+        platform: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Versión async de SupabaseService.save_video_analysis."""
+        data = self._video_analysis_data(
+            user_id, video_url, transcript, hook, script_base,
+            video_title, video_duration, platform, metadata
+        )
+        
+        client = await self.get_client()
+        with get_metrics().time_stage("supabase", "insert_video_analyses"):
+            result = await client.table("video_analyses").insert(data).execute()
         
         if not result.data:
-            raise Exception("No se pudo guardar el hook")
+            raise Exception("No se pudo guardar el análisis")
         
         return result.data[0]
     
-    def get_viral_hooks(
+    async def get_video_analyses(
         self,
         user_id: str,
         limit: Optional[int] = 50,
         offset: Optional[int] = 0
     ) -> List[Dict[str, Any]]:
-        """
-        Obtiene los hooks virales de un usuario.
-        
-        Args:
-            user_id: ID del usuario
-            limit: Número máximo de resultados (default: 50)
-            offset: Número de resultados a saltar (default: 0)
+        """Versión async de SupabaseService.get_video_analyses."""
+        try:
+            user_id = user_id.strip()
             
-        Returns:
-            Lista de hooks virales del usuario
-        """
+            client = await self.get_client()
+            with get_metrics().time_stage("supabase", "select_video_analyses"):
+                result = await (
+                    client.table("video_analyses")
+                    .select("*")
+                    .eq("user_id", user_id)
+                    .order("created_at", desc=True)
+                    .limit(limit or 50)
+                    .offset(offset or 0)
+                    .execute()
+                )
+            
+            return result.data if result.data else []
+        except Exception as e:
+            raise Exception(f"Error al obtener análisis de video: {str(e)}")
+    
+    async def save_viral_hook(
+        self,
+        user_id: str,
+        idea_input: str,
+        hook_text: str,
+        hook_type: Optional[str] = None,
+        retention_score: Optional[float] = None,
+        niche: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        notes: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Versión async de SupabaseService.save_viral_hook."""
+        data = self._viral_hook_data(
+            user_id, idea_input, hook_text, hook_type,
+            retention_score, niche, metadata, notes
+        )
+        
+        client = await self.get_client()
+        with get_metrics().time_stage("supabase", "insert_viral_hooks"):
+            result = await client.table("viral_hooks").insert(data).execute()
+        
+        if not result.data:
+            raise Exception("No se pudo guardar el hook")
+        
+        return result.data[0]
+    
+    async def get_viral_hooks(
+        self,
+        user_id: str,
+        limit: Optional[int] = 50,
+        offset: Optional[int] = 0
+    ) -> List[Dict[str, Any]]:
+        """Versión async de SupabaseService.get_viral_hooks."""
         try:
             user_id = user_id.strip()
             
-            result = (
-                self.client.table("viral_hooks")
-                .select("*")
-                .eq("user_id", user_id)
-                .order("created_at", desc=True)
-                .limit(limit or 50)
-                .offset(offset or 0)
-                .execute()
-            )
+            client = await self.get_client()
+            with get_metrics().time_stage("supabase", "select_viral_hooks"):
+                result = await (
+                    client.table("viral_hooks")
+                    .select("*")
+                    .eq("user_id", user_id)
+                    .order("created_at", desc=True)
+                    .limit(limit or 50)
+                    .offset(offset or 0)
+                    .execute()
+                )
             
             return result.data if result.data else []
         except Exception as e:
             raise Exception(f"Error al obtener hooks virales: {str(e)}")
-
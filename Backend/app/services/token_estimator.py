@@ -0,0 +1,119 @@
+"""
+Estimación local de tokens.
+Responsabilidad única: Estimar cuántos tokens ocupa un texto o un prompt y
+cuál es la ventana de contexto de cada modelo, sin llamar a OpenAI.
+
+Si tiktoken está instalado se usa el tokenizer del modelo; si no (o si no
+puede cargar su vocabulario, p. ej. sin red), se usa una aproximación por
+caracteres que sobreestima un poco para el español.
+"""
+import math
+import threading
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # Dependencia opcional: sin ella se usa la aproximación por caracteres
+    tiktoken = None
+
+
+# Caracteres por token de la aproximación (el español ronda 3.5-4 con los tokenizers de OpenAI)
+CHARS_PER_TOKEN = 3.5
+# Tokens extra por mensaje (rol y separadores) y por respuesta (formato del chat)
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+# Ventana de contexto por prefijo de modelo (se usa el primer prefijo que coincide)
+_CONTEXT_WINDOWS = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-5", 400_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("gpt-4-32k", 32_768),
+    ("gpt-4", 8_192),
+    ("gpt-3.5-turbo-instruct", 4_096),
+    ("gpt-3.5-turbo", 16_385),
+)
+# Ventana de un modelo desconocido (la más chica de los modelos de chat actuales)
+_DEFAULT_CONTEXT_WINDOW = 16_385
+
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Tokens de un texto.
+
+    Args:
+        text: Texto a medir
+        model: Modelo cuyo tokenizer usar (opcional)
+
+    Returns:
+        Cantidad de tokens (exacta con tiktoken, aproximada sin él)
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model or settings.OPENAI_MODEL)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+    """Tokens de prompt de una conversación (contenido más el formato de cada mensaje)."""
+    return _TOKENS_PER_REPLY + sum(
+        _TOKENS_PER_MESSAGE + estimate_tokens(message.get("content") or "", model)
+        for message in messages
+    )
+
+
+def chars_for_tokens(tokens: int) -> int:
+    """Caracteres de texto que caben, de forma conservadora, en `tokens` tokens."""
+    return max(0, int(tokens * CHARS_PER_TOKEN))
+
+
+def context_window(model: str) -> int:
+    """
+    Ventana de contexto (prompt + respuesta) de un modelo.
+
+    LLM_CONTEXT_WINDOW, si es mayor a 0, reemplaza a la tabla (p. ej. para
+    modelos nuevos o desplegados en otro proveedor).
+    """
+    if settings.LLM_CONTEXT_WINDOW > 0:
+        return settings.LLM_CONTEXT_WINDOW
+
+    # Modelos fine-tuned: "ft:gpt-4o-mini-2024-07-18:org::id"
+    name = model[3:] if model.startswith("ft:") else model
+    for prefix, window in _CONTEXT_WINDOWS:
+        if name.startswith(prefix):
+            return window
+    return _DEFAULT_CONTEXT_WINDOW
+
+
+def _encoding(model: str) -> Any:
+    """Tokenizer de tiktoken del modelo (None si no está disponible); se carga una vez por modelo."""
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        with _encodings_lock:
+            if model not in _encodings:
+                _encodings[model] = _load_encoding(model)
+    return _encodings[model]
+
+
+def _load_encoding(model: str) -> Any:
+    """Carga el tokenizer; tiktoken descarga el vocabulario la primera vez y puede fallar sin red."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
@@ -0,0 +1,74 @@
+"""
+División de transcripts largos en fragmentos.
+Responsabilidad única: Partir un transcript en fragmentos de tamaño acotado
+sin cortar oraciones, para corregirlos en paralelo y volver a unirlos en orden.
+"""
+import re
+from typing import List
+
+
+# Fin de oración: puntuación final seguida de espacio (no corta "3.5" ni "etc.,")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Separa un texto en oraciones.
+
+    Args:
+        text: Texto a separar
+
+    Returns:
+        Oraciones sin espacios sobrantes (las vacías se descartan)
+    """
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def chunk_transcript(text: str, max_chars: int) -> List[str]:
+    """
+    Agrupa las oraciones de un transcript en fragmentos de hasta max_chars.
+
+    Una oración más larga que max_chars (p. ej. un transcript sin puntuación)
+    se parte por espacios.
+
+    Args:
+        text: Transcript completo
+        max_chars: Tamaño máximo de cada fragmento en caracteres
+
+    Returns:
+        Fragmentos en orden; unidos con espacios reproducen el texto
+    """
+    text = text.strip()
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    current = ""
+    for sentence in split_sentences(text):
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Parte una oración más larga que max_chars por espacios."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    pieces: List[str] = []
+    current = ""
+    for word in sentence.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
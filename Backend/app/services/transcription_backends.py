@@ -0,0 +1,418 @@
+"""
+Motores de transcripción.
+Responsabilidad única: Convertir audio en texto con un proveedor concreto.
+
+TranscriptionService se encarga de ffmpeg, la huella acústica y la división
+en segmentos; cada motor solo recibe audio y retorna el texto y las palabras
+con sus tiempos. Hay dos motores registrados:
+
+- deepgram: API de Deepgram (prerecorded por HTTP y live por WebSocket)
+- local: faster-whisper en CPU, sin red; sirve para absorber carga cuando el
+  proveedor falla y para correr el pipeline completo en benchmarks offline
+"""
+import asyncio
+import io
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, IO, Iterable, Optional, Tuple, Type, Union
+import httpx
+import numpy as np
+import requests
+from app.config import settings
+from app.services.http_pool import HttpClientPool, get_http_pool
+from app.services.metrics import get_metrics
+from app.services.live_transcription import DeepgramLiveTranscriber
+from app.services.rate_limiter import ProviderHTTPError, ProviderRateLimiter, RateLimitExceeded, get_rate_limiter
+from app.services.audio_fingerprint import SAMPLE_RATE
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:  # Dependencia opcional (requirements-local.txt): solo la necesita el motor local
+    WhisperModel = None
+
+
+# Tamaño de lectura de los archivos que se suben
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class TranscriptionBackend(ABC):
+    """
+    Interfaz de un motor de transcripción.
+
+    Los resultados son diccionarios con transcript (texto) y words (palabras
+    con word/punctuated_word y start/end en segundos), el formato que usa
+    stitch_transcripts para unir segmentos.
+    """
+
+    name = ""
+    # Perfil de AUDIO_PROFILES que exige el motor (None = acepta cualquiera)
+    audio_profile: Optional[str] = None
+
+    @property
+    def streaming(self) -> str:
+        """
+        Cómo recibe el audio el modo streaming: "upload" (el archivo codificado
+        con el perfil de subida, en chunks) o "pcm" (PCM 16 bits mono a 16 kHz
+        sin cabecera).
+        """
+        return "upload"
+
+    @abstractmethod
+    def transcribe_audio(self, body: Union[IO[bytes], Iterable[bytes]], content_type: str) -> Dict[str, Any]:
+        """
+        Transcribe audio completo (prerecorded).
+
+        Args:
+            body: Archivo abierto o iterable de chunks
+            content_type: Content-Type del audio
+
+        Returns:
+            Diccionario con transcript y words
+
+        Raises:
+            Exception: Si falla la transcripción o no hay texto
+        """
+
+    async def atranscribe_file(self, audio_path: str, content_type: str) -> Dict[str, Any]:
+        """Transcribe un archivo sin bloquear el event loop (por defecto, en un hilo)."""
+        return await asyncio.to_thread(self.transcribe_file, audio_path, content_type)
+
+    def transcribe_file(self, audio_path: str, content_type: str) -> Dict[str, Any]:
+        """Transcribe un archivo de audio."""
+        with open(audio_path, "rb") as audio_file:
+            return self.transcribe_audio(audio_file, content_type)
+
+    @abstractmethod
+    def transcribe_pcm(self, pcm_chunks: Iterable[bytes]) -> str:
+        """
+        Transcribe PCM 16 bits mono a 16 kHz a medida que llega (solo motores
+        con streaming == "pcm").
+
+        Returns:
+            Texto transcrito
+        """
+
+
+class DeepgramBackend(TranscriptionBackend):
+    """Motor de Deepgram: endpoint prerecorded por HTTP y live por WebSocket."""
+
+    name = "deepgram"
+
+    def __init__(
+        self,
+        http_pool: Optional[HttpClientPool] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None
+    ):
+        """
+        Args:
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+            rate_limiter: Límites de tasa de Deepgram (opcional, usa el del proceso)
+
+        Raises:
+            ValueError: Si falta la API key o el backend de streaming no es válido
+        """
+        if not settings.DEEPGRAM_API_KEY:
+            raise ValueError("DEEPGRAM_API_KEY no está configurado")
+
+        self.api_key = settings.DEEPGRAM_API_KEY
+        self.language = os.getenv("DEEPGRAM_LANGUAGE", "es")
+        self.model = os.getenv("DEEPGRAM_MODEL", "nova-2")
+        self.base_url = settings.DEEPGRAM_URL
+        self.live_url = settings.DEEPGRAM_LIVE_URL
+        self.stream_backend = settings.TRANSCRIPTION_STREAM_BACKEND
+        self.http_pool = http_pool or get_http_pool()
+        self.rate_limiter = rate_limiter or get_rate_limiter("deepgram")
+
+        if self.stream_backend not in STREAM_BACKENDS:
+            raise ValueError(
+                f"TRANSCRIPTION_STREAM_BACKEND no válido: {self.stream_backend}. "
+                f"Usa: {', '.join(STREAM_BACKENDS)}"
+            )
+
+    @property
+    def streaming(self) -> str:
+        """El backend live recibe PCM crudo; prerecorded, el audio codificado."""
+        return "pcm" if self.stream_backend == "live" else "upload"
+
+    def transcribe_audio(self, body: Union[IO[bytes], Iterable[bytes]], content_type: str) -> Dict[str, Any]:
+        """
+        Sube el audio a Deepgram (transferencia chunked si es un iterable).
+
+        Los 429 y errores transitorios se reintentan solo si el cuerpo se puede
+        volver a leer (un archivo); un iterable se consume en el primer intento.
+        """
+        rewindable = hasattr(body, "seekable") and body.seekable()
+        start = body.tell() if rewindable else 0
+        headers, params = self._request(content_type)
+
+        def upload() -> Dict[str, Any]:
+            if rewindable:
+                body.seek(start)
+            # Session compartida: reutiliza la conexión keep-alive con Deepgram
+            response = self.http_pool.session().post(
+                self.base_url,
+                headers=headers,
+                params=params,
+                data=body,
+                timeout=300
+            )
+            return self._result_from_response(response)
+
+        try:
+            with get_metrics().time_stage("deepgram", "prerecorded"):
+                return self.rate_limiter.call(upload, retries=None if rewindable else 0)
+
+        except RateLimitExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error en Deepgram API: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error en Deepgram: {str(e)}")
+
+    async def atranscribe_file(self, audio_path: str, content_type: str) -> Dict[str, Any]:
+        """Sube el archivo con el httpx.AsyncClient compartido, sin ocupar un hilo."""
+        # Cada reintento vuelve a leer el archivo desde el principio
+        return await self._aupload(lambda: _read_file_chunks(audio_path), content_type, retries=None)
+
+    async def atranscribe_audio(self, body: Union[bytes, AsyncIterator[bytes]], content_type: str) -> Dict[str, Any]:
+        """Versión async de transcribe_audio (solo se reintenta si body son bytes)."""
+        return await self._aupload(lambda: body, content_type, retries=None if isinstance(body, bytes) else 0)
+
+    async def _aupload(
+        self,
+        make_body: Callable[[], Union[bytes, AsyncIterator[bytes]]],
+        content_type: str,
+        retries: Optional[int]
+    ) -> Dict[str, Any]:
+        """Sube a Deepgram el cuerpo que arma make_body (una vez por intento)."""
+        headers, params = self._request(content_type)
+
+        async def upload() -> Dict[str, Any]:
+            response = await self.http_pool.async_httpx_client().post(
+                self.base_url,
+                headers=headers,
+                params=params,
+                content=make_body(),
+                timeout=300
+            )
+            return self._result_from_response(response)
+
+        try:
+            with get_metrics().time_stage("deepgram", "prerecorded"):
+                return await self.rate_limiter.acall(upload, retries=retries)
+
+        except RateLimitExceeded:
+            raise
+        except httpx.HTTPError as e:
+            raise Exception(f"Error en Deepgram API: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error en Deepgram: {str(e)}")
+
+    def transcribe_pcm(self, pcm_chunks: Iterable[bytes]) -> str:
+        """Envía el PCM por el WebSocket de Deepgram mientras se decodifica."""
+        # Ocupa un lugar de concurrencia de Deepgram; el PCM no se puede reenviar, no hay reintentos
+        with self.rate_limiter.slot(), get_metrics().time_stage("deepgram", "live"):
+            return self._live_transcriber().transcribe(pcm_chunks)
+
+    def _live_transcriber(self) -> DeepgramLiveTranscriber:
+        """Cliente WebSocket de Deepgram para PCM 16 bits mono a 16 kHz."""
+        _, params = self._request("audio/raw")
+        return DeepgramLiveTranscriber(
+            url=self.live_url,
+            api_key=self.api_key,
+            params={
+                **params,
+                "encoding": "linear16",
+                "sample_rate": str(SAMPLE_RATE),
+                "channels": "1",
+                "interim_results": "true",
+            }
+        )
+
+    def _request(self, content_type: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Headers y parámetros de la petición a Deepgram."""
+        headers = {
+            "Authorization": f"Token {self.api_key}",
+            "Content-Type": content_type,
+        }
+
+        params = {
+            "model": self.model,
+            "language": self.language,
+            "smart_format": "true",
+        }
+
+        return headers, params
+
+    @staticmethod
+    def _result_from_response(response: Union[requests.Response, httpx.Response]) -> Dict[str, Any]:
+        """
+        Extrae el transcript y las palabras con sus tiempos de la respuesta de Deepgram.
+
+        Raises:
+            Exception: Si Deepgram respondió con error o sin transcripción
+        """
+        if response.status_code != 200:
+            error_detail = response.text
+            try:
+                error_json = response.json()
+                if "err" in error_json:
+                    error_detail = error_json["err"].get("message", str(error_json))
+                elif "message" in error_json:
+                    error_detail = error_json["message"]
+            except Exception:
+                pass
+            raise ProviderHTTPError(
+                f"Error en Deepgram API ({response.status_code}): {error_detail}",
+                response.status_code,
+                response.headers
+            )
+
+        result = response.json()
+
+        alternative = result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0]
+        transcript = alternative.get("transcript", "")
+
+        if not transcript:
+            raise Exception("No se pudo generar transcripción")
+
+        return {"transcript": transcript, "words": alternative.get("words", [])}
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Motor local con faster-whisper (CTranslate2) en CPU.
+
+    El modelo se carga una sola vez por proceso, la primera vez que se usa, y
+    se comparte entre instancias. Recibe WAV sin codificar; en modo streaming
+    acumula el PCM y lo transcribe al terminar la descarga.
+    """
+
+    name = "local"
+    audio_profile = "wav"
+
+    _models: Dict[Tuple[str, str, int, int], Any] = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        """
+        Args:
+            http_pool: No se usa (firma común a todos los motores)
+
+        Raises:
+            ValueError: Si faster-whisper no está instalado
+        """
+        if WhisperModel is None:
+            raise ValueError(
+                "El motor de transcripción local necesita faster-whisper: pip install -r requirements-local.txt"
+            )
+
+        self.model_name = settings.LOCAL_STT_MODEL
+        self.compute_type = settings.LOCAL_STT_COMPUTE_TYPE
+        self.threads = settings.LOCAL_STT_THREADS
+        self.workers = max(1, settings.LOCAL_STT_WORKERS)
+        self.language = os.getenv("DEEPGRAM_LANGUAGE", "es")
+
+    @property
+    def streaming(self) -> str:
+        """El motor local recibe PCM crudo."""
+        return "pcm"
+
+    def transcribe_audio(self, body: Union[IO[bytes], Iterable[bytes]], content_type: str) -> Dict[str, Any]:
+        """Transcribe un WAV (archivo abierto o chunks)."""
+        if not hasattr(body, "read"):
+            body = io.BytesIO(b"".join(body))
+        return self._transcribe(body)
+
+    def transcribe_pcm(self, pcm_chunks: Iterable[bytes]) -> str:
+        """Transcribe el PCM completo cuando termina el stream."""
+        raw = b"".join(pcm_chunks)
+        raw = raw[:len(raw) - len(raw) % 2]
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        return self._transcribe(samples)["transcript"]
+
+    def _transcribe(self, audio: Union[IO[bytes], np.ndarray]) -> Dict[str, Any]:
+        """Corre el modelo y arma el resultado con el formato de Deepgram."""
+        try:
+            segments, _ = self._model().transcribe(
+                audio,
+                language=self.language,
+                word_timestamps=True,
+                vad_filter=True
+            )
+            texts = []
+            words = []
+            # segments es un generador: la transcripción ocurre al recorrerlo
+            for segment in segments:
+                texts.append(segment.text.strip())
+                for word in segment.words or []:
+                    text = word.word.strip()
+                    words.append({
+                        "word": text.lower(),
+                        "punctuated_word": text,
+                        "start": word.start,
+                        "end": word.end,
+                    })
+        except Exception as e:
+            raise Exception(f"Error en transcripción local: {str(e)}")
+
+        transcript = " ".join(text for text in texts if text)
+        if not transcript:
+            raise Exception("No se pudo generar transcripción")
+
+        return {"transcript": transcript, "words": words}
+
+    def _model(self):
+        """Modelo de faster-whisper compartido (se descarga y carga la primera vez)."""
+        key = (self.model_name, self.compute_type, self.threads, self.workers)
+        with self._models_lock:
+            if key not in self._models:
+                self._models[key] = WhisperModel(
+                    self.model_name,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.threads,
+                    num_workers=self.workers
+                )
+            return self._models[key]
+
+
+# Backends de transcripción del modo streaming de Deepgram
+STREAM_BACKENDS = ("prerecorded", "live")
+
+# Motores registrados por nombre
+TRANSCRIPTION_BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    DeepgramBackend.name: DeepgramBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+
+
+def create_backend(name: str, http_pool: Optional[HttpClientPool] = None) -> TranscriptionBackend:
+    """
+    Crea un motor de transcripción por nombre.
+
+    Args:
+        name: Nombre registrado en TRANSCRIPTION_BACKENDS
+        http_pool: Pool de conexiones HTTP (opcional)
+
+    Raises:
+        ValueError: Si el motor no existe o no está disponible
+    """
+    if name not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(
+            f"Motor de transcripción no válido: {name}. "
+            f"Usa: {', '.join(TRANSCRIPTION_BACKENDS)}"
+        )
+    return TRANSCRIPTION_BACKENDS[name](http_pool)
+
+
+async def _read_file_chunks(path: str) -> AsyncIterator[bytes]:
+    """Lee un archivo en chunks para subirlo con transferencia chunked."""
+    with open(path, "rb") as audio_file:
+        while True:
+            chunk = audio_file.read(_UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
@@ -1,30 +1,141 @@
+import asyncio
+import itertools
 import os
 import subprocess
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, IO, Iterable, Iterator, Dict, Any, List, Tuple
+import numpy as np
 from app.config import settings
+from app.services.http_pool import HttpClientPool, get_http_pool
+from app.services.metrics import get_metrics
+from app.services.transcription_backends import (
+    TRANSCRIPTION_BACKENDS,
+    TranscriptionBackend,
+    create_backend,
+)
+from app.services.audio_chunking import plan_segments, stitch_transcripts, wav_duration, write_segment
+from app.services.audio_fingerprint import (
+    AudioFingerprintIndex,
+    SAMPLE_RATE,
+    compute_fingerprint,
+    read_wav_samples,
+)
+
+
+# Tamaño de lectura de la salida de ffmpeg en modo streaming
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Perfiles de codificación del audio que se sube al motor de transcripción
+AUDIO_PROFILES: Dict[str, Dict[str, Any]] = {
+    # PCM sin comprimir (~1.9 MB por minuto)
+    "wav": {
+        "extension": ".wav",
+        "content_type": "audio/wav",
+        "ffmpeg_args": ["-f", "wav"],
+    },
+    # Sin pérdida (~40-60% del WAV); transcripción idéntica
+    "flac": {
+        "extension": ".flac",
+        "content_type": "audio/flac",
+        "ffmpeg_args": ["-c:a", "flac", "-compression_level", "5", "-f", "flac"],
+    },
+    # Con pérdida, optimizado para voz (~0.18 MB por minuto a 24 kbps)
+    "opus": {
+        "extension": ".ogg",
+        "content_type": "audio/ogg",
+        "ffmpeg_args": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"],
+    },
+}
+
+
+class NonStreamableMediaError(Exception):
+    """Se lanza cuando ffmpeg no puede decodificar el video leyendo desde un pipe."""
 
 
 class TranscriptionService:
-    """Servicio responsable de transcribir audio/video a texto usando Deepgram."""
+    """
+    Servicio responsable de transcribir audio/video a texto.
+    
+    La conversión de audio a texto la hace un motor de transcription_backends
+    (Deepgram por defecto, o el motor local), elegido por configuración o por
+    petición; este servicio extrae y codifica el audio, consulta la huella
+    acústica y divide el audio largo en segmentos.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        fingerprint_index: Optional[AudioFingerprintIndex] = None,
+        http_pool: Optional[HttpClientPool] = None
+    ):
         """
-        Inicializa el servicio de transcripción con Deepgram.
+        Inicializa el servicio de transcripción con el motor configurado.
+        
+        Args:
+            fingerprint_index: Índice de huellas acústicas para reutilizar
+                transcripciones de audio ya transcrito (opcional)
+            http_pool: Pool de conexiones HTTP (opcional, usa el del proceso)
+        
+        Raises:
+            ValueError: Si la configuración del motor o del audio no es válida
+        """
+        self.fingerprint_index = fingerprint_index
+        self.http_pool = http_pool or get_http_pool()
+        self.audio_profile = settings.TRANSCRIPTION_AUDIO_PROFILE
+        self.chunk_seconds = settings.TRANSCRIPTION_CHUNK_SECONDS
+        self.backend_name = settings.TRANSCRIPTION_BACKEND
+        self.fallback_backend = settings.TRANSCRIPTION_FALLBACK_BACKEND or None
+        self._backends: Dict[str, TranscriptionBackend] = {}
+        self._backends_lock = threading.Lock()
+        
+        if self.audio_profile not in AUDIO_PROFILES:
+            raise ValueError(
+                f"TRANSCRIPTION_AUDIO_PROFILE no válido: {self.audio_profile}. "
+                f"Usa: {', '.join(AUDIO_PROFILES)}"
+            )
+        if self.fallback_backend and self.fallback_backend not in TRANSCRIPTION_BACKENDS:
+            raise ValueError(
+                f"TRANSCRIPTION_FALLBACK_BACKEND no válido: {self.fallback_backend}. "
+                f"Usa: {', '.join(TRANSCRIPTION_BACKENDS)}"
+            )
+        
+        # El motor por defecto se crea al inicio para fallar pronto si falta configuración
+        self.get_backend()
+    
+    def get_backend(self, name: Optional[str] = None) -> TranscriptionBackend:
         """
-        if not settings.DEEPGRAM_API_KEY:
-            raise ValueError("DEEPGRAM_API_KEY no está configurado")
+        Retorna el motor de transcripción (se crea la primera vez que se pide).
+        
+        Args:
+            name: Nombre del motor (opcional, usa TRANSCRIPTION_BACKEND)
         
-        self.api_key = settings.DEEPGRAM_API_KEY
-        self.language = os.getenv("DEEPGRAM_LANGUAGE", "es")
-        self.model = os.getenv("DEEPGRAM_MODEL", "nova-2")
-        self.base_url = "https://api.deepgram.com/v1/listen"
+        Raises:
+            ValueError: Si el motor no existe o no está disponible
+        """
+        name = name or self.backend_name
+        with self._backends_lock:
+            if name not in self._backends:
+                self._backends[name] = create_backend(name, self.http_pool)
+            return self._backends[name]
+    
+    def _upload_profile(self, backend: TranscriptionBackend) -> str:
+        """Perfil con el que se codifica el audio para un motor."""
+        return backend.audio_profile or self.audio_profile
     
-    def extract_audio(self, video_path: str) -> str:
+    def _fallback_for(self, name: Optional[str]) -> Optional[str]:
+        """Motor de respaldo para `name` (None si no hay o es el mismo)."""
+        name = name or self.backend_name
+        if self.fallback_backend and self.fallback_backend != name:
+            return self.fallback_backend
+        return None
+    
+    def extract_audio(self, video_path: str, max_seconds: Optional[float] = None) -> str:
         """
         Extrae el audio de un video a formato WAV.
         
         Args:
             video_path: Ruta del archivo de video
+            max_seconds: Extraer solo los primeros segundos (opcional, todo el audio)
             
         Returns:
             Ruta del archivo de audio extraído
@@ -32,34 +143,68 @@ class TranscriptionService:
         Raises:
             Exception: Si ocurre un error durante la extracción
         """
-        audio_path = video_path.replace(".mp4", ".wav")
+        audio_path, command = self._extract_audio_command(video_path, max_seconds)
         
         try:
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-i", video_path,
-                    "-vn",  # Sin video
-                    "-ac", "1",  # Mono
-                    "-ar", "16000",  # Sample rate 16kHz
-                    audio_path
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
+            with get_metrics().time_stage("ffmpeg", "extract_audio"):
+                subprocess.run(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True
+                )
             return audio_path
         except subprocess.CalledProcessError as e:
             raise Exception(f"Error extrayendo audio: {str(e)}")
         except FileNotFoundError:
             raise Exception("ffmpeg no está instalado o no está en el PATH")
     
-    def transcribe(self, audio_path: str) -> str:
+    def encode_audio(self, audio_path: str, profile: Optional[str] = None) -> str:
+        """
+        Codifica un WAV con un perfil de subida (FLAC, Opus...).
+        
+        Args:
+            audio_path: Ruta del WAV extraído
+            profile: Perfil de AUDIO_PROFILES (opcional, usa el del servicio)
+            
+        Returns:
+            Ruta del archivo codificado (el mismo WAV si el perfil es "wav")
+            
+        Raises:
+            Exception: Si ocurre un error durante la codificación
+        """
+        encoded_path, command = self._encode_audio_command(audio_path, profile)
+        if command is None:
+            return audio_path
+        
+        try:
+            with get_metrics().time_stage("ffmpeg", "encode_audio"):
+                subprocess.run(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True
+                )
+            return encoded_path
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Error codificando audio: {str(e)}")
+        except FileNotFoundError:
+            raise Exception("ffmpeg no está instalado o no está en el PATH")
+    
+    def transcribe(
+        self,
+        audio_path: str,
+        profile: Optional[str] = None,
+        backend: Optional[str] = None
+    ) -> str:
         """
-        Transcribe un archivo de audio a texto usando Deepgram.
+        Transcribe un archivo de audio a texto.
         
         Args:
             audio_path: Ruta del archivo de audio
+            profile: Perfil con el que se codificó el archivo (opcional, se
+                deduce por la extensión)
+            backend: Motor de transcripción (opcional, usa TRANSCRIPTION_BACKEND)
             
         Returns:
             Texto transcrito
@@ -67,68 +212,581 @@ class TranscriptionService:
         Raises:
             Exception: Si ocurre un error durante la transcripción
         """
+        if profile is None:
+            extension = os.path.splitext(audio_path)[1].lower()
+            profile = next(
+                (name for name, config in AUDIO_PROFILES.items() if config["extension"] == extension),
+                "wav"
+            )
+        
+        engine = self.get_backend(backend)
+        return engine.transcribe_file(audio_path, AUDIO_PROFILES[profile]["content_type"])["transcript"]
+    
+    def transcribe_chunked(self, audio_path: str, backend: Optional[str] = None) -> str:
+        """
+        Transcribe un WAV largo en segmentos paralelos.
+        
+        El audio se corta en silencios cada ~TRANSCRIPTION_CHUNK_SECONDS, cada
+        segmento (con un pequeño solape) se codifica y se transcribe en
+        paralelo (hasta TRANSCRIPTION_CHUNK_CONCURRENCY a la vez) y las
+        transcripciones se unen usando las marcas de tiempo de cada palabra
+        para no duplicar las del solape.
+        
+        Args:
+            audio_path: Ruta del WAV (PCM 16 bits mono)
+            backend: Motor de transcripción (opcional, usa TRANSCRIPTION_BACKEND)
+            
+        Returns:
+            Texto transcrito
+            
+        Raises:
+            Exception: Si falla la transcripción de algún segmento
+        """
+        engine = self.get_backend(backend)
+        profile = self._upload_profile(engine)
+        segments = plan_segments(
+            audio_path,
+            self.chunk_seconds,
+            overlap_seconds=settings.TRANSCRIPTION_CHUNK_OVERLAP_SECONDS
+        )
+        temp_paths: List[str] = []
+        
+        def transcribe_segment(index: int) -> Dict[str, Any]:
+            segment_path = write_segment(audio_path, segments[index], self._segment_path(audio_path, index))
+            temp_paths.append(segment_path)
+            upload_path = self.encode_audio(segment_path, profile)
+            temp_paths.append(upload_path)
+            return engine.transcribe_file(upload_path, AUDIO_PROFILES[profile]["content_type"])
+        
         try:
-            with open(audio_path, "rb") as audio_file:
-                headers = {
-                    "Authorization": f"Token {self.api_key}",
-                    "Content-Type": "audio/wav",
-                }
-                
-                params = {
-                    "model": self.model,
-                    "language": self.language,
-                    "smart_format": "true",
-                }
-                
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    params=params,
-                    data=audio_file,
-                    timeout=300
-                )
+            with ThreadPoolExecutor(max_workers=max(1, settings.TRANSCRIPTION_CHUNK_CONCURRENCY)) as executor:
+                results = list(executor.map(transcribe_segment, range(len(segments))))
+        finally:
+            for path in set(temp_paths):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        return stitch_transcripts(segments, results)
+    
+    def transcribe_stream(
+        self,
+        media_stream: IO[bytes],
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Transcribe un stream de video/audio sin escribir archivos temporales.
+        
+        Los bytes del stream entran por stdin a ffmpeg y su salida se envía al
+        motor a medida que se decodifica (transferencia chunked), así que la
+        subida empieza antes de que termine la descarga. Si el perfil no es WAV,
+        el PCM pasa por un segundo ffmpeg que lo codifica al vuelo. El stream se
+        entrega a ffmpeg y se cierra en este proceso.
+        
+        Los motores que reciben PCM (Deepgram con TRANSCRIPTION_STREAM_BACKEND=live,
+        que transcribe mientras llega el audio, o el motor local) reciben el
+        audio crudo sin cabecera WAV.
+        
+        Args:
+            media_stream: Stream binario con el contenido del video (p. ej. stdout de yt-dlp)
+            max_seconds: Transcribir solo los primeros segundos (opcional); ffmpeg
+                deja de leer el stream al llegar al límite
+            backend: Motor de transcripción (opcional, usa TRANSCRIPTION_BACKEND)
+            info: Diccionario opcional donde se guarda duration (segundos de
+                audio decodificados)
             
-            if response.status_code != 200:
-                error_detail = response.text
-                try:
-                    error_json = response.json()
-                    if "err" in error_json:
-                        error_detail = error_json["err"].get("message", str(error_json))
-                    elif "message" in error_json:
-                        error_detail = error_json["message"]
-                except:
-                    pass
-                raise Exception(f"Error en Deepgram API ({response.status_code}): {error_detail}")
+        Returns:
+            Texto transcrito
             
-            result = response.json()
+        Raises:
+            NonStreamableMediaError: Si el contenedor no se puede leer desde un pipe
+                (p. ej. MP4 con el índice al final); no se llega a llamar al motor
+            Exception: Si falla ffmpeg o el motor de transcripción
+        """
+        engine = self.get_backend(backend)
+        
+        try:
+            ffmpeg = subprocess.Popen(
+                [
+                    "ffmpeg",
+                    "-i", "pipe:0",
+                    "-vn",  # Sin video
+                    "-ac", "1",  # Mono
+                    "-ar", "16000",  # Sample rate 16kHz
+                    *self._duration_args(max_seconds),
+                    "-f", "wav",
+                    "pipe:1"
+                ],
+                stdin=media_stream,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise Exception("ffmpeg no está instalado o no está en el PATH")
+        finally:
+            # ffmpeg ya tiene su copia del descriptor
+            media_stream.close()
+        
+        # Guardar el inicio del audio para la huella acústica mientras se sube
+        capture = _PcmPrefixCapture(
+            max_seconds=settings.FINGERPRINT_SECONDS
+            if self.fingerprint_index and self.fingerprint_index.enabled else 0
+        )
+        
+        processes = [ffmpeg]
+        pump = None
+        
+        try:
+            chunks = capture.wrap(iter(lambda: ffmpeg.stdout.read(_STREAM_CHUNK_SIZE), b""))
             
-            transcript = result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript", "")
+            # Esperar el primer audio antes de abrir la subida: si ffmpeg no pudo
+            # decodificar el stream, solo habría una cabecera WAV vacía
+            first_chunks = []
+            for chunk in chunks:
+                first_chunks.append(chunk)
+                if capture.audio_bytes() > 0:
+                    break
+            if capture.audio_bytes() == 0:
+                raise NonStreamableMediaError("El formato del video no se puede decodificar en streaming")
             
-            if not transcript:
-                raise Exception("No se pudo generar transcripción")
+            pcm_chunks = itertools.chain(first_chunks, chunks)
+            profile_config = AUDIO_PROFILES[self._upload_profile(engine)]
             
-            return transcript
+            if engine.streaming == "pcm":
+                # PCM crudo: se descarta la cabecera WAV
+                transcript = engine.transcribe_pcm(_skip_bytes(pcm_chunks, capture.header_bytes()))
+            else:
+                if profile_config["extension"] == ".wav":
+                    body = pcm_chunks
+                else:
+                    encoder = subprocess.Popen(
+                        ["ffmpeg", "-f", "wav", "-i", "pipe:0", *profile_config["ffmpeg_args"], "pipe:1"],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL
+                    )
+                    processes.append(encoder)
+                    # Un hilo alimenta al codificador mientras este hilo sube su salida
+                    pump = threading.Thread(
+                        target=_pump_chunks,
+                        args=(pcm_chunks, encoder.stdin),
+                        daemon=True
+                    )
+                    pump.start()
+                    body = iter(lambda: encoder.stdout.read(_STREAM_CHUNK_SIZE), b"")
                 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Error en Deepgram API: {str(e)}")
-        except Exception as e:
-            raise Exception(f"Error en Deepgram: {str(e)}")
+                transcript = engine.transcribe_audio(body, profile_config["content_type"])["transcript"]
+        finally:
+            for process in processes:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+            if pump:
+                pump.join(timeout=5)
+        
+        for process in processes:
+            if process.returncode != 0:
+                raise Exception(f"Error extrayendo audio: ffmpeg terminó con código {process.returncode}")
+        
+        if info is not None:
+            info["duration"] = round(capture.duration(), 2)
+        
+        if capture.max_bytes:
+            try:
+                fingerprint = compute_fingerprint(capture.samples())
+                self.fingerprint_index.add(fingerprint, capture.duration(), transcript)
+            except Exception:
+                # La huella es una optimización: no debe romper la transcripción
+                pass
+        
+        return transcript
     
-    def transcribe_video(self, video_path: str) -> str:
+    def transcribe_video(
+        self,
+        video_path: str,
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None
+    ) -> str:
         """
         Transcribe un video completo: extrae audio y luego transcribe.
         
+        Si hay índice de huellas y el audio es casi idéntico a uno ya
+        transcrito, se reutiliza esa transcripción sin llamar al motor. La
+        huella incluye la duración, así que un recorte del inicio solo
+        coincide con audios de la misma duración. Si no, el audio se codifica
+        con el perfil del motor antes de subirlo; si es más largo que
+        1.5 × TRANSCRIPTION_CHUNK_SECONDS se transcribe en segmentos
+        paralelos (transcribe_chunked). Si el motor falla y hay
+        TRANSCRIPTION_FALLBACK_BACKEND, se reintenta con el motor de respaldo.
+        
         Args:
             video_path: Ruta del archivo de video
+            max_seconds: Transcribir solo los primeros segundos (opcional, todo el video)
+            backend: Motor de transcripción (opcional, usa TRANSCRIPTION_BACKEND)
             
         Returns:
             Texto transcrito
         """
-        audio_path = self.extract_audio(video_path)
+        audio_path = self.extract_audio(video_path, max_seconds)
         try:
-            return self.transcribe(audio_path)
+            fingerprint, duration = self._fingerprint(audio_path)
+            
+            if fingerprint is not None:
+                cached = self.fingerprint_index.lookup(fingerprint, duration)
+                if cached:
+                    return cached
+            
+            try:
+                transcript = self._transcribe_wav(audio_path, backend)
+            except ValueError:
+                raise
+            except Exception:
+                fallback = self._fallback_for(backend)
+                if not fallback:
+                    raise
+                transcript = self._transcribe_wav(audio_path, fallback)
+            
+            if fingerprint is not None:
+                self.fingerprint_index.add(fingerprint, duration, transcript)
+            
+            return transcript
         finally:
-            # Limpiar archivo de audio temporal si existe
+            # Limpiar el audio temporal si existe
             if os.path.exists(audio_path):
                 os.remove(audio_path)
+    
+    def _transcribe_wav(self, audio_path: str, backend: Optional[str] = None) -> str:
+        """Transcribe el WAV extraído, en segmentos si es largo; borra el audio codificado."""
+        if self._should_chunk(audio_path):
+            return self.transcribe_chunked(audio_path, backend)
+        
+        profile = self._upload_profile(self.get_backend(backend))
+        upload_path = self.encode_audio(audio_path, profile)
+        try:
+            return self.transcribe(upload_path, profile, backend)
+        finally:
+            if upload_path != audio_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+    
+    def _should_chunk(self, audio_path: str) -> bool:
+        """True si el audio es lo bastante largo para transcribirlo en segmentos."""
+        if not self.chunk_seconds or self.chunk_seconds <= 0:
+            return False
+        try:
+            return wav_duration(audio_path) > self.chunk_seconds * 1.5
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _segment_path(audio_path: str, index: int) -> str:
+        """Ruta del WAV temporal de un segmento."""
+        return f"{os.path.splitext(audio_path)[0]}.part{index:03d}.wav"
+    
+    def _fingerprint(self, audio_path: str):
+        """
+        Calcula la huella acústica de los primeros segundos del audio.
+        
+        Args:
+            audio_path: Ruta del archivo WAV
+            
+        Returns:
+            Tupla (huella, duración en segundos) o (None, 0) si no hay índice o falla
+        """
+        if not self.fingerprint_index or not self.fingerprint_index.enabled:
+            return None, 0.0
+        
+        try:
+            samples, duration = read_wav_samples(audio_path, max_seconds=settings.FINGERPRINT_SECONDS)
+            return compute_fingerprint(samples), duration
+        except Exception:
+            # La huella es una optimización: si falla, se transcribe normalmente
+            return None, 0.0
+    
+    def _extract_audio_command(
+        self,
+        video_path: str,
+        max_seconds: Optional[float] = None
+    ) -> Tuple[str, List[str]]:
+        """Ruta del WAV y comando de ffmpeg que lo extrae del video."""
+        audio_path = os.path.splitext(video_path)[0] + ".wav"
+        return audio_path, [
+            "ffmpeg",
+            "-i", video_path,
+            "-vn",  # Sin video
+            "-ac", "1",  # Mono
+            "-ar", "16000",  # Sample rate 16kHz
+            *self._duration_args(max_seconds),
+            audio_path
+        ]
+    
+    @staticmethod
+    def _duration_args(max_seconds: Optional[float]) -> List[str]:
+        """Argumentos de ffmpeg que cortan la salida a los primeros segundos."""
+        return ["-t", f"{max_seconds:g}"] if max_seconds else []
+    
+    def _encode_audio_command(
+        self,
+        audio_path: str,
+        profile: Optional[str] = None
+    ) -> Tuple[str, Optional[List[str]]]:
+        """Ruta del archivo codificado y comando de ffmpeg (None si el perfil es WAV)."""
+        profile_config = AUDIO_PROFILES[profile or self.audio_profile]
+        if profile_config["extension"] == ".wav":
+            return audio_path, None
+        
+        encoded_path = os.path.splitext(audio_path)[0] + profile_config["extension"]
+        return encoded_path, ["ffmpeg", "-y", "-i", audio_path, *profile_config["ffmpeg_args"], encoded_path]
+
 
+class AsyncTranscriptionService(TranscriptionService):
+    """
+    Variante async de TranscriptionService.
+    
+    ffmpeg corre con asyncio.create_subprocess_exec y la subida a Deepgram usa
+    el httpx.AsyncClient compartido, así que una transcripción en curso no
+    ocupa un hilo del servidor (el motor local sí corre en un hilo).
+    """
+    
+    async def extract_audio(self, video_path: str, max_seconds: Optional[float] = None) -> str:
+        """Versión async de TranscriptionService.extract_audio."""
+        audio_path, command = self._extract_audio_command(video_path, max_seconds)
+        
+        try:
+            with get_metrics().time_stage("ffmpeg", "extract_audio"):
+                await _run_process(command)
+            return audio_path
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Error extrayendo audio: {str(e)}")
+        except FileNotFoundError:
+            raise Exception("ffmpeg no está instalado o no está en el PATH")
+    
+    async def encode_audio(self, audio_path: str, profile: Optional[str] = None) -> str:
+        """Versión async de TranscriptionService.encode_audio."""
+        encoded_path, command = self._encode_audio_command(audio_path, profile)
+        if command is None:
+            return audio_path
+        
+        try:
+            with get_metrics().time_stage("ffmpeg", "encode_audio"):
+                await _run_process(command)
+            return encoded_path
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Error codificando audio: {str(e)}")
+        except FileNotFoundError:
+            raise Exception("ffmpeg no está instalado o no está en el PATH")
+    
+    async def transcribe(
+        self,
+        audio_path: str,
+        profile: Optional[str] = None,
+        backend: Optional[str] = None
+    ) -> str:
+        """Versión async de TranscriptionService.transcribe."""
+        if profile is None:
+            extension = os.path.splitext(audio_path)[1].lower()
+            profile = next(
+                (name for name, config in AUDIO_PROFILES.items() if config["extension"] == extension),
+                "wav"
+            )
+        
+        engine = self.get_backend(backend)
+        result = await engine.atranscribe_file(audio_path, AUDIO_PROFILES[profile]["content_type"])
+        return result["transcript"]
+    
+    async def transcribe_chunked(self, audio_path: str, backend: Optional[str] = None) -> str:
+        """Versión async de TranscriptionService.transcribe_chunked."""
+        engine = self.get_backend(backend)
+        profile = self._upload_profile(engine)
+        segments = await asyncio.to_thread(
+            plan_segments,
+            audio_path,
+            self.chunk_seconds,
+            settings.TRANSCRIPTION_CHUNK_OVERLAP_SECONDS
+        )
+        semaphore = asyncio.Semaphore(max(1, settings.TRANSCRIPTION_CHUNK_CONCURRENCY))
+        temp_paths: List[str] = []
+        
+        async def transcribe_segment(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                segment_path = await asyncio.to_thread(
+                    write_segment, audio_path, segments[index], self._segment_path(audio_path, index)
+                )
+                temp_paths.append(segment_path)
+                upload_path = await self.encode_audio(segment_path, profile)
+                temp_paths.append(upload_path)
+                return await engine.atranscribe_file(upload_path, AUDIO_PROFILES[profile]["content_type"])
+        
+        try:
+            results = await asyncio.gather(*(transcribe_segment(index) for index in range(len(segments))))
+        finally:
+            for path in set(temp_paths):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        return stitch_transcripts(segments, results)
+    
+    async def transcribe_stream(
+        self,
+        media_stream: IO[bytes],
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Versión async de TranscriptionService.transcribe_stream.
+        
+        El modo streaming encadena pipes bloqueantes entre procesos (yt-dlp,
+        ffmpeg y el codificador), así que se ejecuta en un hilo.
+        """
+        return await asyncio.to_thread(super().transcribe_stream, media_stream, max_seconds, backend, info)
+    
+    async def transcribe_video(
+        self,
+        video_path: str,
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None
+    ) -> str:
+        """Versión async de TranscriptionService.transcribe_video."""
+        audio_path = await self.extract_audio(video_path, max_seconds)
+        try:
+            # Huella e índice (numpy + SQLite) en un hilo para no bloquear el event loop
+            fingerprint, duration = await asyncio.to_thread(self._fingerprint, audio_path)
+            
+            if fingerprint is not None:
+                cached = await asyncio.to_thread(self.fingerprint_index.lookup, fingerprint, duration)
+                if cached:
+                    return cached
+            
+            try:
+                transcript = await self._transcribe_wav(audio_path, backend)
+            except ValueError:
+                raise
+            except Exception:
+                fallback = self._fallback_for(backend)
+                if not fallback:
+                    raise
+                transcript = await self._transcribe_wav(audio_path, fallback)
+            
+            if fingerprint is not None:
+                await asyncio.to_thread(self.fingerprint_index.add, fingerprint, duration, transcript)
+            
+            return transcript
+        finally:
+            # Limpiar el audio temporal si existe
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+    
+    async def _transcribe_wav(self, audio_path: str, backend: Optional[str] = None) -> str:
+        """Versión async de TranscriptionService._transcribe_wav."""
+        if await asyncio.to_thread(self._should_chunk, audio_path):
+            return await self.transcribe_chunked(audio_path, backend)
+        
+        profile = self._upload_profile(self.get_backend(backend))
+        upload_path = await self.encode_audio(audio_path, profile)
+        try:
+            return await self.transcribe(upload_path, profile, backend)
+        finally:
+            if upload_path != audio_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+
+
+async def _run_process(command: List[str]) -> None:
+    """
+    Ejecuta un comando sin bloquear el event loop.
+    
+    Raises:
+        subprocess.CalledProcessError: Si el comando termina con error
+        FileNotFoundError: Si el ejecutable no existe
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        # La petición se canceló: no dejar ffmpeg huérfano
+        process.kill()
+        await process.wait()
+        raise
+    
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+def _pump_chunks(chunks: Iterable[bytes], sink: IO[bytes]) -> None:
+    """Escribe chunks en un pipe y lo cierra; se detiene si el lector se cierra."""
+    try:
+        for chunk in chunks:
+            sink.write(chunk)
+    except (BrokenPipeError, ValueError, OSError):
+        pass
+    finally:
+        try:
+            sink.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def _skip_bytes(chunks: Iterable[bytes], count: int) -> Iterator[bytes]:
+    """Retorna los mismos chunks sin los primeros `count` bytes."""
+    for chunk in chunks:
+        if count >= len(chunk):
+            count -= len(chunk)
+            continue
+        yield chunk[count:]
+        count = 0
+
+
+class _PcmPrefixCapture:
+    """Copia los primeros segundos de un stream WAV (PCM 16 bits mono) mientras pasa."""
+    
+    def __init__(self, max_seconds: float):
+        """
+        Args:
+            max_seconds: Segundos de audio a conservar (0 = no capturar)
+        """
+        self.max_bytes = int(max_seconds * SAMPLE_RATE * 2)
+        self.total_bytes = 0
+        self._buffer = bytearray()
+        self._data_offset: Optional[int] = None
+    
+    def wrap(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Retorna los mismos chunks, copiando el inicio del audio."""
+        for chunk in chunks:
+            self.total_bytes += len(chunk)
+            # La cabecera siempre se guarda para ubicar el inicio de las muestras
+            if len(self._buffer) < self.max_bytes + 4096:
+                self._buffer.extend(chunk)
+            yield chunk
+    
+    def samples(self) -> np.ndarray:
+        """Muestras float32 del inicio del audio (sin la cabecera WAV)."""
+        offset = self._find_data_offset() or 0
+        raw = bytes(self._buffer[offset:offset + self.max_bytes])
+        raw = raw[:len(raw) - len(raw) % 2]
+        return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    
+    def audio_bytes(self) -> int:
+        """Bytes de audio (sin cabecera WAV) que pasaron por el stream."""
+        offset = self._find_data_offset()
+        return max(0, self.total_bytes - offset) if offset is not None else 0
+    
+    def header_bytes(self) -> int:
+        """Tamaño de la cabecera WAV (0 si todavía no se encontró)."""
+        return self._find_data_offset() or 0
+    
+    def duration(self) -> float:
+        """Duración total del audio que pasó por el stream, en segundos."""
+        return self.audio_bytes() / float(SAMPLE_RATE * 2)
+    
+    def _find_data_offset(self) -> Optional[int]:
+        """Posición donde empiezan las muestras (después del chunk 'data' del WAV)."""
+        if self._data_offset is None:
+            position = self._buffer.find(b"data", 12, 4096)
+            if position >= 0:
+                self._data_offset = position + 8
+        return self._data_offset
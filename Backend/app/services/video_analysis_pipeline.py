@@ -0,0 +1,624 @@
+"""
+Pipeline de análisis de videos.
+Responsabilidad única: Orquestar las etapas de descarga, transcripción y análisis.
+"""
+import asyncio
+import time
+from typing import Dict, Any, Optional, Callable
+from app.config import settings
+from app.services.video_downloader import VideoDownloader
+from app.services.transcription_service import (
+    TranscriptionService,
+    AsyncTranscriptionService,
+    NonStreamableMediaError,
+)
+from app.services.video_analysis_service import VideoAnalysisService, AsyncVideoAnalysisService
+from app.services.video_url_canonicalizer import VideoUrlCanonicalizer
+from app.services.video_result_cache import VideoResultCache
+from app.services.stage_limiter import StageLimiter, UNLIMITED
+from app.services.single_flight import SingleFlight, AsyncSingleFlight
+from app.services.metrics import get_metrics
+
+
+class VideoAnalysisPipeline:
+    """Ejecuta el análisis completo de un video reutilizando los servicios existentes."""
+
+    # Modos de análisis soportados
+    MODES = ("two_pass", "single_pass", "hook_only")
+
+    def __init__(
+        self,
+        video_downloader: VideoDownloader,
+        transcription_service: TranscriptionService,
+        video_analysis_service: VideoAnalysisService,
+        url_canonicalizer: Optional[VideoUrlCanonicalizer] = None,
+        result_cache: Optional[VideoResultCache] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        """
+        Inicializa el pipeline con los servicios de cada etapa.
+
+        Args:
+            video_downloader: Servicio de descarga de videos
+            transcription_service: Servicio de transcripción
+            video_analysis_service: Servicio de análisis con ChatGPT
+            url_canonicalizer: Canonicalizador de URLs (opcional, necesario para
+                la caché y para single_flight)
+            result_cache: Caché de resultados por video canónico (opcional)
+            single_flight: Deduplicación de análisis idénticos en curso (opcional)
+        """
+        self.video_downloader = video_downloader
+        self.transcription_service = transcription_service
+        self.video_analysis_service = video_analysis_service
+        self.url_canonicalizer = url_canonicalizer
+        self.result_cache = result_cache
+        self.single_flight = single_flight
+
+    def run(
+        self,
+        url: str,
+        mode: Optional[str] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Analiza un video: lo descarga, transcribe y analiza con ChatGPT.
+
+        Cada etapa se ejecuta una sola vez. En modo "two_pass" el transcript se
+        corrige y luego se analiza (2 llamadas a OpenAI); en modo "single_pass"
+        la corrección y el análisis llegan en una sola llamada. En modo
+        "hook_only" solo se descargan, transcriben y analizan los primeros
+        settings.HOOK_WINDOW_SECONDS segundos y se retorna el hook (script_base
+        vacío). Si el video ya se analizó (con cualquier forma de su URL), se
+        retorna desde la caché sin descargar nada; si otra petición lo está
+        analizando en este momento, se espera y se comparte su resultado.
+
+        Args:
+            url: URL del video a analizar
+            mode: Modo de análisis (opcional, usa settings.ANALYSIS_MODE)
+            on_stage: Callback opcional que recibe el nombre de cada etapa al iniciarla
+            transcription_backend: Motor de transcripción (opcional, usa
+                settings.TRANSCRIPTION_BACKEND)
+
+        Returns:
+            Diccionario con transcript mejorado, hook, script_base y metrics
+            (latencia por etapa en ms, uso de tokens de OpenAI y si vino de caché)
+
+        Raises:
+            ValueError: Si el modo no es válido o no se pudo generar la transcripción
+            Exception: Si hay error en cualquier etapa
+        """
+        mode = self._resolve_mode(mode)
+        window = self._window_seconds(mode)
+        notify = on_stage or (lambda stage: None)
+        latency_ms: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        # Paso 0: Consultar la caché por video canónico (antes de descargar)
+        video_key = None
+        if self._uses_video_key():
+            video_key = self.url_canonicalizer.canonicalize(url)
+            cached = self.result_cache.get(video_key, self._cache_mode(mode, window)) if self.result_cache else None
+            latency_ms["cache_lookup"] = _elapsed_ms(started)
+
+            if cached:
+                return self._cached_response(cached, mode, latency_ms, started)
+
+        def run_stages():
+            with get_metrics().track_pipeline():
+                return self._run_stages(url, mode, window, notify, video_key, latency_ms, started, transcription_backend)
+
+        if not video_key or not self.single_flight:
+            return run_stages()
+
+        # Paso 0b: Si el mismo video ya se está analizando, compartir ese análisis
+        response, shared = self.single_flight.do(
+            self._flight_key(video_key, mode, window, transcription_backend),
+            run_stages
+        )
+        return self._coalesced_response(response, latency_ms, started) if shared else response
+
+    def _run_stages(
+        self,
+        url: str,
+        mode: str,
+        window: Optional[int],
+        notify: Callable[[str], None],
+        video_key: Optional[str],
+        latency_ms: Dict[str, float],
+        started: float,
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Descarga, transcribe y analiza el video (todo lo que sigue a la caché)."""
+        download: Optional[Dict[str, Any]] = None
+        usage: Dict[str, int] = {}
+
+        raw_transcript = None
+        if settings.MEDIA_PIPELINE == "stream":
+            # Pasos 1 y 2 solapados: la descarga fluye a ffmpeg y al motor sin tocar disco
+            notify("transcribing")
+            stage_started = time.perf_counter()
+            raw_transcript = self._transcribe_streaming(url, window, transcription_backend)
+            latency_ms["download_transcription"] = _elapsed_ms(stage_started)
+
+        if raw_transcript is None:
+            # Paso 1: Descargar video (responsabilidad: VideoDownloader)
+            notify("downloading")
+            stage_started = time.perf_counter()
+            download = self.video_downloader.download_media(url, max_seconds=window)
+            video_path = download["path"]
+            latency_ms["download"] = _elapsed_ms(stage_started)
+
+            # Paso 2: Transcribir video (responsabilidad: TranscriptionService)
+            notify("transcribing")
+            stage_started = time.perf_counter()
+            try:
+                raw_transcript = self.transcription_service.transcribe_video(
+                    video_path,
+                    max_seconds=window,
+                    backend=transcription_backend
+                )
+            finally:
+                self.video_downloader.cleanup(video_path)
+            latency_ms["transcription"] = _elapsed_ms(stage_started)
+
+        # Validar que el transcript no esté vacío
+        if not raw_transcript or not raw_transcript.strip():
+            raise ValueError("No se pudo generar la transcripción del video")
+
+        if mode == "hook_only":
+            # Paso 3: Corregir el inicio e identificar el hook en una sola llamada
+            notify("analyzing")
+            stage_started = time.perf_counter()
+            analysis = self.video_analysis_service.analyze_hook_window(
+                raw_transcript,
+                window,
+                usage=usage
+            )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+            improved_transcript = analysis["transcript"]
+        elif mode == "single_pass":
+            # Paso 3: Corregir y analizar en una sola llamada (responsabilidad: VideoAnalysisService)
+            notify("analyzing")
+            stage_started = time.perf_counter()
+            analysis = self.video_analysis_service.analyze_transcript_single_pass(
+                raw_transcript,
+                usage=usage
+            )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+            improved_transcript = analysis["transcript"]
+        else:
+            # Paso 3: Mejorar transcript (responsabilidad: VideoAnalysisService)
+            notify("improving")
+            stage_started = time.perf_counter()
+            improved_transcript = self.video_analysis_service.improve_transcript(
+                raw_transcript,
+                usage=usage
+            )
+            latency_ms["improve"] = _elapsed_ms(stage_started)
+
+            # Paso 4: Analizar transcript mejorado con ChatGPT (responsabilidad: VideoAnalysisService)
+            notify("analyzing")
+            stage_started = time.perf_counter()
+            analysis = self.video_analysis_service.analyze_transcript(
+                improved_transcript,
+                usage=usage
+            )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+
+        result = self._build_result(improved_transcript, analysis)
+
+        if video_key and self.result_cache:
+            self.result_cache.set(video_key, self._cache_mode(mode, window), result)
+
+        return self._response(result, mode, latency_ms, usage, download, started)
+
+    def _transcribe_streaming(
+        self,
+        url: str,
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Descarga y transcribe en streaming (yt-dlp → ffmpeg → motor de transcripción).
+
+        Args:
+            url: URL del video
+            max_seconds: Transcribir solo los primeros segundos (opcional); al
+                llegar al límite se corta la descarga
+            backend: Motor de transcripción (opcional)
+            info: Diccionario opcional donde se guarda duration (segundos de
+                audio decodificados)
+
+        Returns:
+            Texto transcrito, o None si el formato no admite streaming y hay que
+            usar el flujo con archivo
+
+        Raises:
+            Exception: Si falla la descarga o la transcripción
+        """
+        process = self.video_downloader.open_stream(url)
+        try:
+            transcript = self.transcription_service.transcribe_stream(process.stdout, max_seconds, backend, info)
+        except NonStreamableMediaError:
+            self.video_downloader.finish_stream(process)
+            return None
+        except Exception:
+            # Si yt-dlp ya falló se lanza el error de descarga; si no, se corta y sigue este error
+            self.video_downloader.abort_stream(process)
+            raise
+        if max_seconds:
+            # El resto del video no hace falta
+            self.video_downloader.stop_stream(process)
+        else:
+            self.video_downloader.finish_stream(process)
+        return transcript
+
+    def _uses_video_key(self) -> bool:
+        """True si hace falta la clave canónica del video (caché o single-flight)."""
+        if not self.url_canonicalizer:
+            return False
+        cache_enabled = bool(self.result_cache and self.result_cache.enabled)
+        flight_enabled = bool(self.single_flight and self.single_flight.enabled)
+        return cache_enabled or flight_enabled
+
+    @staticmethod
+    def _flight_key(
+        video_key: str,
+        mode: str,
+        window: Optional[int],
+        transcription_backend: Optional[str]
+    ) -> str:
+        """Clave de single-flight: mismo video, modo y motor de transcripción."""
+        return f"{VideoAnalysisPipeline._cache_mode(mode, window)}:{transcription_backend or ''}:{video_key}"
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        """Retorna el modo pedido (o el de settings) validado."""
+        mode = mode or settings.ANALYSIS_MODE
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de análisis no válido: {mode}. Usa: {', '.join(self.MODES)}")
+        return mode
+
+    @staticmethod
+    def _window_seconds(mode: str) -> Optional[int]:
+        """Segundos del inicio del video que se procesan (None = el video completo)."""
+        return settings.HOOK_WINDOW_SECONDS if mode == "hook_only" else None
+
+    @staticmethod
+    def _cache_mode(mode: str, window: Optional[int]) -> str:
+        """Modo con el que se guarda el resultado en caché (incluye la ventana del hook)."""
+        return f"{mode}:{window}s" if window else mode
+
+    @staticmethod
+    def _build_result(improved_transcript: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Arma el resultado que se guarda en caché y se retorna."""
+        return {
+            "transcript": improved_transcript,  # Transcript mejorado
+            "hook": analysis.get("hook", {}),  # Solo el hook
+            "script_base": analysis.get("script_base", ""),  # Solo el script base
+        }
+
+    @staticmethod
+    def _cached_response(
+        cached: Dict[str, Any],
+        mode: str,
+        latency_ms: Dict[str, float],
+        started: float
+    ) -> Dict[str, Any]:
+        """Respuesta para un resultado que vino de la caché."""
+        latency_ms["total"] = _elapsed_ms(started)
+        return {
+            **cached,
+            "metrics": {
+                "mode": mode,
+                "latency_ms": latency_ms,
+                "usage": {},
+                "cache_hit": True,
+            },
+        }
+
+    @staticmethod
+    def _coalesced_response(
+        response: Dict[str, Any],
+        latency_ms: Dict[str, float],
+        started: float
+    ) -> Dict[str, Any]:
+        """Respuesta para un análisis compartido con otra petición idéntica en curso."""
+        latency_ms["total"] = _elapsed_ms(started)
+        return {
+            **response,
+            "metrics": {
+                **response["metrics"],
+                "latency_ms": latency_ms,
+                "usage": {},
+                "download": None,
+                "coalesced": True,
+            },
+        }
+
+    @staticmethod
+    def _response(
+        result: Dict[str, Any],
+        mode: str,
+        latency_ms: Dict[str, float],
+        usage: Dict[str, int],
+        download: Optional[Dict[str, Any]],
+        started: float
+    ) -> Dict[str, Any]:
+        """Respuesta con el resultado y las métricas del análisis."""
+        latency_ms["total"] = _elapsed_ms(started)
+        get_metrics().observe_pipeline(mode, latency_ms)
+        return {
+            **result,
+            "metrics": {
+                "mode": mode,
+                "latency_ms": latency_ms,
+                "usage": usage,
+                "cache_hit": False,
+                "download": {
+                    key: download[key]
+                    for key in ("format_id", "audio_only", "bytes_downloaded", "bytes_saved")
+                } if download else None,
+            },
+        }
+
+
+class AsyncVideoAnalysisPipeline(VideoAnalysisPipeline):
+    """
+    Variante async del pipeline para rutas `async def`.
+
+    Usa AsyncTranscriptionService y AsyncVideoAnalysisService; yt-dlp, la
+    canonicalización y las cachés SQLite son bloqueantes y corren en hilos.
+    """
+
+    def __init__(
+        self,
+        video_downloader: VideoDownloader,
+        transcription_service: AsyncTranscriptionService,
+        video_analysis_service: AsyncVideoAnalysisService,
+        url_canonicalizer: Optional[VideoUrlCanonicalizer] = None,
+        result_cache: Optional[VideoResultCache] = None,
+        single_flight: Optional[AsyncSingleFlight] = None
+    ):
+        """
+        Inicializa el pipeline con las variantes async de los servicios.
+
+        Args:
+            video_downloader: Servicio de descarga de videos
+            transcription_service: Servicio async de transcripción
+            video_analysis_service: Servicio async de análisis con ChatGPT
+            url_canonicalizer: Canonicalizador de URLs (opcional, necesario para la caché)
+            result_cache: Caché de resultados por video canónico (opcional)
+            single_flight: Deduplicación de análisis idénticos en curso (opcional)
+        """
+        super().__init__(
+            video_downloader,
+            transcription_service,
+            video_analysis_service,
+            url_canonicalizer=url_canonicalizer,
+            result_cache=result_cache,
+            single_flight=single_flight
+        )
+
+    async def run(
+        self,
+        url: str,
+        mode: Optional[str] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+        limiter: Optional[StageLimiter] = None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Versión async de VideoAnalysisPipeline.run.
+
+        Args:
+            url: URL del video a analizar
+            mode: Modo de análisis (opcional, usa settings.ANALYSIS_MODE)
+            on_stage: Callback opcional que recibe el nombre de cada etapa al iniciarla
+            limiter: Límites de concurrencia por etapa, compartidos entre los
+                videos de un lote (opcional, sin límites)
+            on_event: Callback opcional que recibe cada etapa al terminar con su
+                resultado parcial: downloaded (duración), transcribed (transcript
+                crudo), improved (transcript corregido), analyzed (hook y script_base).
+                Si el análisis se comparte con otra petición en curso, solo la
+                primera recibe estos eventos
+            transcription_backend: Motor de transcripción (opcional, usa
+                settings.TRANSCRIPTION_BACKEND)
+
+        Returns:
+            Diccionario con transcript mejorado, hook, script_base y metrics
+        """
+        mode = self._resolve_mode(mode)
+        window = self._window_seconds(mode)
+        limiter = limiter or UNLIMITED
+        notify = on_stage or (lambda stage: None)
+        emit = on_event or (lambda event, data: None)
+        latency_ms: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        # Paso 0: Consultar la caché por video canónico (antes de descargar)
+        video_key = None
+        if self._uses_video_key():
+            video_key = await asyncio.to_thread(self.url_canonicalizer.canonicalize, url)
+            cached = await asyncio.to_thread(
+                self.result_cache.get, video_key, self._cache_mode(mode, window)
+            ) if self.result_cache else None
+            latency_ms["cache_lookup"] = _elapsed_ms(started)
+
+            if cached:
+                return self._cached_response(cached, mode, latency_ms, started)
+
+        async def run_stages():
+            with get_metrics().track_pipeline():
+                return await self._run_stages(
+                    url, mode, window, notify, emit, limiter, video_key, latency_ms, started, transcription_backend
+                )
+
+        if not video_key or not self.single_flight:
+            return await run_stages()
+
+        # Paso 0b: Si el mismo video ya se está analizando, compartir ese análisis
+        response, shared = await self.single_flight.do(
+            self._flight_key(video_key, mode, window, transcription_backend),
+            run_stages
+        )
+        return self._coalesced_response(response, latency_ms, started) if shared else response
+
+    async def _run_stages(
+        self,
+        url: str,
+        mode: str,
+        window: Optional[int],
+        notify: Callable[[str], None],
+        emit: Callable[[str, Dict[str, Any]], None],
+        limiter: StageLimiter,
+        video_key: Optional[str],
+        latency_ms: Dict[str, float],
+        started: float,
+        transcription_backend: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisPipeline._run_stages."""
+        download: Optional[Dict[str, Any]] = None
+        usage: Dict[str, int] = {}
+
+        raw_transcript = None
+        if settings.MEDIA_PIPELINE == "stream":
+            # Pasos 1 y 2 solapados: la descarga fluye a ffmpeg y al motor sin tocar disco
+            stream_info: Dict[str, Any] = {}
+            async with limiter.slot("download"), limiter.slot("transcribe"):
+                notify("transcribing")
+                stage_started = time.perf_counter()
+                raw_transcript = await self._transcribe_streaming(url, window, transcription_backend, stream_info)
+            latency_ms["download_transcription"] = _elapsed_ms(stage_started)
+
+            if raw_transcript is not None:
+                emit("downloaded", {"duration": stream_info.get("duration"), "streamed": True})
+
+        if raw_transcript is None:
+            # Paso 1: Descargar video (yt-dlp es bloqueante: corre en un hilo)
+            async with limiter.slot("download"):
+                notify("downloading")
+                stage_started = time.perf_counter()
+                download = await asyncio.to_thread(self.video_downloader.download_media, url, window)
+            video_path = download["path"]
+            latency_ms["download"] = _elapsed_ms(stage_started)
+            emit("downloaded", {
+                "duration": download.get("duration"),
+                "format_id": download.get("format_id"),
+                "audio_only": download.get("audio_only"),
+                "bytes_downloaded": download.get("bytes_downloaded"),
+            })
+
+            # Paso 2: Transcribir video (responsabilidad: AsyncTranscriptionService)
+            try:
+                async with limiter.slot("transcribe"):
+                    notify("transcribing")
+                    stage_started = time.perf_counter()
+                    raw_transcript = await self.transcription_service.transcribe_video(
+                        video_path,
+                        max_seconds=window,
+                        backend=transcription_backend
+                    )
+            finally:
+                self.video_downloader.cleanup(video_path)
+            latency_ms["transcription"] = _elapsed_ms(stage_started)
+
+        # Validar que el transcript no esté vacío
+        if not raw_transcript or not raw_transcript.strip():
+            raise ValueError("No se pudo generar la transcripción del video")
+
+        emit("transcribed", {"transcript": raw_transcript})
+
+        if mode == "hook_only":
+            # Paso 3: Corregir el inicio e identificar el hook en una sola llamada
+            async with limiter.slot("analyze"):
+                notify("analyzing")
+                stage_started = time.perf_counter()
+                analysis = await self.video_analysis_service.analyze_hook_window(
+                    raw_transcript,
+                    window,
+                    usage=usage
+                )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+            improved_transcript = analysis["transcript"]
+            emit("improved", {"transcript": improved_transcript})
+        elif mode == "single_pass":
+            # Paso 3: Corregir y analizar en una sola llamada (responsabilidad: AsyncVideoAnalysisService)
+            async with limiter.slot("analyze"):
+                notify("analyzing")
+                stage_started = time.perf_counter()
+                analysis = await self.video_analysis_service.analyze_transcript_single_pass(
+                    raw_transcript,
+                    usage=usage
+                )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+            improved_transcript = analysis["transcript"]
+            emit("improved", {"transcript": improved_transcript})
+        else:
+            # Paso 3: Mejorar transcript (responsabilidad: AsyncVideoAnalysisService)
+            async with limiter.slot("analyze"):
+                notify("improving")
+                stage_started = time.perf_counter()
+                improved_transcript = await self.video_analysis_service.improve_transcript(
+                    raw_transcript,
+                    usage=usage
+                )
+            latency_ms["improve"] = _elapsed_ms(stage_started)
+            emit("improved", {"transcript": improved_transcript})
+
+            # Paso 4: Analizar transcript mejorado (responsabilidad: AsyncVideoAnalysisService)
+            async with limiter.slot("analyze"):
+                notify("analyzing")
+                stage_started = time.perf_counter()
+                analysis = await self.video_analysis_service.analyze_transcript(
+                    improved_transcript,
+                    usage=usage
+                )
+            latency_ms["analysis"] = _elapsed_ms(stage_started)
+
+        result = self._build_result(improved_transcript, analysis)
+        emit("analyzed", {"hook": result["hook"], "script_base": result["script_base"]})
+
+        if video_key and self.result_cache:
+            await asyncio.to_thread(self.result_cache.set, video_key, self._cache_mode(mode, window), result)
+
+        return self._response(result, mode, latency_ms, usage, download, started)
+
+    async def _transcribe_streaming(
+        self,
+        url: str,
+        max_seconds: Optional[float] = None,
+        backend: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """Versión async de VideoAnalysisPipeline._transcribe_streaming."""
+        process = self.video_downloader.open_stream(url)
+        try:
+            transcript = await self.transcription_service.transcribe_stream(
+                process.stdout, max_seconds, backend, info
+            )
+        except NonStreamableMediaError:
+            await asyncio.to_thread(self.video_downloader.finish_stream, process)
+            return None
+        except asyncio.CancelledError:
+            # La petición se canceló: cortar la descarga para que ffmpeg y el motor
+            # reciban el fin del stream y el hilo termine
+            self.video_downloader.stop_stream(process)
+            raise
+        except Exception:
+            # Si yt-dlp ya falló se lanza el error de descarga; si no, se corta y sigue este error
+            await asyncio.to_thread(self.video_downloader.abort_stream, process)
+            raise
+        if max_seconds:
+            # El resto del video no hace falta
+            await asyncio.to_thread(self.video_downloader.stop_stream, process)
+        else:
+            await asyncio.to_thread(self.video_downloader.finish_stream, process)
+        return transcript
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milisegundos transcurridos desde `started` (time.perf_counter)."""
+    return round((time.perf_counter() - started) * 1000, 1)
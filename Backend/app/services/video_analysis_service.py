@@ -1,26 +1,70 @@
+import asyncio
 import json
-from typing import Dict, Any, Optional
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+from openai import OpenAI, AsyncOpenAI
 from app.config import settings
+from app.services.completion_cache import CompletionCache
+from app.services.single_flight import SingleFlight, AsyncSingleFlight
+from app.services.rate_limiter import ProviderRateLimiter, RateLimitExceeded, get_rate_limiter
+from app.services.hedging import DeadlineExceeded, Hedger, get_hedger, remaining_seconds
+from app.services.model_router import ContextWindowExceeded, ModelRouter
+from app.services.token_estimator import estimate_message_tokens
+from app.services.incremental_json import JsonArrayItemParser
+from app.services.transcript_chunking import chunk_transcript
+from app.services.metrics import get_metrics
 
 
 class VideoAnalysisService:
     """Servicio para analizar videos virales usando ChatGPT."""
     
-    def __init__(self):
-        """Inicializa el cliente de OpenAI."""
+    def __init__(
+        self,
+        completion_cache: Optional[CompletionCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        hedger: Optional[Hedger] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """
+        Inicializa el cliente de OpenAI.
+        
+        Args:
+            completion_cache: Caché de completions para no repetir prompts idénticos (opcional)
+            single_flight: Deduplicación de generaciones de hooks idénticas en curso (opcional)
+            rate_limiter: Límites de tasa de OpenAI (opcional, usa el del proceso)
+            hedger: Plazos y copias de respaldo de las llamadas (opcional, usa el del proceso)
+            router: Modelo y max_tokens por etapa (opcional, usa la tabla de settings)
+        """
+        from app.prompts.registry import get_prompt_registry
+        
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY no está configurado")
         
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.OPENAI_MODEL
+        # Los reintentos los hace el limitador (respetando la cuota compartida), no el SDK
+        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        self.completion_cache = completion_cache
+        self.single_flight = single_flight
+        self.rate_limiter = rate_limiter or get_rate_limiter("openai")
+        self.hedger = hedger or get_hedger()
+        self.router = router or ModelRouter()
+        self.prompts = get_prompt_registry()
     
-    def improve_transcript(self, transcript: str) -> str:
+    def improve_transcript(self, transcript: str, usage: Optional[Dict[str, int]] = None) -> str:
         """
         Mejora y corrige el transcript usando ChatGPT.
         
+        Los transcripts de más de IMPROVE_CHUNK_CHARS caracteres se dividen en
+        fragmentos (sin cortar oraciones) que se corrigen en paralelo y se unen
+        en orden, así la latencia depende del tamaño del fragmento y no del
+        transcript; el fragmento se achica si no cabe en el modelo de
+        corrección. Un fragmento que falla o vuelve truncado (finish_reason
+        distinto de "stop") se conserva sin corregir; si OpenAI sigue
+        rechazando por límite de tasa tras los reintentos, el error se propaga.
+        
         Args:
             transcript: Transcripción original (puede tener errores)
+            usage: Diccionario opcional donde se acumula el uso de tokens
             
         Returns:
             Transcript mejorado y corregido
@@ -28,43 +72,50 @@ class VideoAnalysisService:
         if not transcript or not transcript.strip():
             return transcript
         
+        chunks = chunk_transcript(transcript, self._improve_chunk_chars())
+        if len(chunks) == 1:
+            # Mismo prompt que sin fragmentar (conserva las claves de caché)
+            return self._improve_chunk(transcript, usage)
+        
+        chunk_usages: List[Dict[str, int]] = [{} for _ in chunks]
+        with ThreadPoolExecutor(max_workers=max(1, settings.IMPROVE_CONCURRENCY)) as executor:
+            improved = list(executor.map(self._improve_chunk, chunks, chunk_usages))
+        
+        self._merge_usage(usage, chunk_usages)
+        return " ".join(improved)
+    
+    def _improve_chunk_chars(self) -> int:
+        """
+        Tamaño de los fragmentos de corrección: IMPROVE_CHUNK_CHARS, achicado
+        si el modelo de corrección no puede devolver un fragmento así de largo.
+        """
+        fits = self.router.max_input_chars("improve", self._improve_request("")["messages"])
+        if settings.IMPROVE_CHUNK_CHARS <= 0:
+            return max(1, fits)
+        return max(1, min(settings.IMPROVE_CHUNK_CHARS, fits))
+    
+    def _improve_chunk(self, chunk: str, usage: Optional[Dict[str, int]] = None) -> str:
+        """Corrige un fragmento del transcript; si falla o se trunca, lo retorna sin cambios."""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un experto en corrección de transcripciones de audio. Tu tarea es corregir errores de transcripción, mejorar la gramática y hacer el texto más claro, manteniendo el sentido original."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Corrige y mejora la siguiente transcripción de un video. 
-                        Corrige errores de transcripción, mejora la gramática y haz el texto más claro.
-                        Mantén el sentido original y no cambies el contenido.
-
-                        TRANSCRIPCIÓN ORIGINAL:
-                        {transcript}
-
-                        Responde SOLO con el texto corregido, sin explicaciones adicionales."""
-                    }
-                ],
-                temperature=0.3,  # Baja temperatura para correcciones precisas
-                max_tokens=2000
-            )
-            
-            improved = response.choices[0].message.content.strip()
-            return improved if improved else transcript
-            
+            completion = self._chat_completion(**self._improve_request(chunk), usage=usage)
+        except RateLimitExceeded:
+            raise
         except Exception:
-            # Si falla, devolver el transcript original
-            return transcript
+            # Si falla, devolver el fragmento original
+            return chunk
+        
+        return self._finish_improve(completion, chunk)
     
-    def analyze_transcript(self, transcript: str) -> Dict[str, Any]:
+    def analyze_transcript(self, transcript: str, usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
         """
         Analiza un transcript de video usando ChatGPT.
         
+        El transcript se analiza tal cual; si se quiere corregir antes, se debe
+        llamar a improve_transcript una sola vez desde el orquestador.
+        
         Args:
-            transcript: Transcripción completa del video (se mejora automáticamente)
+            transcript: Transcripción completa del video
+            usage: Diccionario opcional donde se acumula el uso de tokens
             
         Returns:
             Diccionario con el análisis completo (hook, estructura, emociones, plantilla)
@@ -75,46 +126,93 @@ class VideoAnalysisService:
         if not transcript or not transcript.strip():
             raise ValueError("El transcript no puede estar vacío")
         
-        # Paso 1: Mejorar el transcript antes de analizar
-        improved_transcript = self.improve_transcript(transcript)
+        try:
+            # Llamar a ChatGPT
+            completion = self._chat_completion(**self._analyze_request(transcript), usage=usage)
+            
+            # Extraer y parsear la respuesta
+            return self._parse_json(completion["content"])
+            
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
+    
+    def analyze_transcript_single_pass(
+        self,
+        transcript: str,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Corrige y analiza el transcript en una sola llamada a ChatGPT.
         
-        from app.prompts.video_analysis_prompts import get_video_analysis_prompt
+        Si el transcript corregido no cabe en LLM_MAX_TOKENS_SINGLE_PASS (la
+        respuesta llegaría truncada), se corrige por fragmentos y se analiza
+        aparte, como en two_pass.
         
-        # Obtener el prompt con el transcript mejorado
-        prompt = get_video_analysis_prompt(improved_transcript)
+        Args:
+            transcript: Transcripción original del video (puede tener errores)
+            usage: Diccionario opcional donde se acumula el uso de tokens
+            
+        Returns:
+            Diccionario con el transcript corregido, el hook y el script_base
+            
+        Raises:
+            Exception: Si hay error al llamar a OpenAI o parsear la respuesta
+        """
+        if not transcript or not transcript.strip():
+            raise ValueError("El transcript no puede estar vacío")
+        
+        if not self.router.output_fits("single_pass", transcript):
+            improved = self.improve_transcript(transcript, usage=usage)
+            return self._finish_two_pass(self.analyze_transcript(improved, usage=usage), improved)
         
         try:
-            # Llamar a ChatGPT
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un experto en análisis de contenido viral, storytelling y creación de videos exitosos. Siempre respondes en formato JSON válido."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},  # Forzar respuesta JSON
-                temperature=0.5,  # Menos creatividad para respuestas más directas
-                max_tokens=1000  # Menos tokens para respuesta más rápida
-            )
+            completion = self._chat_completion(**self._single_pass_request(transcript), usage=usage)
             
-            # Extraer y parsear la respuesta
-            content = response.choices[0].message.content
+            return self._finish_single_pass(self._parse_json(completion["content"]), transcript)
             
-            if not content:
-                raise Exception("OpenAI no devolvió contenido")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
+    
+    def analyze_hook_window(
+        self,
+        transcript: str,
+        window_seconds: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Corrige e identifica el hook de los primeros segundos de un video en una sola llamada.
+        
+        Args:
+            transcript: Transcripción original del inicio del video
+            window_seconds: Segundos del inicio del video que cubre la transcripción
+            usage: Diccionario opcional donde se acumula el uso de tokens
             
-            # Parsear JSON
-            analysis = json.loads(content)
+        Returns:
+            Diccionario con el transcript corregido y el hook
             
-            return analysis
+        Raises:
+            Exception: Si hay error al llamar a OpenAI o parsear la respuesta
+        """
+        if not transcript or not transcript.strip():
+            raise ValueError("El transcript no puede estar vacío")
+        
+        try:
+            completion = self._chat_completion(**self._hook_window_request(transcript, window_seconds), usage=usage)
+            
+            return self._finish_single_pass(self._parse_json(completion["content"]), transcript)
             
         except json.JSONDecodeError as e:
             raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
         except Exception as e:
             raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
     
@@ -150,7 +248,13 @@ class VideoAnalysisService:
         except Exception:
             return None
     
-    def generate_hooks(self, idea: str, nicho: Optional[str] = None, platform: Optional[str] = None) -> list[Dict[str, Any]]:
+    def generate_hooks(
+        self,
+        idea: str,
+        nicho: Optional[str] = None,
+        platform: Optional[str] = None,
+        fresh: bool = False
+    ) -> list[Dict[str, Any]]:
         """
         Genera múltiples versiones de hooks basadas en una idea.
         
@@ -158,115 +262,726 @@ class VideoAnalysisService:
             idea: Descripción de la idea o guion base
             nicho: Nicho o categoría del contenido (opcional)
             platform: Plataforma destino (tiktok, instagram, twitter, linkedin, facebook)
-            
+            fresh: Si es True, ignora la caché y pide variantes nuevas a OpenAI
+        
         Returns:
             Lista de hooks generados con sus scores de retención
-            
+        
         Raises:
             Exception: Si hay error al llamar a OpenAI o parsear la respuesta
         """
         if not idea or not idea.strip():
             raise ValueError("La idea no puede estar vacía")
         
-        # Contexto de plataforma
-        platform_context = self._get_platform_context(platform)
-        nicho_context = f"\nNicho o categoría: {nicho}" if nicho else ""
+        if fresh or not self.single_flight:
+            return self._generate_hooks(idea, nicho, platform, fresh)
         
-        prompt = f"""Eres un Viral Hook Creator experto en generar titulares y hooks que capturan atención para redes sociales.
-
-TEMA/IDEA: {idea}{nicho_context}{platform_context}
-
-Analiza el tema considerando:
-- Intereses y puntos de dolor de la audiencia objetivo
-- Tendencias actuales relacionadas con el tema
-- Ángulos únicos o perspectivas que no han sido sobreusadas
-
-Genera 5 hooks virales de diferentes tipos:
-1. EMOCIONAL: Conecta con emociones profundas del espectador
-2. RACIONAL: Usa lógica, datos o estadísticas convincentes
-3. SORPRESA: Presenta algo inesperado o contraintuitivo
-4. CONTROVERSIAL: Desafía creencias comunes (sin ser ofensivo)
-5. CURIOSIDAD: Crea una pregunta o vacío de información irresistible
-
-Para cada hook, aplica estas técnicas:
-- Usa palabras poderosas que evoquen emoción o curiosidad
-- Crea sentido de urgencia o FOMO (miedo a perderse algo)
-- Haz preguntas provocadoras o declaraciones audaces
-- Usa números o estadísticas para credibilidad
-- Promete valor o solución a un problema
-- Mantenlo conciso y fácil de entender
-
-Para cada hook, evalúa su probabilidad de retención (0-100) basándote en:
-- Claridad y dirección del mensaje
-- Impacto emocional o intelectual
-- Relevancia para el nicho/audiencia
-- Uso efectivo de técnicas probadas
+        # Peticiones idénticas simultáneas comparten una sola llamada a OpenAI
+        hooks, _ = self.single_flight.do(
+            self._hooks_flight_key(idea, nicho, platform),
+            lambda: self._generate_hooks(idea, nicho, platform, fresh)
+        )
+        return [dict(hook) for hook in hooks]
+    
+    def _generate_hooks(
+        self,
+        idea: str,
+        nicho: Optional[str],
+        platform: Optional[str],
+        fresh: bool
+    ) -> list[Dict[str, Any]]:
+        """Llama a OpenAI y retorna los hooks ordenados (sin deduplicar)."""
+        try:
+            completion = self._chat_completion(
+                **self._hooks_request(idea, nicho, platform),
+                use_cache=not fresh
+            )
+            
+            return self._sort_hooks(self._parse_json(completion["content"]))
+            
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al generar hooks con OpenAI: {str(e)}")
+    
+    def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None,
+        usage: Optional[Dict[str, int]] = None,
+        stage: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Llama a ChatGPT y normaliza la respuesta.
+        
+        Si hay caché de completions y se indica la etapa, un prompt idéntico
+        (mismo modelo, mensajes y parámetros) se responde desde la caché. La
+        llamada tiene plazo (LLM_TIMEOUT_SECONDS) y, con hedging activado, una
+        copia de respaldo si tarda más de lo habitual para su etapa.
+        
+        Args:
+            messages: Mensajes de la conversación
+            temperature: Temperatura de muestreo
+            max_tokens: Máximo de tokens de la respuesta
+            response_format: Formato de respuesta (opcional)
+            usage: Diccionario opcional donde se acumula el uso de tokens
+            stage: Etapa que hace la llamada, define el TTL en caché (opcional)
+            use_cache: Si es False, no se lee la caché (sí se actualiza)
+            
+        Returns:
+            Diccionario con content, finish_reason, usage y cached
+            
+        Raises:
+            DeadlineExceeded: Si OpenAI no respondió dentro del plazo
+        """
+        model = self.router.model_for(stage)
+        sampling, cache_key, cached = self._prepare_completion(
+            model, messages, temperature, max_tokens, response_format, usage, stage, use_cache
+        )
+        if cached:
+            return cached
+        
+        def attempt(deadline: float) -> Any:
+            return self.rate_limiter.call(
+                lambda: self.client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    timeout=remaining_seconds(deadline),
+                    **sampling
+                ),
+                tokens=self._estimate_tokens(model, messages, max_tokens),
+                deadline=deadline
+            )
+        
+        with get_metrics().time_stage("openai", stage or "default"):
+            raw_response = self.hedger.run(stage or "default", attempt)
+        return self._finish_completion(raw_response.parse(), usage, cache_key, stage)
+    
+    def _prepare_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        usage: Optional[Dict[str, int]],
+        stage: Optional[str],
+        use_cache: bool
+    ) -> Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Arma los parámetros de muestreo y consulta la caché de completions.
+        
+        Returns:
+            Tupla (parámetros de muestreo, clave de caché, completion en caché o None)
+        """
+        sampling, cache_key = self._completion_key(model, messages, temperature, max_tokens, response_format, stage)
+        cached = self.completion_cache.get(cache_key) if cache_key and use_cache else None
+        return sampling, cache_key, self._cache_hit(cached, usage)
+    
+    def _completion_key(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        stage: Optional[str]
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Arma los parámetros de muestreo y la clave de caché de la completion.
+        
+        Returns:
+            Tupla (parámetros de muestreo, clave de caché o None si no hay caché o etapa)
+        """
+        sampling: Dict[str, Any] = {
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if response_format:
+            sampling["response_format"] = response_format
+        
+        cache_key = None
+        if self.completion_cache and stage:
+            cache_key = self.completion_cache.make_key(model, messages, sampling)
+        return sampling, cache_key
+    
+    @staticmethod
+    def _cache_hit(cached: Optional[Dict[str, Any]], usage: Optional[Dict[str, int]]) -> Optional[Dict[str, Any]]:
+        """Marca una completion leída de la caché y la cuenta en el uso (None si no hubo acierto)."""
+        if not cached:
+            return None
+        if usage is not None:
+            usage["cached_calls"] = usage.get("cached_calls", 0) + 1
+        return {**cached, "cached": True}
+    
+    def _finish_completion(
+        self,
+        response: Any,
+        usage: Optional[Dict[str, int]],
+        cache_key: Optional[str],
+        stage: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Normaliza la respuesta de OpenAI, acumula el uso de tokens y la guarda en caché.
+        
+        Returns:
+            Diccionario con content, finish_reason, usage y cached
+        """
+        choice = response.choices[0]
+        completion = self._record_completion(
+            choice.message.content, choice.finish_reason, response.usage, usage, stage
+        )
+        self._store_completion(cache_key, stage, completion)
+        return completion
+    
+    def _record_completion(
+        self,
+        content: Optional[str],
+        finish_reason: Optional[str],
+        response_usage: Any,
+        usage: Optional[Dict[str, int]],
+        stage: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Acumula el uso de tokens de una completion (normal o armada desde un
+        stream); _store_completion la guarda en caché.
+        
+        Returns:
+            Diccionario con content, finish_reason, usage y cached
+        """
+        call_usage = {
+            "prompt_tokens": getattr(response_usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(response_usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(response_usage, "total_tokens", 0) or 0,
+            # Tokens del prompt que OpenAI sirvió desde su caché de prefijos
+            "cached_tokens": getattr(getattr(response_usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0,
+        }
+        self.prompts.record_usage(stage, call_usage)
+        get_metrics().add_tokens(stage, self.router.model_for(stage), call_usage)
+        
+        if usage is not None:
+            for key, value in call_usage.items():
+                usage[key] = usage.get(key, 0) + value
+            usage["calls"] = usage.get("calls", 0) + 1
+        
+        return {
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": call_usage,
+            "cached": False,
+        }
+    
+    def _store_completion(self, cache_key: Optional[str], stage: Optional[str], completion: Dict[str, Any]) -> None:
+        """Guarda en caché una completion de _record_completion si terminó bien."""
+        # Solo se guardan respuestas completas (no truncadas ni vacías)
+        if cache_key and completion["content"] and completion["finish_reason"] == "stop":
+            self.completion_cache.set(cache_key, stage, {
+                key: completion[key] for key in ("content", "finish_reason", "usage")
+            })
+    
+    def _improve_request(self, transcript: str) -> Dict[str, Any]:
+        """Construye la llamada de corrección del transcript."""
+        request = {
+            "messages": self.prompts.render("improve", transcript=transcript),
+            "temperature": 0.3,  # Baja temperatura para correcciones precisas
+            "stage": "improve",
+        }
+        request["max_tokens"] = self.router.max_tokens("improve", request["messages"], transcript)
+        return request
+    
+    def _analyze_request(self, transcript: str) -> Dict[str, Any]:
+        """Construye la llamada de análisis del transcript."""
+        request = {
+            "messages": self.prompts.render("analyze", transcript=transcript),
+            "response_format": {"type": "json_object"},  # Forzar respuesta JSON
+            "temperature": 0.5,  # Menos creatividad para respuestas más directas
+            "stage": "analyze",
+        }
+        request["max_tokens"] = self.router.max_tokens("analyze", request["messages"])
+        return request
+    
+    def _single_pass_request(self, transcript: str) -> Dict[str, Any]:
+        """Construye la llamada que corrige y analiza el transcript a la vez."""
+        request = {
+            "messages": self.prompts.render("single_pass", transcript=transcript),
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,  # Baja temperatura: la corrección debe ser fiel
+            "stage": "single_pass",
+        }
+        request["max_tokens"] = self.router.max_tokens("single_pass", request["messages"], transcript)
+        return request
+    
+    def _hook_window_request(self, transcript: str, window_seconds: int) -> Dict[str, Any]:
+        """Construye la llamada que corrige el inicio del video e identifica su hook."""
+        request = {
+            "messages": self.prompts.render("hook_window", transcript=transcript, window_seconds=window_seconds),
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+            "stage": "hook_window",
+        }
+        request["max_tokens"] = self.router.max_tokens("hook_window", request["messages"], transcript)
+        return request
+    
+    def _hooks_request(
+        self,
+        idea: str,
+        nicho: Optional[str],
+        platform: Optional[str]
+    ) -> Dict[str, Any]:
+        """Construye la llamada de generación de hooks."""
+        from app.prompts.hook_prompts import get_hook_prompt_fields
+        
+        request = {
+            "messages": self.prompts.render("hooks", **get_hook_prompt_fields(idea, nicho, platform)),
+            "response_format": {"type": "json_object"},
+            "temperature": 0.8,
+            "stage": "hooks",
+        }
+        request["max_tokens"] = self.router.max_tokens("hooks", request["messages"])
+        return request
+    
+    @staticmethod
+    def _finish_improve(completion: Dict[str, Any], original: str) -> str:
+        """Texto corregido, o el original si la respuesta vino vacía o truncada."""
+        improved = (completion["content"] or "").strip()
+        # "length": se alcanzó max_tokens y el texto quedó cortado
+        if not improved or completion.get("finish_reason") not in (None, "stop"):
+            return original
+        return improved
+    
+    @staticmethod
+    def _estimate_tokens(model: str, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """
+        Tokens que OpenAI descuenta de la cuota por minuto al recibir la
+        llamada: el prompt más max_tokens.
+        """
+        return estimate_message_tokens(messages, model) + max_tokens
+    
+    @staticmethod
+    def _merge_usage(usage: Optional[Dict[str, int]], parts: List[Dict[str, int]]) -> None:
+        """Suma el uso de tokens de llamadas paralelas (cada una con su diccionario)."""
+        if usage is None:
+            return
+        for part in parts:
+            for key, value in part.items():
+                usage[key] = usage.get(key, 0) + value
+    
+    @staticmethod
+    def _parse_json(content: Optional[str]) -> Dict[str, Any]:
+        """Parsea el JSON de una respuesta de OpenAI."""
+        if not content:
+            raise Exception("OpenAI no devolvió contenido")
+        
+        return json.loads(content)
+    
+    @staticmethod
+    def _finish_single_pass(analysis: Dict[str, Any], transcript: str) -> Dict[str, Any]:
+        """Completa el análisis de una sola llamada con el transcript corregido."""
+        # Si el modelo no devolvió la corrección, conservar el original
+        corrected = (analysis.get("transcript") or "").strip()
+        analysis["transcript"] = corrected if corrected else transcript
+        return analysis
+    
+    @staticmethod
+    def _finish_two_pass(analysis: Dict[str, Any], improved_transcript: str) -> Dict[str, Any]:
+        """Análisis de single_pass armado con la corrección y el análisis por separado."""
+        analysis["transcript"] = improved_transcript
+        return analysis
+    
+    @staticmethod
+    def _hooks_flight_key(idea: str, nicho: Optional[str], platform: Optional[str]) -> str:
+        """Clave de single-flight de una generación de hooks."""
+        return json.dumps([idea, nicho, platform], ensure_ascii=False)
+    
+    @staticmethod
+    def _sort_hooks(result: Dict[str, Any]) -> list[Dict[str, Any]]:
+        """Extrae los hooks de la respuesta ordenados por retention_score (de mayor a menor)."""
+        hooks = result.get("hooks", [])
+        hooks.sort(key=lambda x: x.get("retention_score", 0), reverse=True)
+        return hooks
 
-Responde en formato JSON:
-{{
-    "hooks": [
-        {{
-            "text": "Texto del hook",
-            "type": "Emocional|Racional|Sorpresa|Controversial|Curiosidad",
-            "retention_score": 75.5,
-            "description": "Explicación de por qué funciona este hook"
-        }}
-    ]
-}}
 
-IMPORTANTE: 
-- Hooks cortos (1-2 oraciones máximo)
-- Impactantes desde la primera palabra
-- Ordena de mayor a menor retention_score"""
+class AsyncVideoAnalysisService(VideoAnalysisService):
+    """
+    Variante async de VideoAnalysisService (AsyncOpenAI).
+    
+    Usa los mismos prompts, parámetros y caché de completions; solo cambia la
+    llamada a OpenAI, que no ocupa un hilo mientras espera la respuesta.
+    """
+    
+    def __init__(
+        self,
+        completion_cache: Optional[CompletionCache] = None,
+        single_flight: Optional[AsyncSingleFlight] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        hedger: Optional[Hedger] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """
+        Inicializa el cliente async de OpenAI.
+        
+        Args:
+            completion_cache: Caché de completions para no repetir prompts idénticos (opcional)
+            single_flight: Deduplicación de generaciones de hooks idénticas en curso (opcional)
+            rate_limiter: Límites de tasa de OpenAI (opcional, usa el del proceso)
+            hedger: Plazos y copias de respaldo de las llamadas (opcional, usa el del proceso)
+            router: Modelo y max_tokens por etapa (opcional, usa la tabla de settings)
+        """
+        super().__init__(
+            completion_cache=completion_cache,
+            single_flight=single_flight,
+            rate_limiter=rate_limiter,
+            hedger=hedger,
+            router=router
+        )
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    
+    async def improve_transcript(self, transcript: str, usage: Optional[Dict[str, int]] = None) -> str:
+        """Versión async de VideoAnalysisService.improve_transcript."""
+        if not transcript or not transcript.strip():
+            return transcript
+        
+        chunks = chunk_transcript(transcript, self._improve_chunk_chars())
+        if len(chunks) == 1:
+            return await self._improve_chunk(transcript, usage)
+        
+        semaphore = asyncio.Semaphore(max(1, settings.IMPROVE_CONCURRENCY))
+        
+        async def improve(chunk: str) -> str:
+            async with semaphore:
+                return await self._improve_chunk(chunk, usage)
+        
+        improved = await asyncio.gather(*(improve(chunk) for chunk in chunks))
+        return " ".join(improved)
+    
+    async def _improve_chunk(self, chunk: str, usage: Optional[Dict[str, int]] = None) -> str:
+        """Versión async de VideoAnalysisService._improve_chunk."""
+        try:
+            completion = await self._chat_completion(**self._improve_request(chunk), usage=usage)
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            # Si falla, devolver el fragmento original
+            return chunk
+        
+        return self._finish_improve(completion, chunk)
+    
+    async def analyze_transcript(self, transcript: str, usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisService.analyze_transcript."""
+        if not transcript or not transcript.strip():
+            raise ValueError("El transcript no puede estar vacío")
+        
+        try:
+            completion = await self._chat_completion(**self._analyze_request(transcript), usage=usage)
+            
+            return self._parse_json(completion["content"])
+            
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
+    
+    async def analyze_transcript_single_pass(
+        self,
+        transcript: str,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisService.analyze_transcript_single_pass."""
+        if not transcript or not transcript.strip():
+            raise ValueError("El transcript no puede estar vacío")
+        
+        if not self.router.output_fits("single_pass", transcript):
+            improved = await self.improve_transcript(transcript, usage=usage)
+            return self._finish_two_pass(await self.analyze_transcript(improved, usage=usage), improved)
+        
+        try:
+            completion = await self._chat_completion(**self._single_pass_request(transcript), usage=usage)
+            
+            return self._finish_single_pass(self._parse_json(completion["content"]), transcript)
+            
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
+    
+    async def analyze_hook_window(
+        self,
+        transcript: str,
+        window_seconds: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisService.analyze_hook_window."""
+        if not transcript or not transcript.strip():
+            raise ValueError("El transcript no puede estar vacío")
+        
+        try:
+            completion = await self._chat_completion(
+                **self._hook_window_request(transcript, window_seconds),
+                usage=usage
+            )
+            
+            return self._finish_single_pass(self._parse_json(completion["content"]), transcript)
+            
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al analizar transcript con OpenAI: {str(e)}")
+    
+    async def extract_hook(self, transcript: str) -> Optional[Dict[str, Any]]:
+        """Versión async de VideoAnalysisService.extract_hook."""
+        try:
+            analysis = await self.analyze_transcript(transcript)
+            return analysis.get("hook")
+        except Exception:
+            return None
+    
+    async def get_replicable_template(self, transcript: str) -> Optional[Dict[str, Any]]:
+        """Versión async de VideoAnalysisService.get_replicable_template."""
+        try:
+            analysis = await self.analyze_transcript(transcript)
+            return analysis.get("replicable_template")
+        except Exception:
+            return None
+    
+    async def generate_hooks(
+        self,
+        idea: str,
+        nicho: Optional[str] = None,
+        platform: Optional[str] = None,
+        fresh: bool = False
+    ) -> list[Dict[str, Any]]:
+        """Versión async de VideoAnalysisService.generate_hooks."""
+        if not idea or not idea.strip():
+            raise ValueError("La idea no puede estar vacía")
+        
+        if fresh or not self.single_flight:
+            return await self._generate_hooks(idea, nicho, platform, fresh)
         
+        hooks, _ = await self.single_flight.do(
+            self._hooks_flight_key(idea, nicho, platform),
+            lambda: self._generate_hooks(idea, nicho, platform, fresh)
+        )
+        return [dict(hook) for hook in hooks]
+    
+    async def _generate_hooks(
+        self,
+        idea: str,
+        nicho: Optional[str],
+        platform: Optional[str],
+        fresh: bool
+    ) -> list[Dict[str, Any]]:
+        """Versión async de VideoAnalysisService._generate_hooks."""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un Viral Hook Creator experto en generar titulares y hooks que capturan atención inmediatamente. Conoces las técnicas más efectivas para cada plataforma social. Siempre respondes en formato JSON válido."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.8,
-                max_tokens=1500
+            completion = await self._chat_completion(
+                **self._hooks_request(idea, nicho, platform),
+                use_cache=not fresh
             )
             
-            content = response.choices[0].message.content
+            return self._sort_hooks(self._parse_json(completion["content"]))
             
-            if not content:
-                raise Exception("OpenAI no devolvió contenido")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
+        except Exception as e:
+            raise Exception(f"Error al generar hooks con OpenAI: {str(e)}")
+    
+    async def stream_hooks(
+        self,
+        idea: str,
+        nicho: Optional[str] = None,
+        platform: Optional[str] = None,
+        fresh: bool = False,
+        usage: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Genera hooks con la respuesta de OpenAI en streaming.
+        
+        Usa el mismo prompt que generate_hooks, pero cada hook se entrega apenas
+        se cierra su objeto JSON, en el orden en que lo escribe el modelo (el
+        prompt le pide ordenarlos por retention_score). La respuesta completa se
+        guarda en la misma entrada de caché que usa generate_hooks; un acierto
+        de caché, o una generate_hooks idéntica en curso, entrega los hooks ya
+        ordenados.
+        
+        Args:
+            idea: Descripción de la idea o guion base
+            nicho: Nicho o categoría del contenido (opcional)
+            platform: Plataforma destino (opcional)
+            fresh: Si es True, ignora la caché y pide variantes nuevas a OpenAI
+            usage: Diccionario opcional donde se acumula el uso de tokens
+            
+        Yields:
+            Cada hook generado (text, type, retention_score, description)
+            
+        Raises:
+            DeadlineExceeded: Si el stream no terminó en LLM_TIMEOUT_SECONDS
+            Exception: Si hay error al llamar a OpenAI o parsear la respuesta
+        """
+        if not idea or not idea.strip():
+            raise ValueError("La idea no puede estar vacía")
+        
+        flight_key = self._hooks_flight_key(idea, nicho, platform)
+        if not fresh and self.single_flight and self.single_flight.in_flight(flight_key):
+            # Unirse a la generación en curso en lugar de pedir otra a OpenAI
+            hooks, _ = await self.single_flight.do(
+                flight_key,
+                lambda: self._generate_hooks(idea, nicho, platform, fresh)
+            )
+            for hook in hooks:
+                yield dict(hook)
+            return
+        
+        request = self._hooks_request(idea, nicho, platform)
+        stage = request.pop("stage")
+        messages = request.pop("messages")
+        model = self.router.model_for(stage)
+        sampling, cache_key, cached = await self._prepare_completion(
+            model, messages, request["temperature"], request["max_tokens"],
+            request.get("response_format"), usage, stage, not fresh
+        )
+        
+        try:
+            if cached:
+                for hook in self._sort_hooks(self._parse_json(cached["content"])):
+                    yield hook
+                return
             
-            result = json.loads(content)
-            hooks = result.get("hooks", [])
+            parser = JsonArrayItemParser("hooks")
+            finish_reason = None
+            response_usage = None
+            emitted = 0
             
-            # Ordenar por retention_score (de mayor a menor)
-            hooks.sort(key=lambda x: x.get("retention_score", 0), reverse=True)
+            # Se mide el stream completo, desde la apertura hasta el último chunk
+            with get_metrics().time_stage("openai", f"{stage}_stream"):
+                # El limitador cubre la apertura del stream (ahí llegan los 429), no su lectura.
+                # Sin copia de respaldo: los hooks se entregan a medida que llegan y dos streams no se pueden mezclar
+                deadline = self.hedger.deadline()
+                raw_response = await self.rate_limiter.acall(
+                    lambda: self.client.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=remaining_seconds(deadline),
+                        **sampling
+                    ),
+                    tokens=self._estimate_tokens(model, messages, request["max_tokens"]),
+                    deadline=deadline
+                )
+                stream = raw_response.parse()
+                async with stream:
+                    # El plazo también acota la lectura completa, no solo cada chunk
+                    async for chunk in self.hedger.aiterate(stage, stream, deadline):
+                        # El último chunk trae solo el uso de tokens (sin choices)
+                        if chunk.usage:
+                            response_usage = chunk.usage
+                        for choice in chunk.choices:
+                            if choice.delta and choice.delta.content:
+                                for hook in parser.feed(choice.delta.content):
+                                    emitted += 1
+                                    yield hook
+                            if choice.finish_reason:
+                                finish_reason = choice.finish_reason
             
-            return hooks
+            completion = self._record_completion(parser.text, finish_reason, response_usage, usage, stage)
+            await self._store_completion(cache_key, stage, completion)
+            
+            # Si el modelo no usó la forma esperada, validar el documento completo
+            if not emitted:
+                for hook in self._sort_hooks(self._parse_json(completion["content"])):
+                    yield hook
             
         except json.JSONDecodeError as e:
             raise Exception(f"Error al parsear respuesta de OpenAI: {str(e)}")
+        except (RateLimitExceeded, DeadlineExceeded, ContextWindowExceeded):
+            raise
         except Exception as e:
             raise Exception(f"Error al generar hooks con OpenAI: {str(e)}")
     
-    def _get_platform_context(self, platform: Optional[str]) -> str:
-        """Retorna contexto específico de la plataforma para el prompt."""
-        if not platform:
-            return ""
-        
-        platform_guidelines = {
-            "tiktok": "\nPLATAFORMA: TikTok\n- Hooks cortos y punchy que crean curiosidad en los primeros 3 segundos\n- Usa lenguaje casual y tendencias actuales\n- Enfócate en el valor inmediato o entretenimiento",
-            "instagram": "\nPLATAFORMA: Instagram Reels\n- Hooks visuales y punchy para los primeros 3 segundos\n- Balance entre entretenimiento y valor\n- Considera el formato vertical y scroll rápido",
-            "twitter": "\nPLATAFORMA: Twitter/X\n- Hooks concisos y punzantes (considera límite de caracteres)\n- Usa ingenio y relevancia a tendencias\n- Considera hashtags relevantes",
-            "linkedin": "\nPLATAFORMA: LinkedIn\n- Tono profesional con enfoque en insights de industria\n- Enfócate en desarrollo profesional o lecciones de negocio\n- Crea hooks que inviten a la reflexión",
-            "facebook": "\nPLATAFORMA: Facebook\n- Hooks emocionalmente engaging que fomenten compartir\n- Enfócate en historias y conexión humana\n- Considera audiencia más amplia en edad",
-        }
+    async def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None,
+        usage: Optional[Dict[str, int]] = None,
+        stage: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisService._chat_completion."""
+        model = self.router.model_for(stage)
+        sampling, cache_key, cached = await self._prepare_completion(
+            model, messages, temperature, max_tokens, response_format, usage, stage, use_cache
+        )
+        if cached:
+            return cached
+        
+        async def attempt(deadline: float) -> Any:
+            return await self.rate_limiter.acall(
+                lambda: self.client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    timeout=remaining_seconds(deadline),
+                    **sampling
+                ),
+                tokens=self._estimate_tokens(model, messages, max_tokens),
+                deadline=deadline
+            )
         
-        return platform_guidelines.get(platform.lower(), "")
+        with get_metrics().time_stage("openai", stage or "default"):
+            raw_response = await self.hedger.arun(stage or "default", attempt)
+        return await self._finish_completion(raw_response.parse(), usage, cache_key, stage)
+    
+    async def _prepare_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        usage: Optional[Dict[str, int]],
+        stage: Optional[str],
+        use_cache: bool
+    ) -> Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]:
+        """Versión async de VideoAnalysisService._prepare_completion (la caché en disco se lee en un hilo)."""
+        sampling, cache_key = self._completion_key(model, messages, temperature, max_tokens, response_format, stage)
+        cached = await asyncio.to_thread(self.completion_cache.get, cache_key) if cache_key and use_cache else None
+        return sampling, cache_key, self._cache_hit(cached, usage)
+    
+    async def _finish_completion(
+        self,
+        response: Any,
+        usage: Optional[Dict[str, int]],
+        cache_key: Optional[str],
+        stage: Optional[str]
+    ) -> Dict[str, Any]:
+        """Versión async de VideoAnalysisService._finish_completion."""
+        choice = response.choices[0]
+        completion = self._record_completion(
+            choice.message.content, choice.finish_reason, response.usage, usage, stage
+        )
+        await self._store_completion(cache_key, stage, completion)
+        return completion
+    
+    async def _store_completion(
+        self,
+        cache_key: Optional[str],
+        stage: Optional[str],
+        completion: Dict[str, Any]
+    ) -> None:
+        """Versión async de VideoAnalysisService._store_completion (la caché en disco se escribe en un hilo)."""
+        if cache_key:
+            await asyncio.to_thread(super()._store_completion, cache_key, stage, completion)
 
@@ -1,20 +1,34 @@
 import os
+import subprocess
+import sys
 import uuid
 import yt_dlp
-from typing import Optional
+from yt_dlp.utils import download_range_func
+from typing import Optional, Dict, Any
+from app.config import settings
+from app.services.metrics import get_metrics
+
+
+# Formato de audio más pequeño que siga siendo útil para transcribir; si el
+# sitio no ofrece audio separado, el stream combinado (video+audio) más pequeño
+AUDIO_ONLY_FORMAT = "wa[abr>=?32]/ba/w/w*[acodec!=none]"
+# Formato por defecto de yt-dlp (si no se puede pedir a la instancia): mejor video + mejor audio
+DEFAULT_FORMAT = "bv*+ba/b"
 
 
 class VideoDownloader:
     """Servicio responsable de descargar videos desde URLs."""
     
-    def __init__(self, download_dir: Optional[str] = None):
+    def __init__(self, download_dir: Optional[str] = None, audio_only: Optional[bool] = None):
         """
         Inicializa el descargador de videos.
         
         Args:
             download_dir: Directorio donde se guardarán los videos descargados (opcional, usa env var)
+            audio_only: Si es True descarga solo el audio (opcional, usa settings.DOWNLOAD_AUDIO_ONLY)
         """
         self.download_dir = download_dir or os.getenv("DOWNLOAD_DIR", "downloads")
+        self.audio_only = settings.DOWNLOAD_AUDIO_ONLY if audio_only is None else audio_only
         self._ensure_download_dir()
     
     def _ensure_download_dir(self):
@@ -31,22 +45,230 @@ class VideoDownloader:
         Returns:
             Ruta del archivo descargado
             
+        Raises:
+            Exception: Si ocurre un error durante la descarga
+        """
+        return self.download_media(url)["path"]
+    
+    def download_media(self, url: str, max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Descarga un video (o solo su audio, según audio_only) y reporta cuánto se descargó.
+        
+        Args:
+            url: URL del video a descargar
+            max_seconds: Descargar solo los primeros segundos (opcional); yt-dlp
+                corta el rango con ffmpeg y en streams fragmentados solo baja
+                los fragmentos necesarios
+            
+        Returns:
+            Diccionario con path, format_id, audio_only, duration, bytes_downloaded
+            y bytes_saved (estimado contra la descarga por defecto video+audio
+            del mismo tramo; None si no se puede estimar)
+            
         Raises:
             Exception: Si ocurre un error durante la descarga
         """
         video_id = str(uuid.uuid4())
-        output_path = os.path.join(self.download_dir, f"{video_id}.mp4")
         
         ydl_opts = {
-            "outtmpl": output_path,
             "quiet": True,
             "no_warnings": True,
         }
         
+        if self.audio_only:
+            ydl_opts["outtmpl"] = os.path.join(self.download_dir, f"{video_id}.%(ext)s")
+            ydl_opts["format"] = AUDIO_ONLY_FORMAT
+        else:
+            ydl_opts["outtmpl"] = os.path.join(self.download_dir, f"{video_id}.mp4")
+        
+        if max_seconds:
+            ydl_opts["download_ranges"] = download_range_func(None, [(0, max_seconds)])
+        
+        metrics = get_metrics()
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-            return output_path
+            with metrics.time_stage("download", "yt_dlp"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+                default_size = self._estimate_default_size(ydl, info, max_seconds) if self.audio_only else None
         except Exception as e:
             raise Exception(f"Error descargando video: {str(e)}")
-
+        
+        downloads = info.get("requested_downloads") or [{}]
+        output_path = downloads[0].get("filepath") or ydl_opts["outtmpl"]
+        bytes_downloaded = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+        metrics.add_downloaded_bytes(bytes_downloaded)
+        
+        return {
+            "path": output_path,
+            "format_id": info.get("format_id"),
+            "audio_only": self.audio_only,
+            "duration": info.get("duration"),
+            "bytes_downloaded": bytes_downloaded,
+            "bytes_saved": max(0, default_size - bytes_downloaded) if default_size else None,
+        }
+    
+    @staticmethod
+    def _estimate_default_size(
+        ydl: yt_dlp.YoutubeDL,
+        info: Dict[str, Any],
+        max_seconds: Optional[float] = None
+    ) -> Optional[int]:
+        """
+        Estima el tamaño que tendría la descarga por defecto (mejor video + audio).
+        
+        Args:
+            ydl: Instancia de yt-dlp usada en la descarga
+            info: Información del video retornada por yt-dlp
+            max_seconds: Estimar solo los primeros segundos (opcional), para
+                comparar contra una descarga recortada al mismo tramo
+            
+        Returns:
+            Tamaño estimado en bytes o None si no se puede estimar
+        """
+        formats = info.get("formats")
+        if not formats:
+            return None
+        
+        def format_size(fmt: Dict[str, Any]) -> Optional[float]:
+            if fmt.get("requested_formats"):
+                sizes = [format_size(part) for part in fmt["requested_formats"]]
+                return sum(sizes) if all(sizes) else None
+            size = fmt.get("filesize") or fmt.get("filesize_approx")
+            if not size and fmt.get("tbr") and info.get("duration"):
+                size = fmt["tbr"] * 1000 / 8 * info["duration"]
+            return size
+        
+        try:
+            selector = ydl.build_format_selector(VideoDownloader._default_format(ydl, info))
+            selected = list(selector({
+                "formats": formats,
+                "has_merged_format": any(
+                    fmt.get("vcodec") != "none" and fmt.get("acodec") != "none" for fmt in formats
+                ),
+                "incomplete_formats": False,
+            }))
+        except Exception:
+            return None
+        
+        size = format_size(selected[-1]) if selected else None
+        if size and max_seconds:
+            # Tamaño proporcional al tramo descargado (sin duración no se puede recortar)
+            duration = info.get("duration")
+            size = size * min(1.0, max_seconds / duration) if duration else None
+        return int(size) if size else None
+    
+    @staticmethod
+    def _default_format(ydl: yt_dlp.YoutubeDL, info: Dict[str, Any]) -> str:
+        """
+        Formato que yt-dlp elegiría sin opción -f.
+        
+        yt-dlp no lo expone en su API pública: se usa _default_format_spec si
+        existe y, si no (o si cambió su firma), DEFAULT_FORMAT.
+        """
+        default_format_spec = getattr(ydl, "_default_format_spec", None)
+        if callable(default_format_spec):
+            try:
+                return default_format_spec(info)
+            except TypeError:
+                pass
+        return DEFAULT_FORMAT
+    
+    def open_stream(self, url: str) -> subprocess.Popen:
+        """
+        Inicia la descarga de un video hacia stdout, sin escribir en disco.
+        
+        Se pide un formato de un solo archivo (el audio más pequeño en modo
+        audio_only), porque unir video y audio por separado requiere un archivo
+        en disco.
+        
+        Args:
+            url: URL del video a descargar
+            
+        Returns:
+            Proceso de yt-dlp; los bytes del video salen por process.stdout
+            
+        Raises:
+            Exception: Si no se pudo iniciar yt-dlp
+        """
+        try:
+            return subprocess.Popen(
+                [
+                    sys.executable, "-m", "yt_dlp",
+                    "--quiet",
+                    "--no-warnings",
+                    "--no-part",
+                    "-f", AUDIO_ONLY_FORMAT if self.audio_only else "best",
+                    "-o", "-",
+                    url
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except Exception as e:
+            raise Exception(f"Error descargando video: {str(e)}")
+    
+    def finish_stream(self, process: subprocess.Popen, timeout: float = 30) -> None:
+        """
+        Espera a que termine una descarga iniciada con open_stream.
+        
+        Args:
+            process: Proceso retornado por open_stream
+            timeout: Segundos a esperar antes de matar el proceso
+            
+        Raises:
+            Exception: Si la descarga terminó con error
+        """
+        try:
+            _, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            _, stderr = process.communicate()
+        
+        if process.returncode != 0:
+            detail = (stderr or b"").decode("utf-8", errors="replace").strip()
+            raise Exception(f"Error descargando video: {detail or f'yt-dlp terminó con código {process.returncode}'}")
+    
+    def stop_stream(self, process: subprocess.Popen) -> None:
+        """
+        Corta una descarga iniciada con open_stream cuando ya no se necesita el resto.
+        
+        A diferencia de finish_stream no reporta errores: yt-dlp termina con
+        error al cerrarse el pipe que lo leía.
+        
+        Args:
+            process: Proceso retornado por open_stream
+        """
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        for pipe in (process.stdout, process.stderr):
+            if pipe:
+                pipe.close()
+    
+    def abort_stream(self, process: subprocess.Popen) -> None:
+        """
+        Corta una descarga iniciada con open_stream después de que falló quien la leía.
+        
+        Si yt-dlp ya había terminado con error, ese es el error relevante (el
+        lector solo vio un stream vacío o cortado) y se lanza. Si sigue
+        descargando, se corta sin reportar nada: al cerrarse el pipe yt-dlp
+        termina con error, pero la causa es el fallo del lector.
+        
+        Args:
+            process: Proceso retornado por open_stream
+        
+        Raises:
+            Exception: Si la descarga ya había terminado con error
+        """
+        if process.poll() not in (None, 0):
+            self.finish_stream(process)
+        self.stop_stream(process)
+    
+    def cleanup(self, path: str) -> None:
+        """
+        Elimina un archivo descargado.
+        
+        Args:
+            path: Ruta del archivo a eliminar
+        """
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,68 @@
+"""
+Caché de resultados de análisis de video.
+Responsabilidad única: Guardar y recuperar análisis completos por video canónico.
+"""
+import os
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.services.cache_store import SQLiteCache
+
+
+class VideoResultCache:
+    """Caché persistente de análisis indexada por clave canónica de video y modo."""
+
+    def __init__(self, store: Optional[SQLiteCache] = None):
+        """
+        Inicializa la caché de resultados.
+
+        Args:
+            store: Almacenamiento a usar (opcional, crea uno en settings.CACHE_DIR)
+        """
+        self.enabled = settings.RESULT_CACHE_ENABLED
+        self.store = store or SQLiteCache(
+            path=os.path.join(settings.CACHE_DIR, "video_results.sqlite3"),
+            table="video_results",
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+        )
+
+    def get(self, video_key: str, mode: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el análisis guardado de un video.
+
+        Args:
+            video_key: Clave canónica del video
+            mode: Modo de análisis con el que se generó
+
+        Returns:
+            Diccionario con transcript, hook y script_base, o None
+        """
+        if not self.enabled:
+            return None
+        return self.store.get(self._key(video_key, mode))
+
+    def set(self, video_key: str, mode: str, result: Dict[str, Any]) -> None:
+        """
+        Guarda el análisis de un video.
+
+        Args:
+            video_key: Clave canónica del video
+            mode: Modo de análisis con el que se generó
+            result: Diccionario con transcript, hook y script_base
+        """
+        if not self.enabled:
+            return
+        self.store.set(self._key(video_key, mode), {
+            "transcript": result["transcript"],
+            "hook": result["hook"],
+            "script_base": result["script_base"],
+        })
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna aciertos, fallos y número de entradas de la caché."""
+        return self.store.stats()
+
+    @staticmethod
+    def _key(video_key: str, mode: str) -> str:
+        """Construye la clave de la entrada."""
+        return f"{mode}:{video_key}"
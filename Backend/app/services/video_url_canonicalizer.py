@@ -0,0 +1,133 @@
+"""
+Canonicalización de URLs de video.
+Responsabilidad única: Reducir las distintas formas de una URL (links cortos,
+parámetros de tracking, hosts móviles) a una clave estable por video.
+"""
+import threading
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import yt_dlp
+from yt_dlp.extractor import gen_extractor_classes
+
+
+# Extractores cuyo ID no es el del video final (links cortos que redirigen)
+_REDIRECT_EXTRACTORS = {"Generic", "TikTokVM"}
+
+# Parámetros de tracking que no cambian el video
+_TRACKING_PARAMS = {
+    "si", "igsh", "igshid", "feature", "fbclid", "gclid", "is_from_webapp",
+    "sender_device", "share_id", "share_app_id", "_r", "_t", "t", "ref",
+}
+
+
+class VideoUrlCanonicalizer:
+    """Convierte URLs de video en claves canónicas `<extractor>:<video_id>`."""
+
+    def __init__(self):
+        """Inicializa el canonicalizador; los extractores se cargan al primer uso."""
+        self._extractors = None
+        self._lock = threading.Lock()
+
+    def canonicalize(self, url: str) -> str:
+        """
+        Obtiene la clave canónica de un video.
+
+        Primero intenta con el extractor de yt-dlp que reconoce la URL (sin red).
+        Para links cortos resuelve la redirección con yt-dlp; si nada funciona,
+        usa la URL normalizada sin parámetros de tracking.
+
+        Args:
+            url: URL del video
+
+        Returns:
+            Clave canónica, p. ej. "youtube:dQw4w9WgXcQ"
+        """
+        url = url.strip()
+
+        match = self._match(url)
+        if match and match[0] not in _REDIRECT_EXTRACTORS:
+            return self._key(*match)
+
+        resolved = self._resolve(url)
+        if resolved:
+            return resolved
+
+        return f"url:{self._normalize_url(url)}"
+
+    def _match(self, url: str) -> Optional[Tuple[str, str]]:
+        """Busca el extractor que reconoce la URL y el ID que extrae de ella."""
+        for extractor in self._get_extractors():
+            if extractor.ie_key() == "Generic":
+                continue
+            try:
+                if extractor.suitable(url):
+                    video_id = extractor.get_temp_id(url)
+                    if video_id:
+                        return extractor.ie_key(), str(video_id)
+                    return None
+            except Exception:
+                continue
+        return None
+
+    def _resolve(self, url: str, depth: int = 0) -> Optional[str]:
+        """Resuelve links cortos con yt-dlp (sin descargar) y canonicaliza el destino."""
+        ydl_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
+        }
+
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+        except Exception:
+            return None
+
+        if not info:
+            return None
+
+        # El extractor devolvió otra URL (redirección): canonicalizarla
+        if info.get("_type") in ("url", "url_transparent") and info.get("url"):
+            target = info["url"]
+            match = self._match(target)
+            if match and match[0] not in _REDIRECT_EXTRACTORS:
+                return self._key(*match)
+            if depth < 2 and target != url:
+                return self._resolve(target, depth + 1)
+            return None
+
+        extractor_key = info.get("extractor_key")
+        video_id = info.get("id")
+        if extractor_key and video_id and extractor_key != "Generic":
+            return self._key(extractor_key, str(video_id))
+
+        return None
+
+    def _get_extractors(self):
+        """Carga (una sola vez) la lista de extractores de yt-dlp."""
+        if self._extractors is None:
+            with self._lock:
+                if self._extractors is None:
+                    self._extractors = list(gen_extractor_classes())
+        return self._extractors
+
+    @staticmethod
+    def _key(extractor_key: str, video_id: str) -> str:
+        """Construye la clave canónica."""
+        return f"{extractor_key.lower()}:{video_id}"
+
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        """Normaliza host y quita parámetros de tracking y fragmentos."""
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        for prefix in ("www.", "m."):
+            if host.startswith(prefix):
+                host = host[len(prefix):]
+        query = [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith("utm_")
+        ]
+        path = parts.path.rstrip("/") or "/"
+        return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
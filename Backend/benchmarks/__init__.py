@@ -0,0 +1,3 @@
+"""
+Benchmarks del backend (se ejecutan a mano, no forman parte de la API).
+"""
@@ -0,0 +1,134 @@
+"""
+Benchmark de perfiles de subida de audio a Deepgram.
+
+Compara, para un mismo video, el tamaño subido, la latencia de punta a punta
+(extracción + codificación + transcripción) y el WER de cada perfil. El WER se
+calcula contra una transcripción de referencia o, si no se indica, contra la
+transcripción del perfil "wav".
+
+Uso:
+    python -m benchmarks.audio_profiles video.mp4 [--reference ref.txt]
+        [--profiles wav,flac,opus] [--runs 3]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import unicodedata
+from typing import Dict, Any, List
+from app.services.transcription_service import TranscriptionService, AUDIO_PROFILES
+
+
+def normalize_words(text: str) -> List[str]:
+    """Pasa a minúsculas, quita tildes y puntuación y separa en palabras."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"[a-z0-9ñ']+", text)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Calcula el WER (distancia de Levenshtein por palabras / palabras de referencia).
+
+    Args:
+        reference: Transcripción de referencia
+        hypothesis: Transcripción a evaluar
+
+    Returns:
+        WER entre 0 y (potencialmente) más de 1
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_profile(service: TranscriptionService, media_path: str, profile: str) -> Dict[str, Any]:
+    """Extrae, codifica y transcribe el video con un perfil; retorna tamaño, latencia y texto."""
+    workdir = tempfile.mkdtemp(prefix="audio_profile_")
+    try:
+        local_path = os.path.join(workdir, os.path.basename(media_path))
+        shutil.copy(media_path, local_path)
+
+        started = time.perf_counter()
+        wav_path = service.extract_audio(local_path)
+        encode_started = time.perf_counter()
+        upload_path = service.encode_audio(wav_path, profile)
+        encode_ms = (time.perf_counter() - encode_started) * 1000
+        upload_started = time.perf_counter()
+        transcript = service.transcribe(upload_path, profile)
+        finished = time.perf_counter()
+
+        return {
+            "upload_bytes": os.path.getsize(upload_path),
+            "wav_bytes": os.path.getsize(wav_path),
+            "encode_ms": encode_ms,
+            "transcribe_ms": (finished - upload_started) * 1000,
+            "total_ms": (finished - started) * 1000,
+            "transcript": transcript,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara perfiles de subida de audio a Deepgram")
+    parser.add_argument("media", help="Video o audio de prueba")
+    parser.add_argument("--reference", help="Archivo de texto con la transcripción de referencia")
+    parser.add_argument("--profiles", default=",".join(AUDIO_PROFILES), help="Perfiles separados por coma")
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones por perfil")
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in AUDIO_PROFILES]
+    if unknown:
+        parser.error(f"Perfiles desconocidos: {', '.join(unknown)}")
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as reference_file:
+            reference = reference_file.read()
+
+    service = TranscriptionService()
+    runs: Dict[str, List[Dict[str, Any]]] = {}
+    for profile in profiles:
+        runs[profile] = [run_profile(service, args.media, profile) for _ in range(args.runs)]
+
+    if reference is None:
+        baseline = runs.get("wav") or run_profile(service, args.media, "wav")
+        reference = baseline[0]["transcript"] if isinstance(baseline, list) else baseline["transcript"]
+
+    report = {}
+    for profile, profile_runs in runs.items():
+        first = profile_runs[0]
+        report[profile] = {
+            "content_type": AUDIO_PROFILES[profile]["content_type"],
+            "upload_bytes": first["upload_bytes"],
+            "compression_ratio": round(first["upload_bytes"] / first["wav_bytes"], 3),
+            "encode_ms_median": round(statistics.median(run["encode_ms"] for run in profile_runs), 1),
+            "transcribe_ms_median": round(statistics.median(run["transcribe_ms"] for run in profile_runs), 1),
+            "total_ms_median": round(statistics.median(run["total_ms"] for run in profile_runs), 1),
+            "wer": round(statistics.mean(word_error_rate(reference, run["transcript"]) for run in profile_runs), 4),
+        }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
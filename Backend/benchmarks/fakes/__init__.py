@@ -0,0 +1,3 @@
+"""
+Servidores falsos de las APIs externas para correr benchmarks sin credenciales.
+"""
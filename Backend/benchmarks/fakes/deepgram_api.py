@@ -0,0 +1,114 @@
+"""
+Servidor falso de la API prerecorded de Deepgram (POST /v1/listen).
+
+Recibe el audio (con Content-Length o chunked), espera la latencia
+configurada más seconds_per_mb por MB subido y devuelve una transcripción
+fija con las palabras y sus tiempos, con el formato de Deepgram.
+
+Uso:
+    python -m benchmarks.fakes.deepgram_api [--port 8702] [--latency lognormal:1.5,0.3]
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+from benchmarks.fakes.deepgram_live import DEFAULT_TRANSCRIPT
+from benchmarks.fakes.http_server import FakeHttpServer, FakeRequest, FakeResponse
+from benchmarks.fakes.latency import LatencyDistribution
+
+
+class FakeDeepgram(FakeHttpServer):
+    """Transcripciones falsas de Deepgram con latencia proporcional al audio subido."""
+
+    def __init__(
+        self,
+        transcript: str = DEFAULT_TRANSCRIPT,
+        words: int = 150,
+        words_per_second: float = 2.5,
+        seconds_per_mb: float = 0.0,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            transcript: Texto base de la transcripción (se repite hasta `words` palabras)
+            words: Palabras de cada transcripción
+            words_per_second: Ritmo del habla para los tiempos de las palabras
+            seconds_per_mb: Latencia extra por MB de audio recibido
+            **kwargs: host, port, latency y error_rate (ver FakeHttpServer)
+        """
+        super().__init__(**kwargs)
+        base = transcript.split() or DEFAULT_TRANSCRIPT.split()
+        self.words = [base[i % len(base)] for i in range(max(1, words))]
+        self.words_per_second = words_per_second
+        self.seconds_per_mb = seconds_per_mb
+
+    def delay(self, request: FakeRequest) -> None:
+        """Latencia de la distribución más el tiempo de procesar el audio."""
+        super().delay(request)
+        if self.seconds_per_mb:
+            time.sleep(len(request.body) / 1_000_000 * self.seconds_per_mb)
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        """Responde /v1/listen; el resto de las rutas da 404."""
+        if request.method != "POST" or not request.path.rstrip("/").endswith("/listen"):
+            return FakeResponse.json({"err_code": "NOT_FOUND", "err_msg": f"Ruta no soportada: {request.path}"}, status=404)
+        if not request.body:
+            return FakeResponse.json({"err_code": "Bad Request", "err_msg": "El cuerpo está vacío"}, status=400)
+
+        words = self._words()
+        return FakeResponse.json({
+            "metadata": {
+                "request_id": "fake",
+                "duration": words[-1]["end"],
+                "channels": 1,
+                "models": [request.query.get("model", "nova-2")],
+            },
+            "results": {
+                "channels": [{
+                    "alternatives": [{
+                        "transcript": " ".join(self.words),
+                        "confidence": 0.99,
+                        "words": words,
+                    }],
+                }],
+            },
+        })
+
+    def _words(self) -> List[Dict[str, Any]]:
+        """Palabras con sus tiempos al ritmo configurado."""
+        step = 1.0 / self.words_per_second if self.words_per_second > 0 else 0.4
+        return [
+            {
+                "word": word,
+                "punctuated_word": word,
+                "start": round(index * step, 3),
+                "end": round((index + 1) * step, 3),
+                "confidence": 0.99,
+            }
+            for index, word in enumerate(self.words)
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor falso de Deepgram prerecorded")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8702)
+    parser.add_argument("--latency", default="lognormal:1.5,0.3")
+    parser.add_argument("--seconds-per-mb", type=float, default=0.0)
+    parser.add_argument("--words", type=int, default=150, help="Palabras de cada transcripción")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 429")
+    args = parser.parse_args()
+
+    server = FakeDeepgram(
+        words=args.words,
+        seconds_per_mb=args.seconds_per_mb,
+        host=args.host,
+        port=args.port,
+        latency=LatencyDistribution.parse(args.latency),
+        error_rate=args.error_rate
+    )
+    print(f"Deepgram falso en {server.url}/v1/listen")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Servidor falso del WebSocket de Deepgram (/v1/listen en streaming).
+
+Reproduce una transcripción fija: por cada segundo de audio recibido emite un
+resultado parcial y luego el final con las siguientes palabras; al recibir
+CloseStream entrega el resto, envía Metadata y cierra. Con fail_after_bytes
+cierra la sesión con error (1011) tras recibir ese audio. Sirve para medir y
+probar el cliente live sin credenciales ni red.
+
+Uso:
+    python -m benchmarks.fakes.deepgram_live [--port 8765] [--transcript texto.txt]
+"""
+import argparse
+import json
+import threading
+from typing import List, Optional
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+
+DEFAULT_TRANSCRIPT = (
+    "hola a todos hoy les voy a mostrar el truco que nadie te cuenta para "
+    "crecer en redes sociales quédate hasta el final porque lo mejor viene al final"
+)
+
+
+class FakeDeepgramLive:
+    """Servidor WebSocket que responde como Deepgram live con un texto fijo."""
+
+    def __init__(
+        self,
+        transcript: str = DEFAULT_TRANSCRIPT,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        words_per_second: int = 3,
+        bytes_per_second: int = 16000 * 2,
+        fail_after_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            transcript: Texto que se devuelve, en orden, a medida que llega audio
+            host: Host donde escuchar
+            port: Puerto (0 = uno libre)
+            words_per_second: Palabras que se "reconocen" por segundo de audio
+            bytes_per_second: Bytes de audio por segundo (PCM 16 bits mono 16 kHz)
+            fail_after_bytes: Cerrar con error tras recibir estos bytes de audio (opcional)
+        """
+        self.words = transcript.split()
+        self.words_per_second = words_per_second
+        self.bytes_per_second = bytes_per_second
+        self.fail_after_bytes = fail_after_bytes
+        self.sessions = 0
+        self.audio_bytes = 0
+        self._server = serve(self._handle, host, port)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL ws:// del servidor."""
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}/v1/listen"
+
+    def serve_forever(self) -> None:
+        """Atiende conexiones en este hilo hasta que se llame a stop()."""
+        self._server.serve_forever()
+
+    def start(self) -> "FakeDeepgramLive":
+        """Atiende conexiones en un hilo de fondo."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor."""
+        self._server.shutdown()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _handle(self, websocket) -> None:
+        """Atiende una sesión: audio binario, KeepAlive y CloseStream."""
+        self.sessions += 1
+        received = 0
+        emitted = 0
+        cursor = 0
+
+        try:
+            for message in websocket:
+                if isinstance(message, bytes):
+                    received += len(message)
+                    self.audio_bytes += len(message)
+                    if self.fail_after_bytes is not None and received >= self.fail_after_bytes:
+                        websocket.close(code=1011, reason="Error interno (servidor falso)")
+                        return
+                    # Un resultado final por cada segundo completo de audio
+                    while received - emitted >= self.bytes_per_second:
+                        emitted += self.bytes_per_second
+                        next_cursor = min(cursor + self.words_per_second, len(self.words))
+                        self._send_result(websocket, self.words[cursor:next_cursor][:1], False, emitted)
+                        self._send_result(websocket, self.words[cursor:next_cursor], True, emitted)
+                        cursor = next_cursor
+                    continue
+
+                control = json.loads(message)
+                if control.get("type") == "CloseStream":
+                    self._send_result(websocket, self.words[cursor:], True, received)
+                    websocket.send(json.dumps({
+                        "type": "Metadata",
+                        "duration": received / self.bytes_per_second,
+                        "channels": 1,
+                    }))
+                    websocket.close()
+                    return
+        except ConnectionClosed:
+            return
+
+    def _send_result(self, websocket, words: List[str], is_final: bool, position: int) -> None:
+        """Envía un mensaje Results con el formato de Deepgram."""
+        websocket.send(json.dumps({
+            "type": "Results",
+            "is_final": is_final,
+            "speech_final": is_final,
+            "start": max(0.0, (position - self.bytes_per_second) / self.bytes_per_second),
+            "duration": 1.0,
+            "channel": {"alternatives": [{"transcript": " ".join(words), "confidence": 0.99}]},
+        }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor falso de Deepgram live")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--transcript", help="Archivo de texto con la transcripción a devolver")
+    args = parser.parse_args()
+
+    transcript = DEFAULT_TRANSCRIPT
+    if args.transcript:
+        with open(args.transcript, encoding="utf-8") as transcript_file:
+            transcript = transcript_file.read()
+
+    server = FakeDeepgramLive(transcript=transcript, host=args.host, port=args.port)
+    print(f"Deepgram live falso en {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Base de los servidores HTTP falsos (OpenAI, Deepgram, Supabase, host de videos).
+
+Cada servidor atiende en un hilo de fondo con keep-alive, lee el cuerpo (con
+Content-Length o chunked), espera la latencia configurada y responde lo que
+arma la subclase en handle(). Con error_rate, esa fracción de peticiones
+recibe un 429 con Retry-After, como las APIs reales bajo límite de tasa.
+"""
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+from benchmarks.fakes.latency import LatencyDistribution
+
+
+class FakeRequest:
+    """Petición recibida por un servidor falso."""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        """Cuerpo JSON de la petición (None si está vacío)."""
+        return json.loads(self.body) if self.body else None
+
+
+class FakeResponse:
+    """Respuesta de un servidor falso; un cuerpo iterable se envía en chunks a medida que se genera."""
+
+    def __init__(
+        self,
+        status: int = 200,
+        body: Union[bytes, Iterable[bytes]] = b"",
+        headers: Optional[Dict[str, str]] = None
+    ):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> "FakeResponse":
+        """Respuesta con cuerpo JSON."""
+        return cls(
+            status,
+            json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            {"Content-Type": "application/json", **(headers or {})}
+        )
+
+
+class FakeHttpServer:
+    """Servidor HTTP falso con latencia y errores configurables."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0
+    ):
+        """
+        Args:
+            host: Host donde escuchar
+            port: Puerto (0 = uno libre)
+            latency: Latencia antes de cada respuesta (opcional, sin latencia)
+            error_rate: Fracción de peticiones que reciben un 429
+        """
+        self.latency = latency or LatencyDistribution()
+        self.error_rate = error_rate
+        self.counts = {"requests": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0}
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler_class(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base http:// del servidor."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Atiende peticiones en este hilo hasta que se llame a stop()."""
+        self._server.serve_forever()
+
+    def start(self) -> "FakeHttpServer":
+        """Atiende peticiones en un hilo de fondo."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """Peticiones atendidas, 429 simulados y bytes recibidos y enviados."""
+        with self._lock:
+            return {**self.counts, "latency": str(self.latency), "error_rate": self.error_rate}
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        """Arma la respuesta a una petición (lo implementa cada servidor)."""
+        raise NotImplementedError
+
+    def delay(self, request: FakeRequest) -> None:
+        """Espera antes de responder; las subclases pueden sumar latencia según la petición."""
+        self.latency.sleep()
+
+    def _respond(self, request: FakeRequest) -> FakeResponse:
+        """Latencia, error simulado o la respuesta de la subclase."""
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts["bytes_in"] += len(request.body)
+            rate_limited = self.error_rate > 0 and self._random.random() < self.error_rate
+            if rate_limited:
+                self.counts["errors"] += 1
+        self.delay(request)
+        if rate_limited:
+            return FakeResponse.json(
+                {"error": {"message": "Rate limit reached (servidor falso)", "type": "rate_limit_error"}},
+                status=429,
+                headers={"Retry-After": "1", "retry-after-ms": "200"}
+            )
+        return self.handle(request)
+
+    def _sent(self, size: int) -> None:
+        """Suma bytes enviados."""
+        with self._lock:
+            self.counts["bytes_out"] += size
+
+
+def _handler_class(server: FakeHttpServer) -> type:
+    """Clase de handler de http.server ligada a un servidor falso."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def handle(self):
+            try:
+                super().handle()
+            except (BrokenPipeError, ConnectionResetError):
+                # El cliente cortó la conexión (p. ej. yt-dlp probando la URL)
+                pass
+
+        def do_GET(self):
+            self._dispatch()
+
+        def do_HEAD(self):
+            self._dispatch()
+
+        def do_POST(self):
+            self._dispatch()
+
+        def do_PATCH(self):
+            self._dispatch()
+
+        def do_DELETE(self):
+            self._dispatch()
+
+        def log_message(self, *args):
+            pass
+
+        def _dispatch(self) -> None:
+            request = FakeRequest(self.command, self.path, dict(self.headers.items()), self._read_body())
+            try:
+                response = server._respond(request)
+            except Exception as e:
+                response = FakeResponse.json({"message": f"Error en el servidor falso: {e}"}, status=500)
+            self._write(response)
+
+        def _read_body(self) -> bytes:
+            """Lee el cuerpo con Content-Length o Transfer-Encoding: chunked."""
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        # Trailers opcionales hasta la línea vacía
+                        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                            pass
+                        return b"".join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _write(self, response: FakeResponse) -> None:
+            self.send_response(response.status)
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+
+            if isinstance(response.body, bytes):
+                if "Content-Length" not in response.headers:
+                    self.send_header("Content-Length", str(len(response.body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(response.body)
+                    server._sent(len(response.body))
+                return
+
+            # Con Content-Length (p. ej. un archivo) los bytes van tal cual; si no, en chunks
+            chunked = "Content-Length" not in response.headers
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            if self.command == "HEAD":
+                return
+            for chunk in response.body:
+                if chunk:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                    self.wfile.flush()
+                    server._sent(len(chunk))
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
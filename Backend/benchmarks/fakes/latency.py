@@ -0,0 +1,91 @@
+"""
+Distribuciones de latencia para los servidores falsos.
+
+Se describen con un texto corto, para pasarlas por línea de comandos:
+    "0.2"                 fija (segundos)
+    "fixed:0.2"           fija
+    "uniform:0.1,0.5"     uniforme entre 0.1 y 0.5
+    "normal:0.3,0.05"     normal (media, desvío), recortada en 0
+    "lognormal:0.3,0.6"   log-normal (mediana, sigma): cola larga como las APIs reales
+"""
+import math
+import random
+import threading
+import time
+from typing import Optional
+
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+class LatencyDistribution:
+    """Latencia simulada de una respuesta, en segundos."""
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            kind: fixed, uniform, normal o lognormal
+            a: Valor fijo, mínimo, media o mediana (según kind)
+            b: Máximo, desvío o sigma (según kind; no se usa en fixed)
+            seed: Semilla para repetir la misma secuencia (opcional)
+
+        Raises:
+            ValueError: Si la distribución o sus parámetros no son válidos
+        """
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución de latencia desconocida: {kind}. Usa: {', '.join(DISTRIBUTIONS)}")
+        if a < 0 or b < 0:
+            raise ValueError("Los parámetros de latencia no pueden ser negativos")
+        if kind == "uniform" and b < a:
+            raise ValueError("uniform: el máximo debe ser mayor o igual al mínimo")
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: Optional[str], seed: Optional[int] = None) -> "LatencyDistribution":
+        """
+        Crea la distribución desde su descripción (ver el docstring del módulo).
+
+        Raises:
+            ValueError: Si la descripción no es válida
+        """
+        if not spec:
+            return cls(seed=seed)
+        kind, _, params = spec.partition(":")
+        if not params:
+            kind, params = "fixed", kind
+        try:
+            values = [float(value) for value in params.split(",") if value.strip()]
+        except ValueError:
+            raise ValueError(f"Latencia no válida: {spec}")
+        if not values or len(values) > 2:
+            raise ValueError(f"Latencia no válida: {spec}")
+        return cls(kind.strip(), values[0], values[1] if len(values) > 1 else 0.0, seed=seed)
+
+    def sample(self) -> float:
+        """Una latencia de la distribución (nunca negativa)."""
+        with self._lock:
+            if self.kind == "uniform":
+                value = self._random.uniform(self.a, self.b)
+            elif self.kind == "normal":
+                value = self._random.gauss(self.a, self.b)
+            elif self.kind == "lognormal":
+                value = self._random.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+            else:
+                value = self.a
+        return max(0.0, value)
+
+    def sleep(self) -> float:
+        """Duerme una latencia de la distribución y la retorna."""
+        seconds = self.sample()
+        if seconds:
+            time.sleep(seconds)
+        return seconds
+
+    def __str__(self) -> str:
+        if self.kind == "fixed":
+            return f"fixed:{self.a:g}"
+        return f"{self.kind}:{self.a:g},{self.b:g}"
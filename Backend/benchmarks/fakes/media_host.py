@@ -0,0 +1,122 @@
+"""
+Host falso de videos: el reemplazo local de TikTok/YouTube para yt-dlp.
+
+Sirve los archivos de un directorio en /media/<nombre> (GET y HEAD, con
+Range) a un ancho de banda limitado. yt-dlp los descarga con su extractor
+genérico, así que la etapa de descarga (y el modo stream, con yt-dlp en un
+subproceso) corre el código real sin salir a internet.
+
+Los parámetros de la URL no cambian el archivo: url_for(nombre, tag) genera
+URLs distintas del mismo video, para que cada petición del benchmark sea un
+video nuevo para las cachés.
+
+Uso:
+    python -m benchmarks.fakes.media_host carpeta/ [--port 8704] [--bandwidth 5000000]
+"""
+import argparse
+import mimetypes
+import os
+import re
+import time
+from typing import Any, Iterator, Optional
+from urllib.parse import quote, unquote
+from benchmarks.fakes.http_server import FakeHttpServer, FakeRequest, FakeResponse
+from benchmarks.fakes.latency import LatencyDistribution
+
+
+# Tamaño de cada escritura al enviar un archivo
+_SEND_CHUNK_SIZE = 64 * 1024
+
+
+class FakeMediaHost(FakeHttpServer):
+    """Servidor de archivos de video con latencia y ancho de banda configurables."""
+
+    def __init__(self, media_dir: str, bandwidth: float = 0.0, **kwargs: Any):
+        """
+        Args:
+            media_dir: Directorio con los videos o audios a servir
+            bandwidth: Bytes por segundo de cada descarga (0 = sin límite)
+            **kwargs: host, port, latency y error_rate (ver FakeHttpServer)
+        """
+        super().__init__(**kwargs)
+        self.media_dir = os.path.abspath(media_dir)
+        self.bandwidth = bandwidth
+
+    def url_for(self, name: str, tag: Optional[str] = None) -> str:
+        """URL de un archivo; `tag` la hace distinta sin cambiar el archivo."""
+        url = f"{self.url}/media/{quote(name)}"
+        return f"{url}?v={quote(str(tag))}" if tag is not None else url
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        """Sirve /media/<nombre> completo o el rango pedido."""
+        if request.method not in ("GET", "HEAD") or not request.path.startswith("/media/"):
+            return FakeResponse(404)
+        name = unquote(request.path[len("/media/"):])
+        path = os.path.abspath(os.path.join(self.media_dir, name))
+        if os.path.dirname(path) != self.media_dir or not os.path.isfile(path):
+            return FakeResponse(404)
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        status = 200
+        headers = {
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "Accept-Ranges": "bytes",
+        }
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", request.headers.get("Range", request.headers.get("range", "")))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size or start > end:
+                return FakeResponse(416, b"", {"Content-Range": f"bytes */{size}"})
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        headers["Content-Length"] = str(end - start + 1)
+        if request.method == "HEAD":
+            return FakeResponse(status, iter(()), headers)
+        return FakeResponse(status, self._send_file(path, start, end - start + 1), headers)
+
+    def _send_file(self, path: str, start: int, length: int) -> Iterator[bytes]:
+        """Lee el rango del archivo respetando el ancho de banda."""
+        started = time.monotonic()
+        sent = 0
+        with open(path, "rb") as media:
+            media.seek(start)
+            while sent < length:
+                chunk = media.read(min(_SEND_CHUNK_SIZE, length - sent))
+                if not chunk:
+                    return
+                sent += len(chunk)
+                yield chunk
+                if self.bandwidth > 0:
+                    ahead = sent / self.bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Host falso de videos para yt-dlp")
+    parser.add_argument("media_dir", help="Directorio con los videos a servir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8704)
+    parser.add_argument("--latency", default="fixed:0.05")
+    parser.add_argument("--bandwidth", type=float, default=5_000_000, help="Bytes por segundo por descarga")
+    args = parser.parse_args()
+
+    server = FakeMediaHost(
+        args.media_dir,
+        bandwidth=args.bandwidth,
+        host=args.host,
+        port=args.port,
+        latency=LatencyDistribution.parse(args.latency)
+    )
+    print(f"Host de videos falso en {server.url}/media/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
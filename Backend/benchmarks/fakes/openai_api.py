@@ -0,0 +1,205 @@
+"""
+Servidor falso de la API de chat completions de OpenAI.
+
+Responde POST /v1/chat/completions con el formato de OpenAI (normal o en
+streaming SSE con la fila de uso final), sin llamar a ningún modelo:
+- corrección (sin response_format): devuelve el transcript recibido
+- JSON: el transcript recibido, un hook y un script_base; o hooks, si el
+  prompt es el de generación de hooks
+
+La latencia configurada es el tiempo hasta el primer token; con
+tokens_per_second además se simula la generación de la respuesta. El uso de
+tokens incluye cached_tokens, simulando la caché de prefijos de OpenAI
+(prompts de 1024 tokens o más, en bloques de 128).
+
+Uso:
+    python -m benchmarks.fakes.openai_api [--port 8701] [--latency lognormal:0.8,0.4]
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+from benchmarks.fakes.http_server import FakeHttpServer, FakeRequest, FakeResponse
+from benchmarks.fakes.latency import LatencyDistribution
+
+
+# Caracteres por token de la simulación
+_CHARS_PER_TOKEN = 4
+# Caché de prefijos de OpenAI: mínimo de tokens y tamaño de bloque
+_CACHE_MIN_TOKENS = 1024
+_CACHE_BLOCK_TOKENS = 128
+# Caracteres por evento en las respuestas en streaming
+_STREAM_CHUNK_CHARS = 24
+
+
+class FakeOpenAI(FakeHttpServer):
+    """Chat completions falsas con latencia, velocidad de generación y caché de prefijos."""
+
+    def __init__(self, tokens_per_second: float = 0.0, **kwargs: Any):
+        """
+        Args:
+            tokens_per_second: Velocidad de generación simulada (0 = instantánea)
+            **kwargs: host, port, latency y error_rate (ver FakeHttpServer)
+        """
+        super().__init__(**kwargs)
+        self.tokens_per_second = tokens_per_second
+        self._prefixes: Set[str] = set()
+        self._prefixes_lock = threading.Lock()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        """Responde chat completions; el resto de las rutas da 404."""
+        if request.method != "POST" or not request.path.rstrip("/").endswith("/chat/completions"):
+            return FakeResponse.json({"error": {"message": f"Ruta no soportada: {request.path}"}}, status=404)
+
+        payload = request.json() or {}
+        messages = payload.get("messages") or []
+        content = _completion_content(messages, bool(payload.get("response_format")))
+        prompt_text = "".join(str(message.get("content") or "") for message in messages)
+        usage = {
+            "prompt_tokens": _tokens(prompt_text),
+            "completion_tokens": _tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        usage["prompt_tokens_details"] = {"cached_tokens": self._cached_tokens(prompt_text)}
+        model = payload.get("model", "gpt-fake")
+
+        if payload.get("stream"):
+            include_usage = bool((payload.get("stream_options") or {}).get("include_usage"))
+            return FakeResponse(
+                200,
+                self._stream(model, content, usage if include_usage else None),
+                {"Content-Type": "text/event-stream"}
+            )
+
+        self._generate(usage["completion_tokens"])
+        return FakeResponse.json({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, model: str, content: str, usage: Optional[Dict[str, Any]]) -> Iterator[bytes]:
+        """Eventos SSE con la respuesta en fragmentos y, si se pidió, el uso al final."""
+        base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        pieces = [content[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(content), _STREAM_CHUNK_CHARS)] or [""]
+        for index, piece in enumerate(pieces):
+            self._generate(_tokens(piece))
+            delta = {"content": piece} if index else {"role": "assistant", "content": piece}
+            yield _sse({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        yield _sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if usage is not None:
+            yield _sse({**base, "choices": [], "usage": usage})
+        yield b"data: [DONE]\n\n"
+
+    def _generate(self, tokens: int) -> None:
+        """Simula el tiempo de generación de `tokens` tokens."""
+        if self.tokens_per_second > 0 and tokens:
+            time.sleep(tokens / self.tokens_per_second)
+
+    def _cached_tokens(self, prompt_text: str) -> int:
+        """
+        Tokens del prompt que OpenAI serviría desde caché: el prefijo más largo
+        (en bloques de 128 tokens, desde 1024) que ya se vio en otra petición.
+        """
+        total = _tokens(prompt_text)
+        if total < _CACHE_MIN_TOKENS:
+            return 0
+        boundaries = range(_CACHE_MIN_TOKENS, total + 1, _CACHE_BLOCK_TOKENS)
+        digests = [
+            hashlib.sha256(prompt_text[:tokens * _CHARS_PER_TOKEN].encode("utf-8")).hexdigest()
+            for tokens in boundaries
+        ]
+        with self._prefixes_lock:
+            cached = 0
+            for tokens, digest in zip(boundaries, digests):
+                if digest not in self._prefixes:
+                    break
+                cached = tokens
+            self._prefixes.update(digests)
+        return cached
+
+
+def _completion_content(messages: List[Dict[str, Any]], json_mode: bool) -> str:
+    """Respuesta de la etapa según el prompt recibido."""
+    system = str(messages[0].get("content") or "") if messages else ""
+    user = str(messages[-1].get("content") or "") if messages else ""
+    transcript = _prompt_transcript(user)
+
+    if not json_mode:
+        return transcript or user[-500:]
+    if "Hook Creator" in system:
+        return json.dumps({"hooks": [
+            {
+                "text": f"Hook {kind.lower()} de prueba",
+                "type": kind,
+                "retention_score": score,
+                "description": "Respuesta del servidor falso",
+            }
+            for kind, score in (
+                ("Emocional", 82.0), ("Racional", 71.5), ("Sorpresa", 77.0),
+                ("Controversial", 64.0), ("Curiosidad", 88.5),
+            )
+        ]}, ensure_ascii=False)
+    words = transcript.split()
+    return json.dumps({
+        "transcript": transcript,
+        "hook": {
+            "general": "Deja de hacer ____ así, ya aprendí ____",
+            "used_in_video": " ".join(words[:12]) or "Hook de prueba",
+            "type": "curiosidad",
+        },
+        "script_base": "Deja de hacer ____ así. Primero ____, luego ____ y al final ____.",
+    }, ensure_ascii=False)
+
+
+def _prompt_transcript(user_content: str) -> str:
+    """Transcript del sufijo del prompt (lo que sigue a la línea "TRANSCRIP...")."""
+    marker = user_content.rfind("\nTRANSCRIP")
+    if marker < 0:
+        return ""
+    _, _, transcript = user_content[marker + 1:].partition("\n")
+    return transcript.strip()
+
+
+def _tokens(text: str) -> int:
+    """Tokens aproximados de un texto."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN) if text else 0
+
+
+def _sse(data: Dict[str, Any]) -> bytes:
+    """Evento SSE de un chunk."""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor falso de OpenAI chat completions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8701)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="Tiempo hasta el primer token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 429")
+    args = parser.parse_args()
+
+    server = FakeOpenAI(
+        tokens_per_second=args.tokens_per_second,
+        host=args.host,
+        port=args.port,
+        latency=LatencyDistribution.parse(args.latency),
+        error_rate=args.error_rate
+    )
+    print(f"OpenAI falso en {server.url}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Servidor falso de la API REST de Supabase (PostgREST en /rest/v1).
+
+Guarda las filas en memoria. Cada usuario consultado por primera vez
+arranca con rows_per_user filas de ejemplo en video_analyses y viral_hooks.
+Soporta lo que usa SupabaseService: filtros eq, order, limit, offset e
+insert con return=representation.
+
+Uso:
+    python -m benchmarks.fakes.supabase_api [--port 8703] [--latency normal:0.04,0.01]
+"""
+import argparse
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from benchmarks.fakes.http_server import FakeHttpServer, FakeRequest, FakeResponse
+from benchmarks.fakes.latency import LatencyDistribution
+
+
+# Parámetros de PostgREST que no son filtros
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+
+class FakeSupabase(FakeHttpServer):
+    """Tablas de Supabase en memoria detrás de una API PostgREST mínima."""
+
+    def __init__(self, rows_per_user: int = 20, **kwargs: Any):
+        """
+        Args:
+            rows_per_user: Filas de ejemplo por usuario en cada tabla
+            **kwargs: host, port, latency y error_rate (ver FakeHttpServer)
+        """
+        super().__init__(**kwargs)
+        self.rows_per_user = rows_per_user
+        self._tables: Dict[str, List[Dict[str, Any]]] = {"video_analyses": [], "viral_hooks": []}
+        self._seeded: Dict[str, set] = {table: set() for table in self._tables}
+        self._tables_lock = threading.Lock()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        """Responde /rest/v1/<tabla> (GET y POST)."""
+        prefix = "/rest/v1/"
+        table = request.path[len(prefix):].strip("/") if request.path.startswith(prefix) else ""
+        if table not in self._tables:
+            return FakeResponse.json(
+                {"code": "42P01", "message": f'relation "{table}" does not exist'},
+                status=404
+            )
+        if request.method == "GET":
+            return FakeResponse.json(self._select(table, request.query))
+        if request.method == "POST":
+            rows = self._insert(table, request.json())
+            if "return=representation" not in request.headers.get("Prefer", request.headers.get("prefer", "")):
+                return FakeResponse(201)
+            return FakeResponse.json(rows, status=201)
+        return FakeResponse.json({"message": f"Método no soportado: {request.method}"}, status=405)
+
+    def _select(self, table: str, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Filas que cumplen los filtros eq, ordenadas y paginadas."""
+        filters = {
+            column: value[len("eq."):]
+            for column, value in query.items()
+            if column not in _RESERVED_PARAMS and value.startswith("eq.")
+        }
+        with self._tables_lock:
+            if "user_id" in filters:
+                self._seed(table, filters["user_id"])
+            rows = [
+                row for row in self._tables[table]
+                if all(str(row.get(column)) == value for column, value in filters.items())
+            ]
+
+        for order in reversed([part for part in query.get("order", "").split(",") if part]):
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: str(row.get(column) or ""), reverse=direction.startswith("desc"))
+
+        offset = int(query.get("offset") or 0)
+        limit = int(query["limit"]) if query.get("limit") else None
+        return rows[offset:offset + limit if limit is not None else None]
+
+    def _insert(self, table: str, payload: Any) -> List[Dict[str, Any]]:
+        """Agrega filas (un objeto o una lista) con id y fechas."""
+        items = payload if isinstance(payload, list) else [payload or {}]
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **item} for item in items]
+        with self._tables_lock:
+            self._tables[table].extend(rows)
+        return rows
+
+    def _seed(self, table: str, user_id: str) -> None:
+        """Filas de ejemplo de un usuario (una sola vez por tabla)."""
+        if user_id in self._seeded[table]:
+            return
+        self._seeded[table].add(user_id)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for index in range(self.rows_per_user):
+            created_at = (start + timedelta(hours=index)).isoformat()
+            row = {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": created_at}
+            if table == "video_analyses":
+                row.update({
+                    "video_url": f"https://www.tiktok.com/@demo/video/{7000000000000000000 + index}",
+                    "video_title": f"Video de ejemplo {index}",
+                    "transcript": "hola a todos hoy les voy a mostrar el truco que nadie te cuenta " * 8,
+                    "hook": "Deja de hacer ____ así, ya aprendí ____",
+                    "script_base": "Deja de hacer ____ así. Primero ____, luego ____ y al final ____.",
+                    "platform": "tiktok",
+                    "updated_at": created_at,
+                })
+            else:
+                row.update({
+                    "idea_input": f"Idea de ejemplo {index}",
+                    "hook_text": "Nadie te cuenta esto sobre ____",
+                    "hook_type": "Curiosidad",
+                    "retention_score": 80.0,
+                    "niche": "marketing",
+                    "notes": None,
+                })
+            self._tables[table].append(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor falso de la API REST de Supabase")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8703)
+    parser.add_argument("--latency", default="normal:0.04,0.01")
+    parser.add_argument("--rows-per-user", type=int, default=20)
+    args = parser.parse_args()
+
+    server = FakeSupabase(
+        rows_per_user=args.rows_per_user,
+        host=args.host,
+        port=args.port,
+        latency=LatencyDistribution.parse(args.latency)
+    )
+    print(f"Supabase falso en {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de transcripción en streaming: prerecorded vs live (WebSocket).
+
+Simula una descarga lenta entregando el video por un pipe a una velocidad fija
+y mide, para cada backend, cuánto tarda la transcripción después de que
+termina la "descarga" (la cola). Con el backend live la cola debería ser de
+unos pocos segundos aunque el video sea largo.
+
+Uso:
+    python -m benchmarks.live_transcription video.mp4 [--rate 500000]
+        [--backends prerecorded,live] [--fake]
+
+Con --fake el backend live usa el servidor falso de benchmarks.fakes.deepgram_live
+(no hace falta DEEPGRAM_API_KEY real).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Any
+from app.config import settings
+from app.services.transcription_service import TranscriptionService
+from app.services.transcription_backends import STREAM_BACKENDS
+from benchmarks.fakes.deepgram_live import FakeDeepgramLive
+
+
+def _throttled_pipe(media_path: str, rate: int, finished: Dict[str, float]):
+    """Abre un pipe que recibe el archivo a `rate` bytes/s; anota cuándo terminó."""
+    read_fd, write_fd = os.pipe()
+
+    def writer():
+        chunk_size = max(1, rate // 20)
+        with open(media_path, "rb") as media, os.fdopen(write_fd, "wb") as sink:
+            try:
+                for chunk in iter(lambda: media.read(chunk_size), b""):
+                    sink.write(chunk)
+                    sink.flush()
+                    time.sleep(len(chunk) / rate)
+            except BrokenPipeError:
+                pass
+        finished["download"] = time.perf_counter()
+
+    threading.Thread(target=writer, daemon=True).start()
+    return os.fdopen(read_fd, "rb")
+
+
+def run_backend(service: TranscriptionService, media_path: str, backend: str, rate: int) -> Dict[str, Any]:
+    """Transcribe el video con un backend y mide la descarga y la cola."""
+    service.get_backend("deepgram").stream_backend = backend
+    finished: Dict[str, float] = {}
+    started = time.perf_counter()
+    transcript = service.transcribe_stream(_throttled_pipe(media_path, rate, finished), backend="deepgram")
+    ended = time.perf_counter()
+    download_end = finished.get("download", ended)
+
+    return {
+        "download_s": round(download_end - started, 2),
+        "total_s": round(ended - started, 2),
+        "tail_s": round(ended - download_end, 2),
+        "words": len(transcript.split()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara la transcripción prerecorded y live en streaming")
+    parser.add_argument("media", help="Video o audio de prueba")
+    parser.add_argument("--rate", type=int, default=500_000, help="Velocidad de la descarga simulada (bytes/s)")
+    parser.add_argument("--backends", default=",".join(STREAM_BACKENDS), help="Backends separados por coma")
+    parser.add_argument("--fake", action="store_true", help="Usar el servidor falso de Deepgram live")
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    unknown = [backend for backend in backends if backend not in STREAM_BACKENDS]
+    if unknown:
+        parser.error(f"Backends desconocidos: {', '.join(unknown)}")
+
+    fake = None
+    if args.fake:
+        settings.DEEPGRAM_API_KEY = settings.DEEPGRAM_API_KEY or "fake"
+        fake = FakeDeepgramLive().start()
+        # El servidor falso solo implementa el WebSocket
+        backends = [backend for backend in backends if backend == "live"]
+
+    try:
+        service = TranscriptionService()
+        if fake:
+            service.get_backend("deepgram").live_url = fake.url
+        report = {backend: run_backend(service, args.media, backend, args.rate) for backend in backends}
+    finally:
+        if fake:
+            fake.stop()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
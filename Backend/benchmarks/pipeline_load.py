@@ -0,0 +1,446 @@
+"""
+Benchmark de punta a punta del backend, sin red ni créditos de APIs.
+
+Levanta en un proceso aparte servidores falsos de OpenAI, Deepgram y
+Supabase y un host de videos para yt-dlp (benchmarks.fakes), arranca la app
+con uvicorn en este proceso apuntando a ellos y dispara peticiones con la
+concurrencia indicada contra cada escenario:
+- analyze:        POST /video/analyze (yt-dlp, ffmpeg, Deepgram y OpenAI)
+- hooks:          POST /video/generate-hooks
+- list_analyses:  GET /video/analyses (Supabase)
+- list_hooks:     GET /video/hooks (Supabase)
+
+Reporta en JSON, por escenario: throughput, errores, latencia de punta a
+punta y por etapa (p50/p95/p99; las etapas son las que la app informa en
+metrics.latency_ms) y el pico de RSS del proceso de la app; al final, el
+pico de RSS de la app y de sus subprocesos (ffmpeg, yt-dlp) y las peticiones
+que recibió cada servidor falso.
+
+Cada análisis pide una URL distinta y las cachés de resultados, completions
+y huellas se desactivan, para medir el camino en frío (--with-caches las
+deja activas). Los límites de tasa de OpenAI quedan sin cuota fija salvo que
+se configuren por variables de entorno; el resto de la configuración
+(ANALYSIS_MODE, MEDIA_PIPELINE, concurrencias...) se toma del entorno como
+en producción.
+
+Uso:
+    python -m benchmarks.pipeline_load [--scenarios analyze,hooks,list_analyses,list_hooks]
+        [--requests 50] [--concurrency 8] [--media video.mp4]
+        [--openai-latency lognormal:0.8,0.4] [--deepgram-latency lognormal:1.5,0.3]
+        [--supabase-latency normal:0.04,0.01] [--output resultados.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+
+SCENARIOS = ("analyze", "hooks", "list_analyses", "list_hooks")
+_PLATFORMS = ("tiktok", "instagram", "twitter", "linkedin", "facebook")
+# Key con forma de JWT: supabase-py valida el formato antes de conectarse
+_FAKE_SUPABASE_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark"
+# Cada cuánto se mide el RSS durante un escenario
+_RSS_SAMPLE_SECONDS = 0.05
+
+
+def serve_fakes(options: Dict[str, Any], media_dir: str, channel, stop) -> None:
+    """
+    Proceso de los servidores falsos: publica sus URLs por `channel`, espera
+    `stop` y publica sus estadísticas antes de terminar.
+    """
+    from benchmarks.fakes.deepgram_api import FakeDeepgram
+    from benchmarks.fakes.latency import LatencyDistribution
+    from benchmarks.fakes.media_host import FakeMediaHost
+    from benchmarks.fakes.openai_api import FakeOpenAI
+    from benchmarks.fakes.supabase_api import FakeSupabase
+
+    seed = options["seed"]
+    servers = {
+        "openai": FakeOpenAI(
+            tokens_per_second=options["openai_tokens_per_second"],
+            latency=LatencyDistribution.parse(options["openai_latency"], seed),
+            error_rate=options["openai_error_rate"]
+        ),
+        "deepgram": FakeDeepgram(
+            words=options["deepgram_words"],
+            seconds_per_mb=options["deepgram_seconds_per_mb"],
+            latency=LatencyDistribution.parse(options["deepgram_latency"], seed),
+            error_rate=options["deepgram_error_rate"]
+        ),
+        "supabase": FakeSupabase(
+            rows_per_user=options["supabase_rows"],
+            latency=LatencyDistribution.parse(options["supabase_latency"], seed)
+        ),
+        "media": FakeMediaHost(
+            media_dir,
+            bandwidth=options["media_bandwidth"],
+            latency=LatencyDistribution.parse(options["media_latency"], seed)
+        ),
+    }
+    for server in servers.values():
+        server.start()
+    channel.put({name: server.url for name, server in servers.items()})
+
+    stop.wait()
+    channel.put({name: server.stats() for name, server in servers.items()})
+    for server in servers.values():
+        server.stop()
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Cantidad, media, p50/p95/p99 (nearest-rank) y máximo, en milisegundos."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def percentile(percent: float) -> float:
+        rank = max(1, math.ceil(percent / 100.0 * len(ordered)))
+        return round(ordered[rank - 1], 1)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class RssSampler:
+    """Mide el RSS del proceso en un hilo y guarda el máximo (Linux, /proc)."""
+
+    def __init__(self, interval: float = _RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __enter__(self) -> "RssSampler":
+        self.peak_bytes = self._current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        """Pico de RSS en MB (None si no se pudo medir)."""
+        return round(self.peak_bytes / 1_000_000, 1) if self.peak_bytes else None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._current())
+
+    def _current(self) -> int:
+        """RSS actual en bytes (0 fuera de Linux)."""
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * self._page_size
+        except (OSError, IndexError, ValueError):
+            return 0
+
+
+def _peak_rss_mb(who: int) -> float:
+    """Pico de RSS de getrusage en MB (ru_maxrss está en KB en Linux y en bytes en macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / 1_000_000 if sys.platform == "darwin" else peak / 1000, 1)
+
+
+def _make_media(media: Optional[str], seconds: int, media_dir: str) -> str:
+    """
+    Deja en media_dir el video a servir: el indicado o uno sintético (tono y
+    fondo negro) generado con ffmpeg. Retorna el nombre del archivo.
+    """
+    if media:
+        name = os.path.basename(media)
+        shutil.copyfile(media, os.path.join(media_dir, name))
+        return name
+
+    name = f"synthetic-{seconds}s.mp4"
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+                "-f", "lavfi", "-i", f"color=c=black:s=320x240:r=15:d={seconds}",
+                "-shortest", "-c:v", "mpeg4", "-c:a", "aac",
+                os.path.join(media_dir, name),
+            ],
+            check=True,
+            capture_output=True
+        )
+    except FileNotFoundError:
+        raise SystemExit("ffmpeg no está instalado o no está en el PATH (o usa --media)")
+    except subprocess.CalledProcessError as e:
+        raise SystemExit(f"No se pudo generar el video de prueba: {e.stderr.decode(errors='replace')}")
+    return name
+
+
+def _configure_environment(urls: Dict[str, str], work_dir: str, with_caches: bool) -> None:
+    """Apunta la app a los servidores falsos (antes de importarla: settings lee el entorno al importar)."""
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": f"{urls['openai']}/v1",
+        "DEEPGRAM_API_KEY": "benchmark",
+        "DEEPGRAM_URL": f"{urls['deepgram']}/v1/listen",
+        "SUPABASE_URL": urls["supabase"],
+        "SUPABASE_KEY": _FAKE_SUPABASE_KEY,
+        "SUPABASE_SERVICE_KEY": _FAKE_SUPABASE_KEY,
+        "TRANSCRIPTION_BACKEND": "deepgram",
+        "TRANSCRIPTION_FALLBACK_BACKEND": "",
+        "CACHE_DIR": os.path.join(work_dir, "cache"),
+        "DOWNLOAD_DIR": os.path.join(work_dir, "downloads"),
+    })
+    os.environ.setdefault("OPENAI_RPM", "0")
+    os.environ.setdefault("OPENAI_TPM", "0")
+    if not with_caches:
+        for name in ("RESULT_CACHE_ENABLED", "LLM_CACHE_ENABLED", "FINGERPRINT_CACHE_ENABLED"):
+            os.environ[name] = "false"
+
+
+def _start_app() -> Tuple[Any, threading.Thread, str]:
+    """Arranca la app con uvicorn en un hilo (con su propio event loop) y retorna su URL."""
+    import uvicorn
+    from app.main import app
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise SystemExit("La app no arrancó")
+        time.sleep(0.05)
+    host, port = sock.getsockname()[:2]
+    return server, thread, f"http://{host}:{port}"
+
+
+def _scenario_requests(
+    scenario: str,
+    media_url: str,
+    users: int,
+    mode: Optional[str],
+    run_id: str
+) -> Callable[[int], Tuple[str, str, Dict[str, Any]]]:
+    """Arma la petición número i de un escenario: (método, ruta, kwargs de httpx)."""
+    if scenario == "analyze":
+        def build(i: int):
+            body = {"url": f"{media_url}?v={run_id}-{i}"}
+            if mode:
+                body["mode"] = mode
+            return "POST", "/video/analyze", {"json": body}
+    elif scenario == "hooks":
+        def build(i: int):
+            return "POST", "/video/generate-hooks", {"json": {
+                "idea": f"Cómo preparar un desayuno distinto cada día de la semana (variante {run_id}-{i})",
+                "nicho": "cocina",
+                "platform": _PLATFORMS[i % len(_PLATFORMS)],
+                "fresh": True,
+            }}
+    else:
+        path = "/video/analyses" if scenario == "list_analyses" else "/video/hooks"
+
+        def build(i: int):
+            return "GET", path, {"params": {"user_id": f"benchmark-user-{i % users}", "limit": 50}}
+    return build
+
+
+async def run_scenario(
+    base_url: str,
+    build: Callable[[int], Tuple[str, str, Dict[str, Any]]],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    timeout: float
+) -> Dict[str, Any]:
+    """
+    Ejecuta `requests` peticiones con `concurrency` en vuelo (tras `warmup`
+    peticiones que no se miden) y resume latencias, etapas y errores.
+    """
+    import httpx
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def send(i: int, record: bool) -> None:
+            method, path, kwargs = build(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                response, status = None, type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if not record:
+                return
+            if response is None or response.status_code >= 400:
+                errors[status] = errors.get(status, 0) + 1
+                return
+            latencies.append(elapsed_ms)
+            metrics = (response.json() or {}).get("metrics") or {}
+            for stage, value in (metrics.get("latency_ms") or {}).items():
+                stages.setdefault(stage, []).append(value)
+
+        for i in range(warmup):
+            await send(-1 - i, record=False)
+
+        pending = iter(range(requests))
+
+        async def worker() -> None:
+            for i in pending:
+                await send(i, record=True)
+
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+            duration = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else None,
+        "latency_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stages.items())},
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+def _app_stats(base_url: str) -> Dict[str, Any]:
+    """Estado de los límites de tasa y de los prompts al terminar (health de la app)."""
+    import httpx
+
+    stats = {}
+    for name, path in (("rate_limits", "/health/rate-limits"), ("prompts", "/health/prompts")):
+        try:
+            stats[name] = httpx.get(f"{base_url}{path}", timeout=10).json()
+        except Exception as e:
+            stats[name] = {"error": str(e)}
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta contra servidores falsos")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Escenarios separados por coma")
+    parser.add_argument("--requests", type=int, default=50, help="Peticiones medidas por escenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones en vuelo")
+    parser.add_argument("--warmup", type=int, default=1, help="Peticiones previas sin medir, por escenario")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Timeout de cada petición (s)")
+    parser.add_argument("--mode", choices=("two_pass", "single_pass", "hook_only"), help="Modo de análisis")
+    parser.add_argument("--media", help="Video a servir (por defecto uno sintético generado con ffmpeg)")
+    parser.add_argument("--media-seconds", type=int, default=30, help="Duración del video sintético")
+    parser.add_argument("--media-latency", default="fixed:0.05")
+    parser.add_argument("--media-bandwidth", type=float, default=5_000_000, help="Bytes/s por descarga (0 = sin límite)")
+    parser.add_argument("--openai-latency", default="lognormal:0.8,0.4", help="Tiempo hasta el primer token")
+    parser.add_argument("--openai-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0, help="Fracción de 429")
+    parser.add_argument("--deepgram-latency", default="lognormal:1.5,0.3")
+    parser.add_argument("--deepgram-seconds-per-mb", type=float, default=0.0)
+    parser.add_argument("--deepgram-words", type=int, default=150)
+    parser.add_argument("--deepgram-error-rate", type=float, default=0.0, help="Fracción de 429")
+    parser.add_argument("--supabase-latency", default="normal:0.04,0.01")
+    parser.add_argument("--supabase-rows", type=int, default=20, help="Filas de ejemplo por usuario y tabla")
+    parser.add_argument("--users", type=int, default=10, help="Usuarios distintos en los listados")
+    parser.add_argument("--seed", type=int, help="Semilla de las latencias (opcional)")
+    parser.add_argument("--with-caches", action="store_true", help="No desactivar las cachés de la app")
+    parser.add_argument("--output", help="Archivo donde guardar el JSON (por defecto, stdout)")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    from benchmarks.fakes.latency import LatencyDistribution
+    for option in ("media_latency", "openai_latency", "deepgram_latency", "supabase_latency"):
+        try:
+            LatencyDistribution.parse(getattr(args, option))
+        except ValueError as e:
+            parser.error(f"--{option.replace('_', '-')}: {e}")
+
+    work_dir = tempfile.mkdtemp(prefix="hooks-benchmark-")
+    media_dir = os.path.join(work_dir, "media")
+    os.makedirs(media_dir)
+    media_name = _make_media(args.media, args.media_seconds, media_dir) if "analyze" in scenarios else None
+
+    # Los servidores falsos corren en otro proceso: no compiten por el GIL con la app
+    context = multiprocessing.get_context("spawn")
+    channel = context.Queue()
+    stop = context.Event()
+    fakes = context.Process(target=serve_fakes, args=(vars(args), media_dir, channel, stop), daemon=True)
+    fakes.start()
+    server = None
+    # yt-dlp escribe su progreso en stdout: durante la corrida va a stderr, para no mezclarse con el reporte
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            urls = channel.get(timeout=60)
+            _configure_environment(urls, work_dir, args.with_caches)
+            server, thread, base_url = _start_app()
+
+            media_url = f"{urls['media']}/media/{quote(media_name)}" if media_name else ""
+            run_id = uuid.uuid4().hex[:8]
+            results = {}
+            for scenario in scenarios:
+                build = _scenario_requests(scenario, media_url, max(1, args.users), args.mode, run_id)
+                results[scenario] = asyncio.run(
+                    run_scenario(base_url, build, args.requests, args.concurrency, args.warmup, args.timeout)
+                )
+                print(f"{scenario}: {results[scenario]['ok']}/{args.requests} ok, "
+                      f"{results[scenario]['throughput_rps']} req/s", file=sys.stderr)
+
+            report = {
+                "config": {key: value for key, value in vars(args).items() if key != "output"},
+                "scenarios": results,
+                "peak_rss_mb": {
+                    "app": _peak_rss_mb(resource.RUSAGE_SELF),
+                    "subprocesses": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+                },
+                "app": _app_stats(base_url),
+            }
+            stop.set()
+            report["fakes"] = channel.get(timeout=30)
+        finally:
+            stop.set()
+            if server is not None:
+                server.should_exit = True
+                thread.join(timeout=10)
+            fakes.join(timeout=10)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Segmentación por silencios y unión de transcripciones (app.services.audio_chunking).
+"""
+import wave
+import numpy as np
+import pytest
+from app.services.audio_chunking import plan_segments, stitch_transcripts, wav_duration, write_segment
+
+SAMPLE_RATE = 16000
+
+
+def _write_wav(path, samples: np.ndarray) -> str:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+
+def _noise_with_silences(seconds: float, silences):
+    """Ruido fuerte con tramos en silencio (inicio, fin) en segundos."""
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-8000, 8000, int(seconds * SAMPLE_RATE))
+    for start, end in silences:
+        samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0
+    return samples
+
+
+@pytest.fixture
+def noise_wav(tmp_path):
+    return _write_wav(tmp_path / "noise.wav", _noise_with_silences(30, []))
+
+
+def _assert_contiguous(segments, duration):
+    assert segments[0]["keep_from"] == 0.0
+    assert segments[0]["start"] == 0.0
+    assert segments[-1]["keep_until"] == pytest.approx(duration)
+    assert segments[-1]["end"] == pytest.approx(duration)
+    for previous, current in zip(segments, segments[1:]):
+        assert previous["keep_until"] == current["keep_from"]
+        assert current["start"] <= current["keep_from"] <= previous["end"]
+
+
+def test_cuts_land_in_the_nearest_silence(tmp_path):
+    path = _write_wav(tmp_path / "speech.wav", _noise_with_silences(60, [(17.0, 17.4), (41.5, 41.9)]))
+
+    segments = plan_segments(path, chunk_seconds=20, overlap_seconds=1.0, search_seconds=5.0)
+
+    cuts = [segment["keep_from"] for segment in segments[1:]]
+    assert len(cuts) == 2
+    assert 17.0 <= cuts[0] <= 17.4
+    assert 41.5 <= cuts[1] <= 41.9
+    _assert_contiguous(segments, 60)
+    assert segments[1]["start"] == pytest.approx(cuts[0] - 1.0)
+    assert segments[0]["end"] == pytest.approx(cuts[0] + 1.0)
+
+
+def test_short_audio_is_a_single_segment(noise_wav):
+    assert plan_segments(noise_wav, chunk_seconds=25) == [
+        {"start": 0.0, "end": 30.0, "keep_from": 0.0, "keep_until": 30.0}
+    ]
+
+
+@pytest.mark.parametrize("chunk_seconds", [1, 3, 5, 10])
+def test_cuts_always_advance(noise_wav, chunk_seconds):
+    segments = plan_segments(noise_wav, chunk_seconds=chunk_seconds, search_seconds=10.0)
+
+    cuts = [segment["keep_from"] for segment in segments[1:]]
+    for previous, current in zip([0.0, *cuts], cuts):
+        assert current - previous >= chunk_seconds / 2
+    _assert_contiguous(segments, wav_duration(noise_wav))
+
+
+def test_rejects_a_non_positive_chunk(noise_wav):
+    with pytest.raises(ValueError):
+        plan_segments(noise_wav, chunk_seconds=0)
+
+
+def test_write_segment_copies_the_requested_range(noise_wav, tmp_path):
+    output = write_segment(noise_wav, {"start": 2.0, "end": 5.5}, str(tmp_path / "part.wav"))
+
+    assert wav_duration(output) == pytest.approx(3.5)
+
+
+def test_stitch_drops_words_duplicated_by_the_overlap():
+    segments = [
+        {"start": 0.0, "end": 11.0, "keep_from": 0.0, "keep_until": 10.0},
+        {"start": 9.0, "end": 20.0, "keep_from": 10.0, "keep_until": 20.0},
+    ]
+    results = [
+        {"words": [
+            {"word": "hola", "start": 1.0, "end": 1.5},
+            {"word": "mundo", "punctuated_word": "mundo,", "start": 9.0, "end": 9.6},
+            {"word": "cómo", "start": 10.2, "end": 10.8},
+        ]},
+        {"words": [
+            # Solape: "mundo" (9.0-9.6 en tiempo absoluto) ya lo aportó el primer segmento
+            {"word": "mundo", "start": 0.0, "end": 0.6},
+            {"word": "cómo", "start": 1.2, "end": 1.8},
+            {"word": "estás", "start": 2.0, "end": 2.5},
+        ]},
+    ]
+
+    assert stitch_transcripts(segments, results) == "hola mundo, cómo estás"
+
+
+def test_stitch_uses_the_text_when_a_segment_has_no_words():
+    segments = [
+        {"start": 0.0, "end": 11.0, "keep_from": 0.0, "keep_until": 10.0},
+        {"start": 9.0, "end": 20.0, "keep_from": 10.0, "keep_until": 20.0},
+    ]
+    results = [
+        {"transcript": " primera parte ", "words": []},
+        {"words": [{"word": "final", "start": 3.0, "end": 3.5}]},
+    ]
+
+    assert stitch_transcripts(segments, results) == "primera parte final"
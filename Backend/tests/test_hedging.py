@@ -0,0 +1,172 @@
+"""
+Plazos y copias de respaldo de las llamadas a OpenAI (app.services.hedging).
+"""
+import asyncio
+import threading
+import time
+import pytest
+from app.services.hedging import DeadlineExceeded, Hedger, LatencyTracker
+
+
+def _hedger(**kwargs) -> Hedger:
+    options = {
+        "timeout": 2.0,
+        "enabled": True,
+        "percentile": 95,
+        "min_samples": 1,
+        "min_delay": 0.01,
+        "max_rate": 1.0,
+        "window": 20,
+    }
+    return Hedger(**{**options, **kwargs})
+
+
+def _slow_then_fast():
+    """Primer intento lento, los siguientes rápidos; cuenta los intentos."""
+    attempts = []
+    lock = threading.Lock()
+
+    def attempt(deadline):
+        with lock:
+            attempts.append(1)
+            number = len(attempts)
+        time.sleep(0.5 if number == 1 else 0.01)
+        return number
+
+    return attempt, attempts
+
+
+def test_latency_tracker_percentile_uses_the_recent_window():
+    tracker = LatencyTracker(window=4)
+    assert tracker.percentile(50) is None
+
+    for seconds in (9.0, 1.0, 2.0, 3.0, 4.0):
+        tracker.add(seconds)
+
+    assert len(tracker) == 4
+    assert tracker.percentile(50) == 2.0
+    assert tracker.percentile(95) == 4.0
+
+
+def test_without_samples_the_call_runs_once():
+    hedger = _hedger()
+    attempt, attempts = _slow_then_fast()
+
+    assert hedger.run("analyze", attempt) == 1
+    assert len(attempts) == 1
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_the_copy_wins():
+    hedger = _hedger()
+    hedger._record("analyze", 0.02)
+    attempt, attempts = _slow_then_fast()
+
+    assert hedger.run("analyze", attempt) == 2
+
+    stats = hedger.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["hedge_win_rate"] == 1.0
+
+
+def test_hedges_are_limited_by_the_budget():
+    hedger = _hedger(max_rate=0.1)
+    hedger._record("analyze", 0.02)
+    attempt, attempts = _slow_then_fast()
+
+    assert hedger.run("analyze", attempt) == 1
+    assert len(attempts) == 1
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_missed_deadline_raises_and_is_counted():
+    hedger = _hedger(timeout=0.05, enabled=False)
+
+    def attempt(deadline):
+        time.sleep(0.2)
+        raise TimeoutError("el SDK venció el timeout")
+
+    with pytest.raises(DeadlineExceeded):
+        hedger.run("analyze", attempt)
+    assert hedger.stats()["deadline_exceeded"] == 1
+
+
+def test_errors_before_the_deadline_are_raised_as_is():
+    hedger = _hedger(enabled=False)
+
+    def attempt(deadline):
+        raise ValueError("respuesta inválida")
+
+    with pytest.raises(ValueError, match="respuesta inválida"):
+        hedger.run("analyze", attempt)
+    assert hedger.stats()["deadline_exceeded"] == 0
+
+
+def test_async_hedge_wins_and_the_loser_is_cancelled():
+    hedger = _hedger()
+    hedger._record("analyze", 0.02)
+    attempts = []
+    cancelled = []
+
+    async def attempt(deadline):
+        attempts.append(1)
+        number = len(attempts)
+        try:
+            await asyncio.sleep(0.5 if number == 1 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(number)
+            raise
+        return number
+
+    async def main():
+        result = await hedger.arun("analyze", attempt)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 2
+    assert cancelled == [1]
+
+
+def test_async_deadline_exceeded():
+    hedger = _hedger(timeout=0.05, enabled=False)
+
+    async def attempt(deadline):
+        await asyncio.sleep(1)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(hedger.arun("analyze", attempt))
+
+
+def test_aiterate_bounds_the_whole_stream():
+    hedger = _hedger()
+
+    async def drip():
+        for index in range(100):
+            await asyncio.sleep(0.02)
+            yield index
+
+    async def read(deadline):
+        items = []
+        with pytest.raises(DeadlineExceeded):
+            async for item in hedger.aiterate("hooks", drip(), deadline):
+                items.append(item)
+        return items
+
+    items = asyncio.run(read(time.monotonic() + 0.2))
+
+    assert 0 < len(items) < 100
+    assert hedger.stats()["deadline_exceeded"] == 1
+
+
+def test_aiterate_passes_through_a_stream_that_finishes_in_time():
+    hedger = _hedger()
+
+    async def stream():
+        yield "a"
+        yield "b"
+
+    async def read():
+        return [item async for item in hedger.aiterate("hooks", stream(), time.monotonic() + 1)]
+
+    assert asyncio.run(read()) == ["a", "b"]
@@ -0,0 +1,66 @@
+"""
+Parser incremental de los objetos de un arreglo JSON (app.services.incremental_json).
+"""
+import json
+from app.services.incremental_json import JsonArrayItemParser
+
+DOCUMENT = json.dumps({
+    "hooks": [
+        {"text": "¿Sabías que {esto} funciona?", "type": "pregunta", "retention_score": 9},
+        {"text": "Dijo \"no\" y [todo] cambió", "type": "historia", "retention_score": 8},
+        {"text": "Tres pasos", "type": "lista", "retention_score": 7, "extra": {"tags": [1, {"a": "}"}]}},
+    ]
+}, ensure_ascii=False)
+
+
+def _feed_all(parser: JsonArrayItemParser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_emits_each_item_in_order():
+    parser = JsonArrayItemParser("hooks")
+
+    assert parser.feed(DOCUMENT) == json.loads(DOCUMENT)["hooks"]
+
+
+def test_chunk_boundaries_do_not_matter():
+    expected = json.loads(DOCUMENT)["hooks"]
+
+    for size in (1, 2, 3, 7, 64):
+        parser = JsonArrayItemParser("hooks")
+        chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+        assert _feed_all(parser, chunks) == expected
+        assert parser.text == DOCUMENT
+
+
+def test_item_is_emitted_as_soon_as_it_closes():
+    parser = JsonArrayItemParser("hooks")
+
+    assert parser.feed('{"hooks": [{"text": "uno"}, {"text": "do') == [{"text": "uno"}]
+    assert parser.feed('s"}') == [{"text": "dos"}]
+    assert parser.feed("]}") == []
+
+
+def test_ignores_other_keys_and_strings_that_look_like_the_key():
+    parser = JsonArrayItemParser("hooks")
+    document = '{"note": "hooks", "meta": [{"ignored": true}], "hooks": [{"text": "sí"}]}'
+
+    assert parser.feed(document) == [{"text": "sí"}]
+
+
+def test_skips_invalid_items_but_keeps_the_full_text():
+    parser = JsonArrayItemParser("hooks")
+    document = '{"hooks": [{"text": tru}, {"text": "ok"}]}'
+
+    assert parser.feed(document) == [{"text": "ok"}]
+    assert parser.text == document
+
+
+def test_empty_chunks_and_missing_array():
+    parser = JsonArrayItemParser("hooks")
+
+    assert parser.feed("") == []
+    assert parser.feed('{"error": "sin hooks"}') == []
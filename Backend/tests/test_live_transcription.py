@@ -0,0 +1,75 @@
+"""
+Cliente live de Deepgram (DeepgramLiveTranscriber) contra el servidor falso
+de benchmarks.fakes.deepgram_live, sin red ni credenciales.
+"""
+import pytest
+from app.services.live_transcription import DeepgramLiveTranscriber
+from benchmarks.fakes.deepgram_live import FakeDeepgramLive
+
+TRANSCRIPT = "uno dos tres cuatro cinco seis siete ocho nueve diez once doce"
+# Un segundo de PCM 16 bits mono a 16 kHz
+SECOND = 16000 * 2
+
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(**kwargs) -> FakeDeepgramLive:
+        server = FakeDeepgramLive(transcript=TRANSCRIPT, words_per_second=3, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def _transcriber(server: FakeDeepgramLive) -> DeepgramLiveTranscriber:
+    return DeepgramLiveTranscriber(
+        url=server.url,
+        api_key="test",
+        params={"encoding": "linear16", "sample_rate": "16000", "interim_results": "true"},
+        timeout=10
+    )
+
+
+def _audio(seconds: int, chunk_size: int = SECOND // 4):
+    """PCM en silencio, en chunks de un cuarto de segundo."""
+    for _ in range(seconds * SECOND // chunk_size):
+        yield b"\0" * chunk_size
+
+
+def test_transcribe_joins_finals_and_reports_interims(fake_server):
+    server = fake_server()
+    results = []
+
+    transcript = _transcriber(server).transcribe(_audio(3), on_result=lambda text, final: results.append((text, final)))
+
+    assert transcript == TRANSCRIPT
+    # Por segundo: un parcial con la primera palabra y el final con las tres
+    assert [text for text, final in results if not final] == ["uno", "cuatro", "siete"]
+    # Tres finales por el audio y uno con el resto al recibir CloseStream
+    assert [text for text, final in results if final] == [
+        "uno dos tres", "cuatro cinco seis", "siete ocho nueve", "diez once doce",
+    ]
+    assert server.sessions == 1
+    assert server.audio_bytes == 3 * SECOND
+
+
+def test_transcribe_raises_when_server_closes_with_error(fake_server):
+    server = fake_server(fail_after_bytes=SECOND)
+
+    with pytest.raises(Exception, match=r"Deepgram cerró la conexión \(1011\)"):
+        _transcriber(server).transcribe(_audio(3))
+
+
+def test_transcribe_raises_when_audio_fails(fake_server):
+    server = fake_server()
+
+    def broken_audio():
+        yield b"\0" * SECOND
+        raise IOError("ffmpeg terminó antes de tiempo")
+
+    with pytest.raises(Exception, match="ffmpeg terminó antes de tiempo"):
+        _transcriber(server).transcribe(broken_audio())
@@ -0,0 +1,82 @@
+"""
+Modelo y presupuesto de tokens por etapa (app.services.model_router).
+"""
+import math
+import pytest
+from app.services.model_router import ContextWindowExceeded, ModelRouter
+from app.services.token_estimator import context_window, estimate_message_tokens, estimate_tokens
+
+MODEL = "gpt-4"  # Ventana de 8192 tokens: chica para que los límites se noten
+
+
+@pytest.fixture
+def router() -> ModelRouter:
+    return ModelRouter({
+        "improve": {"model": MODEL, "max_tokens": 2000, "output_ratio": 1.25, "min_output": 64},
+        "analyze": {"model": MODEL, "max_tokens": 1000, "output_ratio": 0, "min_output": 0},
+    })
+
+
+def _messages(text: str):
+    return [
+        {"role": "system", "content": "Corrige la transcripción sin cambiar su sentido."},
+        {"role": "user", "content": text},
+    ]
+
+
+def _text(words: int) -> str:
+    return " ".join(["palabra"] * words)
+
+
+def test_max_tokens_follows_the_transcript_length(router):
+    text = _text(20)
+
+    expected = 64 + math.ceil(1.25 * estimate_tokens(text, MODEL))
+    assert router.max_tokens("improve", _messages(text), text) == expected
+
+
+def test_max_tokens_is_capped(router):
+    text = _text(2000)
+
+    assert router.max_tokens("improve", _messages(text), text) == 2000
+    assert router.max_tokens("analyze", _messages(text)) == 1000
+
+
+def test_prompt_that_does_not_fit_the_context_raises(router):
+    text = _text(5000)
+
+    with pytest.raises(ContextWindowExceeded, match=MODEL):
+        router.max_tokens("analyze", _messages(text))
+
+
+def test_max_input_chars_fits_the_cap_and_the_context(router):
+    chars = router.max_input_chars("improve", _messages(""))
+    text = ("palabra " * chars)[:chars]
+
+    assert router.output_fits("improve", text)
+    max_tokens = router.max_tokens("improve", _messages(text), text)
+    assert estimate_message_tokens(_messages(text), MODEL) + max_tokens <= context_window(MODEL)
+    assert not router.output_fits("improve", text + " palabra" * (chars // 8))
+
+
+def test_max_input_chars_is_limited_by_the_context_window():
+    router = ModelRouter({
+        "improve": {"model": MODEL, "max_tokens": 100_000, "output_ratio": 1.0, "min_output": 0},
+    })
+
+    chars = router.max_input_chars("improve", _messages(""))
+    text = ("palabra " * chars)[:chars]
+
+    assert estimate_message_tokens(_messages(text), MODEL) + estimate_tokens(text, MODEL) <= context_window(MODEL)
+    router.max_tokens("improve", _messages(text), text)
+
+
+def test_stages_without_output_ratio_always_fit(router):
+    assert router.output_fits("analyze", _text(100_000))
+
+
+def test_unknown_stage_uses_the_default_model(router):
+    route = router.route("desconocida")
+
+    assert route["max_tokens"] == 0
+    assert route["output_ratio"] == 0
@@ -0,0 +1,148 @@
+"""
+Token buckets, concurrencia adaptativa (AIMD) y reintentos (app.services.rate_limiter).
+"""
+import time
+import pytest
+from app.services.hedging import DeadlineExceeded
+from app.services.rate_limiter import (
+    ProviderHTTPError,
+    ProviderRateLimiter,
+    RateLimitExceeded,
+    TokenBucket,
+    _parse_duration,
+    _retry_after,
+)
+
+
+def _limiter(**kwargs) -> ProviderRateLimiter:
+    options = {"max_concurrency": 8, "max_retries": 2, "base_delay": 0.0, "max_delay": 0.0}
+    return ProviderRateLimiter("test", **{**options, **kwargs})
+
+
+def test_bucket_refills_continuously_up_to_its_capacity():
+    bucket = TokenBucket(60)
+    start = bucket._updated
+
+    assert bucket.wait_time(60, start) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, start) == pytest.approx(1.0)
+    assert bucket.available(start + 30) == pytest.approx(30)
+    assert bucket.available(start + 600) == pytest.approx(60)
+
+
+def test_bucket_request_larger_than_capacity_waits_for_a_full_bucket():
+    bucket = TokenBucket(60)
+    start = bucket._updated
+    bucket.take(30)
+
+    assert bucket.wait_time(500, start) == pytest.approx(30.0)
+
+
+def test_bucket_sync_adopts_provider_quota():
+    bucket = TokenBucket(100)
+    start = bucket._updated
+
+    bucket.sync(limit=1000, remaining=10, now=start)
+
+    assert bucket.per_minute == 1000
+    assert bucket.available(start) == 10
+
+
+def test_success_increases_concurrency_additively():
+    limiter = _limiter(max_concurrency=4)
+    limiter.concurrency = 2.0
+
+    limiter._succeeded(None)
+    limiter._succeeded(None)
+
+    # +1/ventana: 2 → 2.5 → 2.9
+    assert limiter.concurrency == pytest.approx(2.9)
+    for _ in range(50):
+        limiter._succeeded(None)
+    assert limiter.concurrency == 4
+
+
+def test_rate_limit_halves_concurrency_once_per_cooldown():
+    limiter = _limiter(max_concurrency=8, min_concurrency=3)
+
+    limiter._rate_limited({}, None)
+    # Los 429 de llamadas que ya estaban en vuelo no la vuelven a reducir
+    limiter._rate_limited({}, None)
+    assert limiter.concurrency == 4
+
+    limiter._last_decrease -= 10
+    limiter._rate_limited({}, None)
+    assert limiter.concurrency == 3
+    assert limiter.stats()["rate_limited"] == 3
+
+
+def test_call_retries_transient_errors():
+    limiter = _limiter()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ProviderHTTPError("no disponible", 503)
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_call_raises_rate_limit_exceeded_after_the_retries():
+    limiter = _limiter()
+
+    def rejected():
+        raise ProviderHTTPError("demasiadas peticiones", 429, {"retry-after": "0"})
+
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.call(rejected)
+    assert error.value.provider == "test"
+    assert error.value.retry_after == 0.0
+
+
+def test_call_does_not_retry_client_errors():
+    limiter = _limiter()
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise ProviderHTTPError("petición inválida", 400)
+
+    with pytest.raises(ProviderHTTPError):
+        limiter.call(invalid)
+    assert len(attempts) == 1
+
+
+def test_waiting_past_the_deadline_raises():
+    limiter = _limiter(requests_per_minute=1)
+    limiter.call(lambda: "primera")
+
+    with pytest.raises(DeadlineExceeded):
+        limiter.call(lambda: "segunda", deadline=time.monotonic() + 1)
+
+
+def test_observe_blocks_until_the_quota_resets():
+    limiter = _limiter()
+
+    limiter.observe({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "6m0s",
+    })
+
+    stats = limiter.stats()
+    assert stats["buckets"]["requests"]["per_minute"] == 500
+    assert 359 < stats["blocked_seconds"] <= 360
+
+
+def test_header_parsing():
+    assert _parse_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert _parse_duration("20ms") == pytest.approx(0.02)
+    assert _parse_duration("7") == 7.0
+    assert _parse_duration("pronto") is None
+    assert _retry_after({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert _retry_after({"retry-after": "2"}) == 2.0
+    assert _retry_after({}) is None
@@ -0,0 +1,139 @@
+"""
+Deduplicación de trabajos idénticos en curso (app.services.single_flight).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "la condición no se cumplió a tiempo"
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight(enabled=True)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"hook": "compartido"}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flights.do, "video", work)
+        assert started.wait(5)
+        followers = [executor.submit(flights.do, "video", work) for _ in range(3)]
+        # Esperar a que los seguidores se unan antes de liberar al líder
+        _wait_until(lambda: flights.stats()["coalesced"] == 3)
+        release.set()
+        results = [leader.result(5), *(future.result(5) for future in followers)]
+
+    assert len(calls) == 1
+    assert results[0] == ({"hook": "compartido"}, False)
+    assert all(result == ({"hook": "compartido"}, True) for result in results[1:])
+    assert results[1][0] is results[0][0]
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "coalesced": 3}
+
+
+def test_followers_receive_the_leader_error():
+    flights = SingleFlight(enabled=True)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("URL no válida")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, "video", fail)
+        assert started.wait(5)
+        follower = executor.submit(flights.do, "video", fail)
+        _wait_until(lambda: flights.stats()["coalesced"] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="URL no válida"):
+                future.result(5)
+
+    assert not flights.in_flight("video")
+
+
+def test_sequential_and_disabled_calls_run_every_time():
+    enabled = SingleFlight(enabled=True)
+    disabled = SingleFlight(enabled=False)
+
+    assert enabled.do("video", lambda: 1) == (1, False)
+    assert enabled.do("video", lambda: 2) == (2, False)
+    assert disabled.do("video", lambda: 3) == (3, False)
+    assert enabled.stats()["executed"] == 2
+
+
+def test_async_calls_share_one_task():
+    flights = AsyncSingleFlight(enabled=True)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("video", work) for _ in range(3)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert results == [("resultado", False), ("resultado", True), ("resultado", True)]
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "coalesced": 2}
+
+
+def test_async_work_survives_the_leader_cancellation():
+    flights = AsyncSingleFlight(enabled=True)
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "resultado"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("video", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("video", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ("resultado", True)
+
+
+def test_async_work_is_cancelled_when_nobody_waits():
+    flights = AsyncSingleFlight(enabled=True)
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        caller = asyncio.ensure_future(flights.do("video", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert cancelled == [1]
+    assert not flights.in_flight("video")
@@ -0,0 +1,48 @@
+"""
+División de transcripts en fragmentos por oraciones (app.services.transcript_chunking).
+"""
+from app.services.transcript_chunking import chunk_transcript, split_sentences
+
+TRANSCRIPT = (
+    "Hoy te enseño tres trucos. El primero cuesta 3.5 dólares, etc., y funciona! "
+    "¿El segundo? Nadie lo usa… El tercero es gratis."
+)
+
+
+def test_split_sentences_keeps_decimals_and_abbreviations():
+    assert split_sentences(TRANSCRIPT) == [
+        "Hoy te enseño tres trucos.",
+        "El primero cuesta 3.5 dólares, etc., y funciona!",
+        "¿El segundo?",
+        "Nadie lo usa…",
+        "El tercero es gratis.",
+    ]
+
+
+def test_short_text_is_a_single_chunk():
+    assert chunk_transcript(f"  {TRANSCRIPT}  ", 1000) == [TRANSCRIPT]
+
+
+def test_chunks_group_whole_sentences_up_to_the_limit():
+    chunks = chunk_transcript(TRANSCRIPT, 60)
+
+    assert chunks == [
+        "Hoy te enseño tres trucos.",
+        "El primero cuesta 3.5 dólares, etc., y funciona!",
+        "¿El segundo? Nadie lo usa… El tercero es gratis.",
+    ]
+    assert " ".join(chunks) == TRANSCRIPT
+
+
+def test_long_sentence_without_punctuation_is_split_by_words():
+    text = " ".join(f"palabra{i}" for i in range(50))
+
+    chunks = chunk_transcript(text, 40)
+
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_no_limit_and_empty_text():
+    assert chunk_transcript(TRANSCRIPT, 0) == [TRANSCRIPT]
+    assert chunk_transcript("   ", 10) == []